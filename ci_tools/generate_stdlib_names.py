@@ -0,0 +1,52 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+from os.path import abspath
+
+import click
+from stdlib_list import stdlib_list, short_versions
+
+
+HEADER = """#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+# GENERATED FILE - DO NOT EDIT. See ci_tools/generate_stdlib_names.py
+#
+# Names of the top-level modules of the standard library for python versions where `sys.stdlib_module_names` is not
+# available (< 3.10), generated from `stdlib_list`.
+"""
+
+
+@click.command()
+@click.argument('dest_folder')
+def generate_stdlib_names(dest_folder):
+    names = set()
+    for v in short_versions:
+        if tuple(int(i) for i in v.split('.')) < (3, 10):
+            names.update(n.split('.')[0] for n in stdlib_list(v))
+
+    # this is not a standard library module, it is the user's entry point
+    names.discard('__main__')
+
+    file_name = '%s/_stdlib_names.py' % dest_folder
+    print("Writing %s standard library module names to file: %s" % (len(names), abspath(file_name)))
+
+    lines = [HEADER, "LEGACY_STDLIB_MODULE_NAMES = frozenset(("]
+    line = "   "
+    for n in sorted(names):
+        item = " '%s'," % n
+        if len(line) + len(item) > 120:
+            lines.append(line)
+            line = "   "
+        line += item
+    lines.append(line)
+    lines.append("))\n")
+
+    with open(file_name, 'wt') as f:
+        f.write("\n".join(lines))
+
+
+if __name__ == '__main__':
+    generate_stdlib_names()
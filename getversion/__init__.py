@@ -2,7 +2,13 @@
 #
 #  License: BSD 3 clause
 
-from getversion.main import get_module_version, DetailedResults, ModuleVersionNotFound
+from getversion.main import get_module_version, get_version_str, get_module_versions, iter_module_versions, \
+    DetailedResults, ModuleVersionNotFound, StrategyFailure, enable_full_errors, disable_full_errors, version_cache
+from getversion.cache import VersionCache
+from getversion.instrumentation import enable_stats, disable_stats, stats
+from getversion.persistence import PersistentVersionCache, enable_persistent_cache, disable_persistent_cache
+from getversion.snapshot import write_snapshot, use_snapshot
+from getversion.adaptive import enable_adaptive_ordering, disable_adaptive_ordering
 
 try:
     # import version from _version.py generated by setuptools_scm
@@ -18,7 +24,11 @@ except ImportError:
 
 __all__ = [
     # submodules
-    'main',
+    'main', 'cache', 'instrumentation', 'persistence', 'snapshot', 'dispatch', 'adaptive',
     # symbols imported above
-    'get_module_version', 'DetailedResults', 'ModuleVersionNotFound'
+    'get_module_version', 'get_version_str', 'get_module_versions', 'iter_module_versions', 'DetailedResults',
+    'ModuleVersionNotFound', 'StrategyFailure', 'enable_full_errors', 'disable_full_errors', 'version_cache',
+    'VersionCache', 'enable_stats', 'disable_stats', 'stats',
+    'PersistentVersionCache', 'enable_persistent_cache', 'disable_persistent_cache',
+    'write_snapshot', 'use_snapshot', 'enable_adaptive_ordering', 'disable_adaptive_ordering'
 ]
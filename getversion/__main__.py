@@ -0,0 +1,117 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+"""
+Command line interface streaming a version inventory as NDJSON (one json object per line):
+
+    python -m getversion [--all] [--path DIR ...] [module_name ...]
+
+Each line is written as soon as the version of the corresponding module is resolved, so that large inventories can
+be piped into other tools without being buffered.
+"""
+import json
+import sys
+from argparse import ArgumentParser
+from collections import OrderedDict
+from pkgutil import iter_modules
+
+try:  # python 3.5+
+    from typing import Any, Dict, Iterable, Iterator
+except ImportError:
+    pass
+
+from getversion import instrumentation
+from getversion.main import get_module_version, get_strategy_name, ModuleVersionNotFound
+from getversion.snapshot import iter_top_level_module_names
+
+
+def iter_module_names(module_names,  # type: Iterable[str]
+                      all_modules,   # type: bool
+                      paths          # type: Iterable[str]
+                      ):
+    # type: (...) -> Iterator[str]
+    """
+    Yields the names of the modules to resolve, lazily and without duplicates: `module_names`, then the top-level
+    modules found in `paths`, then if `all_modules` is True all importable top-level modules.
+    """
+    seen = set()
+    sources = [module_names, (module_info[1] for module_info in iter_modules(paths))]
+    if all_modules:
+        sources.append(iter_top_level_module_names())
+    for source in sources:
+        for name in source:
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+
+def _by_name(dct,            # type: Dict
+             convert=str     # type: Any
+             ):
+    # type: (...) -> Dict[str, Dict[str, Any]]
+    """Converts an errors or timings dict {module name: {strategy: value}} to a json-compliant dict"""
+    return OrderedDict((module_name, OrderedDict((get_strategy_name(strategy), convert(v))
+                                                 for strategy, v in d.items()))
+                       for module_name, d in dct.items())
+
+
+def get_version_record(module_name  # type: str
+                       ):
+    # type: (...) -> Dict[str, Any]
+    """
+    Resolves the version of `module_name` with `get_module_version` and returns it as a json-compliant dict with keys
+    'module', 'version', 'strategy' (the winning strategy) and 'timings' (the wall time in seconds of each strategy
+    applied, when instrumentation is enabled). When the version can not be found, 'version' is None and 'error' and
+    'attempts' describe the failure.
+
+    :param module_name:
+    :return:
+    """
+    record = OrderedDict([('module', module_name), ('version', None)])
+    try:
+        version, details = get_module_version(module_name)
+    except ModuleVersionNotFound as e:
+        record['error'] = "Unable to get version for module '%s'" % module_name
+        record['attempts'] = _by_name(e.err_dct)
+    except (ImportError, ValueError) as e:
+        record['error'] = str(e)
+    else:
+        record['version'] = version
+        record['strategy'] = get_strategy_name(details.winning_strategy)
+        if details.timings is not None:
+            record['timings'] = _by_name(details.timings, convert=float)
+    return record
+
+
+def main(args=None):
+    parser = ArgumentParser(prog='python -m getversion',
+                            description="Streams the versions of python modules as NDJSON, one json object per "
+                                        "module. Modules are not imported.")
+    parser.add_argument('modules', nargs='*', help="names of the modules to resolve")
+    parser.add_argument('--all', dest='all_modules', action='store_true',
+                        help="resolve all importable top-level modules (from sys.path)")
+    parser.add_argument('--path', dest='paths', action='append', default=[], metavar='DIR',
+                        help="resolve all top-level modules in DIR. DIR is added to sys.path. Can be repeated.")
+    parser.add_argument('--no-timings', dest='timings', action='store_false',
+                        help="do not measure the time spent in each strategy")
+    options = parser.parse_args(args)
+
+    if not (options.modules or options.all_modules or options.paths):
+        parser.error("no module to resolve: provide module names, --all or --path")
+
+    for path in reversed(options.paths):
+        sys.path.insert(0, path)
+
+    if options.timings:
+        instrumentation.enable_stats()
+
+    out = sys.stdout
+    for module_name in iter_module_names(options.modules, options.all_modules, options.paths):
+        out.write(json.dumps(get_version_record(module_name), separators=(',', ':')))
+        out.write('\n')
+        out.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+# GENERATED FILE - DO NOT EDIT. See ci_tools/generate_stdlib_names.py
+#
+# Names of the top-level modules of the standard library for python versions where `sys.stdlib_module_names` is not
+# available (< 3.10), generated from `stdlib_list`.
+
+LEGACY_STDLIB_MODULE_NAMES = frozenset((
+    'AL', 'BaseHTTPServer', 'Bastion', 'CGIHTTPServer', 'Canvas', 'Carbon', 'ColorPicker', 'ConfigParser', 'Cookie',
+    'DEVICE', 'Dialog', 'DocXMLRPCServer', 'EasyDialogs', 'FL', 'FileDialog', 'FixTk', 'FrameWork', 'GL', 'HTMLParser',
+    'MacOS', 'MimeWriter', 'MiniAEFrame', 'Nav', 'PixMapWrapper', 'Queue', 'SUNAUDIODEV', 'ScrolledText',
+    'SimpleDialog', 'SimpleHTTPServer', 'SimpleXMLRPCServer', 'SocketServer', 'StringIO', 'Tix', 'Tkconstants', 'Tkdnd',
+    'Tkinter', 'UserDict', 'UserList', 'UserString', 'W', '_LWPCookieJar', '_MozillaCookieJar', '__builtin__',
+    '__future__', '__phello__', '_abc', '_abcoll', '_aix_support', '_ast', '_asyncio', '_bisect', '_blake2',
+    '_bootlocale', '_bootsubprocess', '_bsddb', '_bz2', '_codecs', '_codecs_cn', '_codecs_hk', '_codecs_iso2022',
+    '_codecs_jp', '_codecs_kr', '_codecs_tw', '_collections', '_collections_abc', '_compat_pickle', '_compression',
+    '_contextvars', '_crypt', '_csv', '_ctypes', '_ctypes_test', '_curses', '_curses_panel', '_datetime', '_dbm',
+    '_decimal', '_dummy_thread', '_elementtree', '_frozen_importlib', '_frozen_importlib_external', '_functools',
+    '_gdbm', '_hashlib', '_heapq', '_hotshot', '_imp', '_io', '_json', '_locale', '_lsprof', '_lzma', '_markupbase',
+    '_md5', '_multibytecodec', '_multiprocessing', '_opcode', '_operator', '_osx_support', '_peg_parser', '_pickle',
+    '_posixshmem', '_posixsubprocess', '_py_abc', '_pydecimal', '_pyio', '_queue', '_random', '_sha', '_sha1',
+    '_sha256', '_sha3', '_sha512', '_signal', '_sitebuiltins', '_socket', '_sqlite3', '_sre', '_ssl', '_stat',
+    '_statistics', '_string', '_strptime', '_struct', '_symtable', '_sysconfigdata',
+    '_sysconfigdata_x86_64_conda_cos6_linux_gnu', '_sysconfigdata_x86_64_conda_linux_gnu', '_testbuffer', '_testcapi',
+    '_testimportmultiple', '_testinternalcapi', '_testmultiphase', '_thread', '_threading_local', '_tkinter',
+    '_tracemalloc', '_uuid', '_warnings', '_weakref', '_weakrefset', '_winreg', '_xxsubinterpreters', '_xxtestfuzz',
+    'abc', 'aepack', 'aetools', 'aetypes', 'aifc', 'al', 'antigravity', 'anydbm', 'applesingle', 'argparse', 'array',
+    'ast', 'asynchat', 'asyncio', 'asyncore', 'atexit', 'audiodev', 'audioop', 'autoGIL', 'base64', 'bdb', 'binascii',
+    'binhex', 'bisect', 'bsddb', 'buildtools', 'builtins', 'bz2', 'cPickle', 'cProfile', 'cStringIO', 'calendar', 'cd',
+    'cfmfile', 'cgi', 'cgitb', 'chunk', 'cmath', 'cmd', 'code', 'codecs', 'codeop', 'collections', 'colorsys',
+    'commands', 'compileall', 'compiler', 'concurrent', 'configparser', 'contextlib', 'contextvars', 'cookielib',
+    'copy', 'copy_reg', 'copyreg', 'crypt', 'csv', 'ctypes', 'curses', 'dataclasses', 'datetime', 'dbhash', 'dbm',
+    'decimal', 'difflib', 'dircache', 'dis', 'distutils', 'dl', 'doctest', 'dumbdbm', 'dummy_thread', 'dummy_threading',
+    'email', 'encodings', 'ensurepip', 'enum', 'errno', 'exceptions', 'faulthandler', 'fcntl', 'filecmp', 'fileinput',
+    'findertools', 'fl', 'flp', 'fm', 'fnmatch', 'formatter', 'fpectl', 'fpformat', 'fractions', 'ftplib', 'functools',
+    'future_builtins', 'gc', 'gdbm', 'genericpath', 'gensuitemodule', 'getopt', 'getpass', 'gettext', 'gl', 'glob',
+    'graphlib', 'grp', 'gzip', 'hashlib', 'heapq', 'hmac', 'hotshot', 'html', 'htmlentitydefs', 'htmllib', 'http',
+    'httplib', 'ic', 'icopen', 'idlelib', 'ihooks', 'imageop', 'imaplib', 'imgfile', 'imghdr', 'imp', 'importlib',
+    'imputil', 'inspect', 'io', 'ipaddress', 'itertools', 'jpeg', 'json', 'keyword', 'lib', 'lib2to3', 'linecache',
+    'linuxaudiodev', 'locale', 'logging', 'lzma', 'macerrors', 'macostools', 'macpath', 'macresource', 'macurl2path',
+    'mailbox', 'mailcap', 'markupbase', 'marshal', 'math', 'md5', 'mhlib', 'mimetools', 'mimetypes', 'mimify', 'mmap',
+    'modulefinder', 'msilib', 'msvcrt', 'multifile', 'multiprocessing', 'mutex', 'netrc', 'new', 'nis', 'nntplib',
+    'ntpath', 'nturl2path', 'numbers', 'opcode', 'operator', 'optparse', 'os', 'os2emxpath', 'ossaudiodev', 'parser',
+    'pathlib', 'pdb', 'pickle', 'pickletools', 'pipes', 'pkgutil', 'platform', 'plistlib', 'popen2', 'poplib', 'posix',
+    'posixfile', 'posixpath', 'pprint', 'profile', 'pstats', 'pty', 'pwd', 'py_compile', 'pyclbr', 'pydoc',
+    'pydoc_data', 'pyexpat', 'queue', 'quopri', 'random', 're', 'readline', 'repr', 'reprlib', 'resource', 'rexec',
+    'rfc822', 'rlcompleter', 'robotparser', 'runpy', 'sched', 'secrets', 'select', 'selectors', 'sets', 'sgmllib',
+    'sha', 'shelve', 'shlex', 'shutil', 'signal', 'site', 'smtpd', 'smtplib', 'sndhdr', 'socket', 'socketserver',
+    'spwd', 'sqlite3', 'sre', 'sre_compile', 'sre_constants', 'sre_parse', 'ssl', 'stat', 'statistics', 'statvfs',
+    'string', 'stringold', 'stringprep', 'strop', 'struct', 'subprocess', 'sunau', 'sunaudio', 'sunaudiodev', 'symbol',
+    'symtable', 'sys', 'sysconfig', 'syslog', 'tabnanny', 'tarfile', 'telnetlib', 'tempfile', 'termios', 'test',
+    'textwrap', 'this', 'thread', 'threading', 'time', 'timeit', 'tkColorChooser', 'tkCommonDialog', 'tkFileDialog',
+    'tkFont', 'tkMessageBox', 'tkSimpleDialog', 'tkinter', 'toaiff', 'token', 'tokenize', 'trace', 'traceback',
+    'tracemalloc', 'ttk', 'tty', 'turtle', 'turtledemo', 'types', 'typing', 'unicodedata', 'unittest', 'urllib',
+    'urllib2', 'urlparse', 'user', 'uu', 'uuid', 'venv', 'videoreader', 'warnings', 'wave', 'weakref', 'webbrowser',
+    'whichdb', 'winreg', 'winsound', 'wsgiref', 'xdrlib', 'xml', 'xmllib', 'xmlrpc', 'xmlrpclib', 'xxlimited',
+    'xxsubtype', 'zipapp', 'zipfile', 'zipimport', 'zlib', 'zoneinfo',
+))
@@ -0,0 +1,207 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+"""
+Opt-in adaptive ordering of the root strategies.
+
+Within an environment the same strategy usually wins for most modules (the distributions index in a virtualenv, the
+git reader in a source checkout...). When adaptive ordering is enabled with `enable_adaptive_ordering`, the wins,
+failures and wall time of each root strategy are recorded per location (the `sys.path` entry containing the module),
+and the strategies are tried in the order minimizing the expected cost to find a version at that location.
+
+Reordering only changes the result when several strategies could find a version for a module: the first one in the
+learned order wins. The `constraints` make sure that the orderings that matter for correctness are always respected,
+for example a distribution installed with the same name than a standard library module must not be shadowed by the
+builtin strategy.
+"""
+from os.path import abspath, dirname
+
+try:  # python 3.5+
+    from typing import Callable, Dict, Iterable, Optional, Tuple
+    from types import ModuleType
+except ImportError:
+    pass
+
+from getversion.dispatch import get_module_kind
+from getversion.plugin_builtins import get_builtin_module_version
+from getversion.plugin_dist_index import get_version_using_dist_index
+from getversion.plugin_eggs_and_wheels import get_unzipped_wheel_or_egg_version
+from getversion.plugin_git_reader import get_version_using_git_reader
+from getversion.plugin_setuptools_scm import get_version_using_setuptools_scm
+from getversion.plugin_zip_archives import get_version_from_zip_archive
+
+
+DEFAULT_CONSTRAINTS = (
+    # distributions installed with the same name than a standard library module (backports) must not be shadowed
+    (get_version_using_dist_index, get_builtin_module_version),
+    (get_unzipped_wheel_or_egg_version, get_builtin_module_version),
+    (get_version_from_zip_archive, get_builtin_module_version),
+    # the git reader is a faster equivalent of setuptools_scm, that defers to it when undecided
+    (get_version_using_git_reader, get_version_using_setuptools_scm),
+)
+"""Pairs (before, after) of strategies whose relative order is always kept"""
+
+
+class StrategyScore(object):
+    """Wins, calls and total wall time of a strategy at a given location"""
+    __slots__ = 'calls', 'wins', 'total_time'
+
+    def __init__(self):
+        self.calls = 0
+        self.wins = 0
+        self.total_time = 0.
+
+    def expected_cost_per_win(self):
+        # type: (...) -> float
+        """Mean cost divided by the probability to win, both smoothed so that unknown strategies are not discarded"""
+        mean_cost = (self.total_time + 1e-6) / (self.calls + 1)
+        win_rate = (self.wins + 1.) / (self.calls + 2)
+        return mean_cost / win_rate
+
+
+def get_location_key(module  # type: ModuleType
+                     ):
+    # type: (...) -> str
+    """
+    Returns the location of root module `module` used to group the statistics: the folder or archive containing it
+    (its `sys.path` entry), or its kind (see `dispatch.get_module_kind`) if it has no file. No file is accessed.
+
+    :param module:
+    :return:
+    """
+    module_file = getattr(module, '__file__', None)
+    if module_file is None:
+        return get_module_kind(module)
+
+    location = dirname(abspath(module_file))
+    if hasattr(module, '__path__'):
+        # package: <location>/<pkg>/__init__.py
+        location = dirname(location)
+    return location
+
+
+class AdaptiveScheduler(object):
+    """
+    Learns which root strategies win at each location, and orders them accordingly. See `enable_adaptive_ordering`.
+
+    Until `min_samples` resolutions have been recorded at a location, the default order is used there.
+    """
+    __slots__ = 'constraints', 'min_samples', '_scores', '_samples', '_orders'
+
+    def __init__(self,
+                 constraints=DEFAULT_CONSTRAINTS,  # type: Iterable[Tuple[Callable, Callable]]
+                 min_samples=8                     # type: int
+                 ):
+        self.constraints = tuple(constraints)
+        self.min_samples = min_samples
+        self._scores = dict()   # {location: {strategy: StrategyScore}}
+        self._samples = dict()  # {location: number of wins recorded}
+        self._orders = dict()   # {(location, strategies): ordered strategies}, cleared every `min_samples` wins
+
+    def order(self,
+              location,   # type: str
+              strategies  # type: Tuple[Callable[[ModuleType], str], ...]
+              ):
+        # type: (...) -> Tuple[Callable[[ModuleType], str], ...]
+        """
+        Returns `strategies` in the order to use at `location`.
+
+        :param location: see `get_location_key`
+        :param strategies:
+        :return:
+        """
+        if self._samples.get(location, 0) < self.min_samples:
+            return strategies
+
+        try:
+            return self._orders[(location, strategies)]
+        except KeyError:
+            pass
+
+        scores = self._scores[location]
+        unknown = StrategyScore()
+        # stable sort: strategies with the same score keep the default order
+        ordered = sorted(strategies, key=lambda s: scores.get(s, unknown).expected_cost_per_win())
+
+        # enforce the constraints: move each `before` strategy just before its `after` strategy when needed
+        changed = True
+        while changed:
+            changed = False
+            for before, after in self.constraints:
+                if before in ordered and after in ordered:
+                    after_idx = ordered.index(after)
+                    if ordered.index(before) > after_idx:
+                        ordered.remove(before)
+                        ordered.insert(after_idx, before)
+                        changed = True
+
+        res = self._orders[(location, strategies)] = tuple(ordered)
+        return res
+
+    def record(self,
+               location,  # type: str
+               strategy,  # type: Callable[[ModuleType], str]
+               win,       # type: bool
+               duration   # type: float
+               ):
+        """
+        Records the outcome of `strategy` at `location`.
+
+        :param location: see `get_location_key`
+        :param strategy:
+        :param win:
+        :param duration:
+        :return:
+        """
+        try:
+            scores = self._scores[location]
+        except KeyError:
+            scores = self._scores[location] = dict()
+        try:
+            score = scores[strategy]
+        except KeyError:
+            score = scores[strategy] = StrategyScore()
+        score.calls += 1
+        score.total_time += duration
+        if win:
+            score.wins += 1
+            samples = self._samples[location] = self._samples.get(location, 0) + 1
+            if samples % self.min_samples == 0:
+                # the orders are updated every `min_samples` wins
+                self._orders.clear()
+
+    def get_scores(self):
+        # type: (...) -> Dict[str, Dict[Callable, StrategyScore]]
+        """Returns the scores recorded so far: {location: {strategy: StrategyScore}}"""
+        return self._scores
+
+
+scheduler = None  # type: Optional[AdaptiveScheduler]
+"""The current scheduler, or None if adaptive ordering is disabled (the default)."""
+
+
+def enable_adaptive_ordering(constraints=DEFAULT_CONSTRAINTS,  # type: Iterable[Tuple[Callable, Callable]]
+                             min_samples=8                     # type: int
+                             ):
+    # type: (...) -> AdaptiveScheduler
+    """
+    Enables the adaptive ordering of the root strategies in `get_module_version` and `get_version_str`: the strategies
+    that usually win at a location are tried first there. It is disabled by default.
+
+    :param constraints: pairs (before, after) of strategies whose relative order must always be kept. See
+        `DEFAULT_CONSTRAINTS`.
+    :param min_samples: the number of versions found at a location before the default order is changed there.
+    :return: the new `AdaptiveScheduler`
+    """
+    global scheduler
+    scheduler = AdaptiveScheduler(constraints=constraints, min_samples=min_samples)
+    return scheduler
+
+
+def disable_adaptive_ordering():
+    """
+    Disables the adaptive ordering of the root strategies. The statistics recorded so far are lost.
+    """
+    global scheduler
+    scheduler = None
@@ -0,0 +1,114 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+"""
+asyncio variants of `get_module_version` and `get_version_str` (python 3.5+).
+
+Cached results are returned directly from the event loop. On cache misses the strategies are run in an executor, so
+that disk reads and `git` subprocesses never block the event loop. The same `version_cache` and the same
+coalescing of concurrent resolutions are used as in the synchronous api: many concurrent requests for the same module,
+from coroutines or from threads, produce a single resolution.
+"""
+import asyncio
+from weakref import WeakKeyDictionary
+
+from typing import Any, Callable, Iterable, Tuple, Union  # noqa
+from types import ModuleType
+from concurrent.futures import Executor  # noqa
+
+from getversion import instrumentation
+from getversion.main import get_module_version, get_version_str, find_module, DetailedResults, version_cache, \
+    _STRATEGIES_SUBMODULES, _STRATEGIES_ROOTMODULES
+
+
+try:
+    _get_running_loop = asyncio.get_running_loop
+except AttributeError:  # python < 3.7: get_event_loop returns the running loop when called from a coroutine
+    _get_running_loop = asyncio.get_event_loop
+
+
+# {event loop: {(module name, cache key): future}} of the resolutions in progress in each loop
+_PENDING = WeakKeyDictionary()
+
+
+async def _get_async(sync_func,              # type: Callable
+                     module,                 # type: Union[str, ModuleType]
+                     submodule_strategies,   # type: Iterable[Callable[[ModuleType], str]]
+                     rootmodule_strategies,  # type: Iterable[Callable[[ModuleType], str]]
+                     cache_key,              # type: Any
+                     executor                # type: Executor
+                     ):
+    if isinstance(module, str):
+        module = find_module(module)
+
+    # fast path: cached results do not need a thread
+    cached = version_cache.get(module, cache_key)
+    if cached is None and sync_func is get_version_str:
+        # results of get_module_version are reused if available
+        cached = version_cache.get(module, cache_key[0:2])
+        if cached is not None:
+            cached = cached[0]
+    if cached is not None:
+        recorder = instrumentation.recorder
+        if recorder is not None:
+            recorder.record_cache(hit=True)
+        return cached
+
+    loop = _get_running_loop()
+    try:
+        pending = _PENDING[loop]
+    except KeyError:
+        pending = _PENDING[loop] = dict()
+
+    key = module.__name__, cache_key
+    future = pending.get(key)
+    if future is None:
+        # first request in this loop: resolve in the executor. The synchronous api coalesces it with the concurrent
+        # resolutions of other threads or loops
+        future = pending[key] = loop.run_in_executor(executor, sync_func, module, submodule_strategies,
+                                                     rootmodule_strategies)
+        future.add_done_callback(lambda _: pending.pop(key, None))
+
+    # shield: cancelling one of the waiting coroutines should not cancel the resolution for the others
+    return await asyncio.shield(future)
+
+
+async def get_module_version_async(module,                                         # type: Union[str, ModuleType]
+                                   submodule_strategies=_STRATEGIES_SUBMODULES,    # type: Iterable[Callable]
+                                   rootmodule_strategies=_STRATEGIES_ROOTMODULES,  # type: Iterable[Callable]
+                                   executor=None                                   # type: Executor
+                                   ):
+    # type: (...) -> Tuple[str, DetailedResults]
+    """
+    asyncio variant of `get_module_version`. Cached results are returned without leaving the event loop, otherwise
+    the strategies run in `executor` (by default the default executor of the loop). Concurrent requests for the same
+    module share a single resolution.
+
+    :param module:
+    :param submodule_strategies:
+    :param rootmodule_strategies:
+    :param executor:
+    :return:
+    """
+    return await _get_async(get_module_version, module, submodule_strategies, rootmodule_strategies,
+                            (submodule_strategies, rootmodule_strategies), executor)
+
+
+async def get_version_str_async(module,                                         # type: Union[str, ModuleType]
+                                submodule_strategies=_STRATEGIES_SUBMODULES,    # type: Iterable[Callable]
+                                rootmodule_strategies=_STRATEGIES_ROOTMODULES,  # type: Iterable[Callable]
+                                executor=None                                   # type: Executor
+                                ):
+    # type: (...) -> str
+    """
+    asyncio variant of `get_version_str`. See `get_module_version_async`.
+
+    :param module:
+    :param submodule_strategies:
+    :param rootmodule_strategies:
+    :param executor:
+    :return:
+    """
+    return await _get_async(get_version_str, module, submodule_strategies, rootmodule_strategies,
+                            (submodule_strategies, rootmodule_strategies, 'version_str'), executor)
@@ -0,0 +1,314 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+from collections import OrderedDict
+from os import stat
+from weakref import ref
+
+try:
+    from threading import Event, Lock, RLock, current_thread
+except ImportError:  # python built without threads
+    from dummy_threading import Event, Lock, RLock, current_thread
+
+try:  # python 3.5+
+    from typing import Any, Callable, Iterable, Optional, Tuple, Union
+    from types import ModuleType
+except ImportError:
+    pass
+
+
+_INDEXES_CLEARERS = []
+
+
+def register_index(clear_func  # type: Callable[[], Any]
+                   ):
+    """
+    Registers a function that clears an internal index used by the strategies (for example the directory listings
+    of dist-info folders). All registered functions are called when a `VersionCache` is cleared, so that the next
+    resolution sees the current state of the environment.
+
+    :param clear_func:
+    :return:
+    """
+    _INDEXES_CLEARERS.append(clear_func)
+
+
+def clear_indexes():
+    """
+    Clears all internal indexes registered with `register_index`.
+    """
+    for clear_func in _INDEXES_CLEARERS:
+        clear_func()
+
+
+def _get_mtimes(paths  # type: Iterable[str]
+                ):
+    # type: (...) -> Tuple[Tuple[str, Optional[float]], ...]
+    """
+    Returns a tuple of (path, mtime) for all paths. mtime is None if the path does not exist.
+    """
+    res = []
+    for p in paths:
+        try:
+            res.append((p, stat(p).st_mtime))
+        except OSError:
+            res.append((p, None))
+    return tuple(res)
+
+
+class _Call(object):
+    """A computation in progress in `SingleFlight`"""
+    __slots__ = 'thread', 'done', 'result', 'error'
+
+    def __init__(self):
+        self.thread = current_thread()
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent computations of the same key: while a thread computes the result for a key, the other
+    threads asking for the same key wait for it and receive the same result (or exception), instead of computing it
+    again. Nothing is cached: once the computation is over, the next call for that key computes again.
+    """
+    __slots__ = '_lock', '_calls'
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = dict()
+
+    def run(self,
+            key,      # type: Any
+            compute,  # type: Callable[..., Any]
+            *args
+            ):
+        # type: (...) -> Any
+        """
+        Returns `compute(*args)`, or waits for the result of the same computation if another thread is already
+        running it for `key`.
+
+        :param key:
+        :param compute:
+        :param args:
+        :return:
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                owner = True
+            elif call.thread is current_thread():
+                # a recursive call from the thread computing this key would wait forever: compute again instead
+                call = None
+                owner = False
+            else:
+                owner = False
+
+        if call is None:
+            return compute(*args)
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _CacheEntry(object):
+    """
+    An entry in the `VersionCache`. The module is only weakly referenced.
+    """
+    __slots__ = 'module_ref', 'result', 'mtimes'
+
+    def __init__(self, module_ref, result, mtimes):
+        self.module_ref = module_ref
+        self.result = result
+        self.mtimes = mtimes
+
+
+class VersionCache(object):
+    """
+    A cache for the results of `get_module_version`.
+
+     - modules are weakly referenced: the cache does not keep them alive, and an entry is considered invalid if the
+       module it was computed for does not exist anymore (for example it was deleted from `sys.modules` and
+       re-imported).
+     - it has a configurable maximum size `maxsize` (`None` means unbounded), least recently used entries are evicted
+       first.
+     - it can be explicitly invalidated with `invalidate(module)` and `clear()`, for example after a `pip install` in a
+       long-running process.
+     - if `check_mtimes` is `True`, each entry remembers the modification time of the files and folders backing the
+       version (the folder containing the dist-info/egg-info, the git HEAD and index...) and is invalidated as soon as
+       one of them changes.
+     - it is thread-safe, and concurrent computations of the same entry are coalesced (see `get_or_compute`).
+    """
+    __slots__ = '_entries', '_maxsize', 'check_mtimes', '_lock', '_flights'
+
+    def __init__(self,
+                 maxsize=1024,       # type: Optional[int]
+                 check_mtimes=False  # type: bool
+                 ):
+        self._entries = OrderedDict()
+        self._maxsize = maxsize
+        self.check_mtimes = check_mtimes
+        self._lock = RLock()
+        self._flights = SingleFlight()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def maxsize(self):
+        # type: (...) -> Optional[int]
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self,
+                maxsize  # type: Optional[int]
+                ):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def get(self,
+            module,  # type: ModuleType
+            key      # type: Any
+            ):
+        # type: (...) -> Optional[Any]
+        """
+        Returns the result cached for `module` and `key`, or None if there is no valid entry.
+
+        :param module:
+        :param key:
+        :return:
+        """
+        full_key = module.__name__, key
+        with self._lock:
+            try:
+                entry = self._entries.pop(full_key)
+            except KeyError:
+                return None
+
+            if entry.module_ref() is not module:
+                # the module has been garbage-collected or replaced (reload, new import)
+                return None
+
+            if self.check_mtimes and entry.mtimes and _get_mtimes(p for p, _ in entry.mtimes) != entry.mtimes:
+                # the environment has changed: the indexes used by the strategies are probably outdated too
+                clear_indexes()
+                return None
+
+            # re-insert it at the end (most recently used)
+            self._entries[full_key] = entry
+            return entry.result
+
+    def put(self,
+            module,               # type: ModuleType
+            key,                  # type: Any
+            result,               # type: Any
+            backing_paths=()      # type: Iterable[str]
+            ):
+        """
+        Stores `result` for `module` and `key`.
+
+        :param module:
+        :param key:
+        :param result:
+        :param backing_paths: the paths of the files and folders backing the result. Their modification times are
+            recorded so that the entry can be invalidated when they change (only if `check_mtimes` is `True`).
+        :return:
+        """
+        mtimes = _get_mtimes(backing_paths) if self.check_mtimes else None
+        full_key = module.__name__, key
+        with self._lock:
+            self._entries.pop(full_key, None)
+            self._entries[full_key] = _CacheEntry(ref(module), result, mtimes)
+            self._evict()
+
+    def get_backing_paths(self,
+                          module,  # type: ModuleType
+                          key      # type: Any
+                          ):
+        # type: (...) -> Optional[Tuple[str, ...]]
+        """
+        Returns the paths backing the entry for `module` and `key` (see `put`), or None if there is no such entry or if
+        `check_mtimes` was `False` when it was stored. The entry is not validated nor moved: use `get` for this.
+
+        :param module:
+        :param key:
+        :return:
+        """
+        with self._lock:
+            entry = self._entries.get((module.__name__, key))
+            if entry is None or entry.module_ref() is not module or entry.mtimes is None:
+                return None
+            return tuple(p for p, _ in entry.mtimes)
+
+    def get_or_compute(self,
+                       module,   # type: ModuleType
+                       key,      # type: Any
+                       compute,  # type: Callable[..., Any]
+                       *args
+                       ):
+        # type: (...) -> Any
+        """
+        Returns the result cached for `module` and `key`, or `compute(*args)` if there is no valid entry. `compute`
+        is responsible for storing its result with `put`.
+
+        If several threads ask for the same missing entry at the same time, `compute` is only called once: the other
+        threads wait for it and receive the same result (or exception).
+
+        :param module:
+        :param key:
+        :param compute:
+        :param args:
+        :return:
+        """
+        return self._flights.run((module.__name__, key), self._get_or_compute, module, key, compute, args)
+
+    def _get_or_compute(self, module, key, compute, args):
+        # the entry may have been stored by another thread in the meantime
+        res = self.get(module, key)
+        return res if res is not None else compute(*args)
+
+    def invalidate(self,
+                   module  # type: Union[str, ModuleType]
+                   ):
+        """
+        Removes all entries for `module` (a module or a module name) from the cache.
+
+        :param module:
+        :return:
+        """
+        module_name = module if isinstance(module, str) else module.__name__
+        with self._lock:
+            for full_key in [k for k in self._entries if k[0] == module_name]:
+                del self._entries[full_key]
+
+    def clear(self):
+        """
+        Removes all entries from the cache, and clears the internal indexes used by the strategies.
+        """
+        with self._lock:
+            self._entries.clear()
+        clear_indexes()
+
+    def _evict(self):
+        """Evicts the least recently used entries until the size is at most `maxsize`"""
+        if self._maxsize is not None:
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
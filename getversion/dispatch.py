@@ -0,0 +1,122 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+"""
+Selection of the root strategies that can apply to a module, based on how it is loaded (`module.__spec__`), so that
+`get_module_version` does not pay for lookups, directory scans and git climbs that can not succeed.
+"""
+from os.path import abspath, normcase
+from zipimport import zipimporter
+
+try:  # python 3.4+
+    from importlib.machinery import BuiltinImporter, FrozenImporter, SourceFileLoader, SourcelessFileLoader, \
+        ExtensionFileLoader
+    _FILE_LOADERS = SourceFileLoader, SourcelessFileLoader, ExtensionFileLoader
+except ImportError:
+    BuiltinImporter = FrozenImporter = None
+    _FILE_LOADERS = ()
+
+try:  # python 3.5+
+    from typing import Callable, Iterable, Tuple
+    from types import ModuleType
+except ImportError:
+    pass
+
+from getversion.plugin_builtins import is_site_packages_path
+from getversion.plugin_dist_index import get_version_using_dist_index
+from getversion.plugin_eggs_and_wheels import get_unzipped_wheel_or_egg_version
+from getversion.plugin_git_reader import get_version_using_git_reader
+from getversion.plugin_setuptools_scm import get_version_using_setuptools_scm
+from getversion.plugin_zip_archives import get_version_from_zip_archive
+
+
+KIND_BUILTIN = 'builtin'
+"""Modules compiled in the interpreter or frozen"""
+
+KIND_ZIP = 'zip'
+"""Modules imported from a zip archive by `zipimport`"""
+
+KIND_SITE_PACKAGES = 'site-packages'
+"""Modules loaded from a file located in a site-packages or dist-packages folder"""
+
+KIND_FILE = 'file'
+"""Modules loaded from a file located anywhere else (standard library, source checkout, folder added to sys.path)"""
+
+KIND_NO_LOCATION = 'no-location'
+"""Modules without file, such as namespace packages"""
+
+KIND_UNKNOWN = 'unknown'
+"""Modules without spec (python 2, modules created dynamically...) or with a custom loader"""
+
+
+_SCM_STRATEGIES = (get_version_using_git_reader, get_version_using_setuptools_scm)
+
+_INAPPLICABLE_STRATEGIES = {
+    # no distribution, no file
+    KIND_BUILTIN: frozenset((get_version_using_dist_index, get_unzipped_wheel_or_egg_version,
+                             get_version_from_zip_archive) + _SCM_STRATEGIES),
+    # no folder to scan
+    KIND_ZIP: frozenset((get_unzipped_wheel_or_egg_version,)),
+    # the file exists so it is not in an archive, and installed packages are not versioned by an enclosing repository
+    KIND_SITE_PACKAGES: frozenset((get_version_from_zip_archive,) + _SCM_STRATEGIES),
+    # the file exists so it is not in an archive
+    KIND_FILE: frozenset((get_version_from_zip_archive,)),
+    # the zip and SCM strategies need a file
+    KIND_NO_LOCATION: frozenset((get_version_from_zip_archive,) + _SCM_STRATEGIES),
+    KIND_UNKNOWN: frozenset(),
+}
+
+
+def _is_loader(loader, cls):
+    # loaders can be classes (BuiltinImporter, FrozenImporter) or instances
+    return cls is not None and (isinstance(loader, cls) or (isinstance(loader, type) and issubclass(loader, cls)))
+
+
+def get_module_kind(module  # type: ModuleType
+                    ):
+    # type: (...) -> str
+    """
+    Returns the kind of `module` (one of the `KIND_*` constants), from its spec only: no file is accessed.
+
+    :param module:
+    :return:
+    """
+    spec = getattr(module, '__spec__', None)
+    if spec is None:
+        return KIND_UNKNOWN
+
+    loader = spec.loader
+    if _is_loader(loader, BuiltinImporter) or _is_loader(loader, FrozenImporter):
+        return KIND_BUILTIN
+    if isinstance(loader, zipimporter):
+        return KIND_ZIP
+    if isinstance(loader, _FILE_LOADERS):
+        # the file was found by the finder: it exists
+        if is_site_packages_path(normcase(abspath(spec.origin))):
+            return KIND_SITE_PACKAGES
+        return KIND_FILE
+    if spec.origin is None and not spec.has_location:
+        return KIND_NO_LOCATION
+    return KIND_UNKNOWN
+
+
+def select_strategies(module,     # type: ModuleType
+                      strategies  # type: Iterable[Callable[[ModuleType], str]]
+                      ):
+    # type: (...) -> Tuple[Callable[[ModuleType], str], ...]
+    """
+    Returns the strategies among `strategies` that can succeed for `module`, in the same order. Built-in strategies
+    that can not apply to the kind of module (see `get_module_kind`) are removed: for example only the builtin strategy
+    is kept for compiled-in modules, and the git and setuptools_scm strategies are not used for modules installed in
+    site-packages. Custom strategies are always kept.
+
+    :param module:
+    :param strategies:
+    :return:
+    """
+    inapplicable = _INAPPLICABLE_STRATEGIES[get_module_kind(module)]
+    if not hasattr(module, '__path__'):
+        # only packages can be unzipped wheels or eggs
+        inapplicable = inapplicable | {get_unzipped_wheel_or_egg_version}
+    return tuple(s for s in strategies if s not in inapplicable)
@@ -0,0 +1,129 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+from collections import OrderedDict
+
+try:  # python 3.3+
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+try:  # python 3.5+
+    from typing import Any, Callable, Dict, Optional
+except ImportError:
+    pass
+
+
+class StrategyStats(object):
+    """
+    Statistics about a strategy: number of calls, wins (a valid version was found) and failures, and total wall time
+    spent in the strategy (in seconds).
+    """
+    __slots__ = 'calls', 'wins', 'failures', 'total_time'
+
+    def __init__(self):
+        self.calls = 0
+        self.wins = 0
+        self.failures = 0
+        self.total_time = 0.
+
+    def as_dict(self):
+        # type: (...) -> Dict[str, Any]
+        return OrderedDict([('calls', self.calls), ('wins', self.wins), ('failures', self.failures),
+                            ('total_time', self.total_time)])
+
+
+class StatsRecorder(object):
+    """
+    Records statistics about the strategies and the cache of `get_module_version`.
+
+    If a `callback` is provided, it is called for each event with three arguments `(name, outcome, duration)`:
+
+     - for strategies, `name` is the strategy name, `outcome` is 'win' or 'fail' and `duration` is the wall time in
+       seconds.
+     - for the cache, `name` is 'cache', `outcome` is 'hit' or 'miss' and `duration` is None.
+    """
+    __slots__ = 'strategies', 'cache_hits', 'cache_misses', 'callback'
+
+    def __init__(self,
+                 callback=None  # type: Callable[[str, str, Optional[float]], Any]
+                 ):
+        self.strategies = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.callback = callback
+
+    def record_strategy(self,
+                        strategy_name,  # type: str
+                        win,            # type: bool
+                        duration        # type: float
+                        ):
+        try:
+            s = self.strategies[strategy_name]
+        except KeyError:
+            s = self.strategies[strategy_name] = StrategyStats()
+        s.calls += 1
+        s.total_time += duration
+        if win:
+            s.wins += 1
+        else:
+            s.failures += 1
+
+        if self.callback is not None:
+            self.callback(strategy_name, 'win' if win else 'fail', duration)
+
+    def record_cache(self,
+                     hit  # type: bool
+                     ):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+        if self.callback is not None:
+            self.callback('cache', 'hit' if hit else 'miss', None)
+
+
+recorder = None  # type: Optional[StatsRecorder]
+"""The current recorder, or None if instrumentation is disabled (the default)."""
+
+
+def enable_stats(callback=None  # type: Callable[[str, str, Optional[float]], Any]
+                 ):
+    """
+    Enables the instrumentation of `get_module_version`: wall time, number of calls, wins and failures are recorded
+    for each strategy, as well as cache hits and misses. They can be retrieved with `stats()`.
+
+    Instrumentation is disabled by default and does not cost anything in that case.
+
+    :param callback: an optional function called for each event, for example to feed your own metrics system. See
+        `StatsRecorder` for details.
+    :return:
+    """
+    global recorder
+    recorder = StatsRecorder(callback=callback)
+
+
+def disable_stats():
+    """
+    Disables the instrumentation of `get_module_version`. Recorded statistics are lost.
+    """
+    global recorder
+    recorder = None
+
+
+def stats():
+    # type: (...) -> Optional[Dict[str, Any]]
+    """
+    Returns the statistics recorded since instrumentation was enabled with `enable_stats`, or None if it is disabled.
+
+    :return: a dictionary {'strategies': {<strategy_name>: {'calls': int, 'wins': int, 'failures': int,
+        'total_time': float}}, 'cache': {'hits': int, 'misses': int}}
+    """
+    rec = recorder
+    if rec is None:
+        return None
+
+    return OrderedDict([('strategies', OrderedDict((name, s.as_dict()) for name, s in rec.strategies.items())),
+                        ('cache', OrderedDict([('hits', rec.cache_hits), ('misses', rec.cache_misses)]))])
@@ -4,15 +4,11 @@
 
 from collections import OrderedDict
 
-try: # python 3+
-    from pathlib import Path
-except ImportError:
-    from pathlib2 import Path
-
-from itertools import chain
-from os.path import join, exists, pardir, dirname
+from importlib import import_module
+from os.path import join, exists, pardir, dirname, abspath
 import sys
 from types import ModuleType
+from weakref import ref
 
 try:
     from functools import lru_cache
@@ -20,13 +16,31 @@ except ImportError:
     from functools32 import lru_cache
 
 try:  # python 3.5+
-    from typing import Union, Iterable, Callable
+    from typing import Any, Union, Iterable, Iterator, Callable, Dict, Tuple, Optional
+    from concurrent.futures import Executor
 except ImportError:
     pass
 
+from getversion import adaptive, instrumentation, persistence
+from getversion.cache import VersionCache, register_index
+from getversion.adaptive import get_location_key
+from getversion.dispatch import select_strategies
+from getversion.instrumentation import perf_counter
+from getversion.persistence import PersistentVersionCache, PersistedStrategyError, get_module_location
 from getversion.plugin_builtins import get_builtin_module_version
+from getversion.plugin_dist_index import get_version_using_dist_index, resolve_path
 from getversion.plugin_eggs_and_wheels import get_unzipped_wheel_or_egg_version
-from getversion.plugin_setuptools_scm import get_version_using_setuptools_scm
+from getversion.plugin_git_reader import get_version_using_git_reader
+from getversion.plugin_setuptools_scm import get_version_using_setuptools_scm, find_scm_root, get_scm_state_files
+from getversion.plugin_zip_archives import get_version_from_zip_archive, get_zip_archive
+from getversion.snapshot import get_active_snapshot, get_version_from_snapshot
+
+
+try:  # python 3.4+
+    from importlib.machinery import PathFinder
+    from importlib.util import find_spec
+except ImportError:
+    find_spec = None
 
 
 def get_strategy_name(strategy):
@@ -39,6 +53,81 @@ def get_module_name(module):
     return module.__name__
 
 
+class NotImportedModule(object):
+    """
+    A lightweight stand-in for a module that was located with `importlib.util.find_spec` but not imported. Only the
+    attributes that are known without executing the module are available: `__name__`, `__spec__`, and, when relevant,
+    `__file__` and `__path__`. This is enough for all strategies relying on metadata (distribution info, SCM...).
+    """
+    def __init__(self, spec):
+        self.__name__ = spec.name
+        self.__spec__ = spec
+        if spec.has_location:
+            self.__file__ = spec.origin
+        if spec.submodule_search_locations is not None:
+            self.__path__ = list(spec.submodule_search_locations)
+
+    def __getattr__(self, item):
+        raise AttributeError("module '%s' is not imported, so its attribute '%s' is not available"
+                             % (self.__name__, item))
+
+    def __repr__(self):
+        return "<not imported module '%s'>" % self.__name__
+
+
+_NOT_IMPORTED_MODULES = dict()
+"""The `NotImportedModule`s created so far, so that their results can be cached by `version_cache`"""
+register_index(_NOT_IMPORTED_MODULES.clear)
+
+
+def find_module(module_name  # type: str
+                ):
+    # type: (...) -> Union[ModuleType, NotImportedModule]
+    """
+    Returns the module named `module_name` from `sys.modules` if it is already imported. Otherwise, locates it
+    using `importlib` without importing it (nor its parent packages) and returns a `NotImportedModule`.
+
+    On python 2 `importlib.util.find_spec` is not available so the module is imported.
+
+    :param module_name:
+    :return:
+    """
+    try:
+        return sys.modules[module_name]
+    except KeyError:
+        pass
+
+    if find_spec is None:
+        # python 2
+        return import_module(module_name)
+
+    try:
+        return _NOT_IMPORTED_MODULES[module_name]
+    except KeyError:
+        pass
+
+    parent_name, _, _ = module_name.rpartition('.')
+    if len(parent_name) > 0:
+        parent = find_module(parent_name)
+        if isinstance(parent, NotImportedModule):
+            # we can not use `find_spec` here since it would import the parent packages
+            try:
+                search_path = parent.__path__
+            except AttributeError:
+                raise ImportError("No module named '%s': '%s' is not a package" % (module_name, parent_name))
+            spec = PathFinder.find_spec(module_name, search_path)
+        else:
+            spec = find_spec(module_name)
+    else:
+        spec = find_spec(module_name)
+
+    if spec is None:
+        raise ImportError("No module named '%s'" % module_name)
+
+    module = _NOT_IMPORTED_MODULES[module_name] = NotImportedModule(spec)
+    return module
+
+
 def get_module_version_attr(module  # type: ModuleType
                             ):
     # type: (...) -> str
@@ -65,6 +154,9 @@ def get_version_using_pkgresources(module  # type: ModuleType
 
     Note: this is probably PEP345 https://www.python.org/dev/peps/pep-0345/
 
+    Note: this strategy is not used by default anymore, it was replaced with `get_version_using_dist_index` which does
+    not require to import `pkg_resources`.
+
     In case there is an old local `.egg-info` in the package folder, this method may return the wrong version
     number. For this reason an error is raised in that case.
 
@@ -74,7 +166,7 @@ def get_version_using_pkgresources(module  # type: ModuleType
     :return:
     """
     # this is part of setuptools
-    from pkg_resources import working_set, Requirement  # get_distribution require, Distribution
+    from pkg_resources import working_set  # get_distribution require, Distribution
 
     # First get the distribution
 
@@ -85,7 +177,8 @@ def get_version_using_pkgresources(module  # type: ModuleType
     # pkg_dist = get_distribution(module.__name__)  # module.__name
 
     # MUCH FASTER !!! because in case of failure it does not try to do a 'require'
-    pkg_dist = working_set.find(Requirement.parse(module.__name__))
+    # (and the parsed requirement is cached, see _parse_requirement)
+    pkg_dist = working_set.find(_parse_requirement(module.__name__))
 
     # DOES NOT WORK
     # pkg_dist = get_provider(module.__name__)
@@ -94,7 +187,7 @@ def get_version_using_pkgresources(module  # type: ModuleType
     # pkg_dist = Distribution.from_filename(module.__file__)
 
     if pkg_dist is not None:
-        if Path(pkg_dist.location).resolve() != Path(join(dirname(module.__file__), pardir)).resolve():
+        if resolve_path(pkg_dist.location) != resolve_path(join(dirname(module.__file__), pardir)):
             raise Exception("Another distribution of the same package (with version '%s') is installed, but is not the "
                             "one that was imported" % pkg_dist.version)
 
@@ -108,15 +201,30 @@ def get_version_using_pkgresources(module  # type: ModuleType
         return pkg_dist.version
 
 
+@lru_cache(maxsize=None)
+def _parse_requirement(module_name):
+    """
+    Returns the `pkg_resources` requirement for `module_name`. Parsing is not free so the result is cached: it is
+    shared by all modules with the same root name.
+    """
+    from pkg_resources import Requirement
+    return Requirement.parse(module_name)
+
+
 _STRATEGIES_SUBMODULES = (get_module_version_attr,)
 
-_STRATEGIES_ROOTMODULES = (get_version_using_pkgresources,
+_STRATEGIES_ROOTMODULES = (get_version_using_dist_index,  # replaces get_version_using_pkgresources, much faster
                            get_builtin_module_version,  # not first because another package with same name can be installed
                            # get_version_using_importlib_metadata,  # does not seem useful for now
                            get_unzipped_wheel_or_egg_version,
+                           get_version_from_zip_archive,  # zipped eggs, wheels and zipapps
+                           get_version_using_git_reader,  # no subprocess, falls back to the next one if undecided
                            get_version_using_setuptools_scm,
                            )
 
+_CHEAP_STRATEGIES = (get_module_version_attr, get_version_using_dist_index, get_builtin_module_version)
+"""Strategies only relying on module attributes or on indexes shared by all modules. See `iter_module_versions`."""
+
 
 def err_dct_to_str(err_dct  # Dict
                    ):
@@ -159,26 +267,184 @@ class InvalidVersionFound(Exception):
         return "Invalid version number: %s" % self.version
 
 
+class StrategyFailure(object):
+    """
+    A compact record of the failure of a strategy, stored in `DetailedResults.err_dct` and
+    `ModuleVersionNotFound.err_dct` instead of the exception itself: exceptions and their tracebacks would keep frames,
+    local variables and modules alive as long as the results are cached.
+
+    The exception is only kept in `exception` when enabled with `enable_full_errors()`, for debugging.
+    """
+    __slots__ = 'strategy_name', 'exc_type', 'message', 'exception'
+
+    def __init__(self,
+                 strategy_name,  # type: str
+                 exc_type,       # type: type
+                 message,        # type: str
+                 exception=None  # type: Exception
+                 ):
+        self.strategy_name = strategy_name
+        self.exc_type = exc_type
+        self.message = message
+        self.exception = exception
+
+    @classmethod
+    def from_exception(cls,
+                       strategy,  # type: Callable[[ModuleType], str]
+                       e          # type: Exception
+                       ):
+        # type: (...) -> StrategyFailure
+        return cls(get_strategy_name(strategy), type(e), str(e), e if _keep_exceptions else None)
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return "StrategyFailure(%r, %s, %r)" % (self.strategy_name, self.exc_type.__name__, self.message)
+
+
+_keep_exceptions = False
+
+
+def enable_full_errors():
+    """
+    Keeps the exceptions raised by the strategies (with their traceback) in the `exception` attribute of the
+    `StrategyFailure` records, for debugging. Note that they keep frames and modules alive as long as the results are
+    cached. Only new results are affected.
+    """
+    global _keep_exceptions
+    _keep_exceptions = True
+
+
+def disable_full_errors():
+    """
+    Stops keeping the exceptions raised by the strategies in the `StrategyFailure` records (the default).
+    """
+    global _keep_exceptions
+    _keep_exceptions = False
+
+
 class DetailedResults(object):
     """
     Returned by `get_module_version` for detailed results about which strategy failed before the winning one.
+
+    When instrumentation is enabled (see `enable_stats`), `timings` contains the wall time in seconds of each
+    strategy applied, with the same structure as `err_dct`: {module name: {strategy: duration}}. It is None otherwise.
+
+    Note that the module is only weakly referenced, so that cached results do not keep modules alive.
     """
-    __slots__ = 'module', 'err_dct', 'winning_strategy', 'version_found'
+    __slots__ = '_module_ref', 'err_dct', 'winning_strategy', 'version_found', 'timings'
 
-    def __init__(self, module, err_dct, winning_strategy, version_found):
-        self.module = module
+    def __init__(self, module, err_dct, winning_strategy, version_found, timings=None):
+        self._module_ref = ref(module)
         self.err_dct = err_dct
         self.winning_strategy = winning_strategy
         self.version_found = version_found
+        self.timings = timings
+
+    @property
+    def module(self):
+        # type: (...) -> Optional[ModuleType]
+        """The module for which this result was computed, or None if it does not exist anymore"""
+        return self._module_ref()
 
     def __str__(self):
         return "Version '%s' found for module '%s' by strategy '%s', after the following failed attempts:\n%s"\
-               % (self.version_found, get_module_name(self.module), get_strategy_name(self.winning_strategy),
+               % (self.version_found, next(iter(self.err_dct)), get_strategy_name(self.winning_strategy),
                   err_dct_to_str(self.err_dct))
 
 
-@lru_cache(maxsize=100)
-def get_module_version(module,                                        # type: ModuleType
+version_cache = VersionCache()
+"""The cache used by `get_module_version`. See `VersionCache` for details."""
+
+
+def _get_backing_paths(module,   # type: ModuleType
+                       strategy  # type: Callable[[ModuleType], str]
+                       ):
+    # type: (...) -> Tuple[str, ...]
+    """
+    Returns the paths of the folders backing the version found by `strategy` for `module`, so that the cache entry
+    can be invalidated when they change: the folder where the module is located (where the dist-info/egg-info
+    folders also live), the SCM state files if the version was found using SCM, or the archive for modules imported
+    from a zip archive.
+    """
+    if strategy in (get_module_version_attr, get_builtin_module_version):
+        # the version does not depend on the filesystem
+        return ()
+
+    if strategy is get_version_from_zip_archive:
+        zip_archive = get_zip_archive(module)
+        return (zip_archive[0],) if zip_archive is not None else ()
+
+    try:
+        module_path = module.__path__[0]
+    except (AttributeError, IndexError, TypeError):
+        module_path = module.__file__
+    location = dirname(abspath(module_path))
+    paths = [location]
+
+    if strategy in (get_version_using_git_reader, get_version_using_setuptools_scm):
+        scm_root = find_scm_root(location)
+        if scm_root is not None:
+            _, scm_dir, kind = scm_root
+            paths += get_scm_state_files(scm_dir, kind)
+
+    return tuple(paths)
+
+
+def _get_winner_backing_paths(module,  # type: ModuleType
+                              details  # type: DetailedResults
+                              ):
+    # type: (...) -> Tuple[str, ...]
+    """Returns the backing paths (see `_get_backing_paths`) of the version found in `details` for `module`"""
+    winner_name = next(reversed(details.err_dct))
+    winner_module = module if winner_name == module.__name__ else find_module(winner_name)
+    return _get_backing_paths(winner_module, details.winning_strategy)
+
+
+def _get_persisted_result(persistent,  # type: PersistentVersionCache
+                          module,      # type: ModuleType
+                          strategies,  # type: Iterable[Callable[[ModuleType], str]]
+                          errors       # type: Dict
+                          ):
+    # type: (...) -> Optional[Tuple[Callable[[ModuleType], str], str]]
+    """
+    Looks up `module` in the persistent cache. If found, the failed attempts and the success of the winning strategy
+    are added to `errors`, and a tuple (winning strategy, version) is returned. None is returned if there is no valid
+    entry, or if it refers to strategies that are not in `strategies`.
+    """
+    persisted = persistent.get(module.__name__, get_module_location(module))
+    if persisted is None:
+        return None
+
+    version_str, strategy_name, attempts = persisted
+    strategies_by_name = dict((get_strategy_name(s), s) for s in strategies)
+    try:
+        strategy = strategies_by_name[strategy_name]
+        attempts = [(strategies_by_name[name], msg) for name, msg in attempts]
+    except KeyError:
+        return None
+
+    for failed_strategy, msg in attempts:
+        errors[failed_strategy] = StrategyFailure(get_strategy_name(failed_strategy), PersistedStrategyError, msg)
+    errors[strategy] = "SUCCESS: %s" % version_str
+    return strategy, version_str
+
+
+def _put_persisted_result(persistent,     # type: PersistentVersionCache
+                          module,         # type: ModuleType
+                          strategies,     # type: Iterable[Callable[[ModuleType], str]]
+                          errors,         # type: Dict
+                          strategy,       # type: Callable[[ModuleType], str]
+                          version_str,    # type: str
+                          backing_paths   # type: Iterable[str]
+                          ):
+    """Stores the result of the root strategies for `module` in the persistent cache"""
+    attempts = [(get_strategy_name(s), str(errors[s])) for s in strategies if s in errors and s is not strategy]
+    persistent.put(module.__name__, get_module_location(module), version_str, get_strategy_name(strategy), attempts, backing_paths)
+
+
+def get_module_version(module,                                        # type: Union[str, ModuleType]
                        submodule_strategies=_STRATEGIES_SUBMODULES,   # type: Iterable[Callable[[ModuleType], str]]
                        rootmodule_strategies=_STRATEGIES_ROOTMODULES  # type: Iterable[Callable[[ModuleType], str]]
                        ):
@@ -186,40 +452,129 @@ def get_module_version(module,                                        # type: Mo
     """
     Helper method to get the version of module `module`.
 
+    `module` can be a module or a module name. In the latter case, if the module is not already imported, it is
+    not imported: it is only located using `importlib` so that only the strategies relying on metadata (distribution
+    info, SCM...) can succeed. This is much faster and lighter than importing large packages.
+
     The following techniques are tried:
      - detect explicit __version__ tag on parent package
      - try to get the version from the package info using distutils (this works even for pip install -e .)
      - Try to get version from the source directory using setuptools_scm
 
+    The result of a parent package is cached and shared by all its submodules, so resolving many submodules of the same
+    package only resolves the root package once.
+
+    Root strategies that can not apply to the module are not tried (see `dispatch.select_strategies`), for example
+    only the builtin strategy is used for compiled-in modules.
+
+    Results are cached in `version_cache` (failures are not cached). This function is thread-safe: concurrent calls
+    for the same module are coalesced into a single resolution.
+
     :param module:
     :param submodule_strategies:
     :param rootmodule_strategies:
     :return:
     """
-    # if isinstance(module, str) TODO support str:
-    # '__main__' and '<...' (pydoc, ipython, etc.)
+    # TODO '__main__' and '<...' (pydoc, ipython, etc.)
+    if isinstance(module, str):
+        module = find_module(module)
+
+    # instrumentation and adaptive ordering of the root strategies: None when disabled (default)
+    return _get_module_version(module, submodule_strategies, rootmodule_strategies, instrumentation.recorder,
+                               adaptive.scheduler)
+
+
+def _get_module_version(module,                 # type: ModuleType
+                        submodule_strategies,   # type: Iterable[Callable[[ModuleType], str]]
+                        rootmodule_strategies,  # type: Iterable[Callable[[ModuleType], str]]
+                        recorder,               # type: Optional[instrumentation.StatsRecorder]
+                        scheduler               # type: Optional[adaptive.AdaptiveScheduler]
+                        ):
+    # type: (...) -> Tuple[str, DetailedResults]
+    """
+    `get_module_version` with an explicit `recorder` and `scheduler`, so that they can be disabled when a resolution is
+    run again only to collect the diagnostics (see `get_version_str`).
+    """
+    cache_key = submodule_strategies, rootmodule_strategies
+    cached = version_cache.get(module, cache_key)
+    if recorder is not None:
+        recorder.record_cache(hit=cached is not None)
+    if cached is not None:
+        return cached
+
+    # concurrent calls for the same module are coalesced into a single resolution
+    return version_cache.get_or_compute(module, cache_key, _resolve_module_version, module, submodule_strategies,
+                                        rootmodule_strategies, cache_key, recorder, scheduler)
+
+
+def _resolve_module_version(module,                 # type: ModuleType
+                            submodule_strategies,   # type: Iterable[Callable[[ModuleType], str]]
+                            rootmodule_strategies,  # type: Iterable[Callable[[ModuleType], str]]
+                            cache_key,              # type: Any
+                            recorder,               # type: Optional[instrumentation.StatsRecorder]
+                            scheduler               # type: Optional[adaptive.AdaptiveScheduler]
+                            ):
+    # type: (...) -> Tuple[str, DetailedResults]
+    """Resolution part of `get_module_version`, called on cache misses. The result is stored in `version_cache`"""
+    # deploy-time snapshot and persistent on-disk cache: None when disabled (default). They are only used with the
+    # default root strategies
+    if rootmodule_strategies is _STRATEGIES_ROOTMODULES:
+        snapshot = get_active_snapshot()
+        persistent = persistence.persistent_cache
+    else:
+        snapshot = persistent = None
 
     all_errors = OrderedDict()
+    all_timings = OrderedDict() if recorder is not None else None
 
     original_module = module
     module_name = module.__name__
     next_split_idx = module_name.rfind('.')
     is_root_module = next_split_idx < 0
 
-    # loop until we have no parent anymore
-    while module is not None:
-
-        # init error dict for this submodule
-        errors = OrderedDict()
-        all_errors[module_name] = errors
-
-        # for all strategies apply them and log the error. First valid result is returned
-        if is_root_module:
-            strategies = chain(submodule_strategies, rootmodule_strategies)
-        else:
-            strategies = submodule_strategies
-
+    # init error dict for this module
+    errors = OrderedDict()
+    all_errors[module_name] = errors
+    if recorder is not None:
+        timings = all_timings[module_name] = OrderedDict()
+
+    # for all strategies apply them and log the error. First valid result is returned
+    if is_root_module:
+        # only the root strategies that can apply to this kind of module (builtin, site-packages...)
+        root_strategies = select_strategies(module, rootmodule_strategies)
+        if scheduler is not None:
+            location = get_location_key(module)
+            root_strategies = scheduler.order(location, root_strategies)
+        strategy_groups = submodule_strategies, root_strategies
+    else:
+        strategy_groups = submodule_strategies,
+
+    for group_idx, strategies in enumerate(strategy_groups):
+        if snapshot is not None and group_idx == 1 and module_name in snapshot:
+            # the (cheap) submodule strategies have failed: the snapshot is authoritative for root modules
+            version_str = snapshot[module_name]
+            errors[get_version_from_snapshot] = "SUCCESS: %s" % version_str
+            res = version_str, DetailedResults(original_module, all_errors, get_version_from_snapshot,
+                                               version_str, all_timings)
+            version_cache.put(original_module, cache_key, res)
+            return res
+
+        use_persistent = persistent is not None and group_idx == 1
+        if use_persistent:
+            # the (cheap) submodule strategies have failed: try the persistent cache before the root strategies
+            persisted = _get_persisted_result(persistent, module, strategies, errors)
+            if persisted is not None:
+                strategy, version_str = persisted
+                res = version_str, DetailedResults(original_module, all_errors, strategy, version_str, all_timings)
+                version_cache.put(original_module, cache_key, res,
+                                  backing_paths=_get_backing_paths(module, strategy)
+                                  if version_cache.check_mtimes else ())
+                return res
+
+        learn = scheduler is not None and group_idx == 1
         for strategy in strategies:
+            if recorder is not None or learn:
+                start = perf_counter()
             try:
                 # apply strategy
                 version_str = strategy(module)
@@ -227,22 +582,374 @@ def get_module_version(module,                                        # type: Mo
                 if version_str is None or not isinstance(version_str, str):
                     raise InvalidVersionFound(version_str)
                 else:
+                    if recorder is not None or learn:
+                        duration = perf_counter() - start
+                        if recorder is not None:
+                            timings[strategy] = duration
+                            recorder.record_strategy(get_strategy_name(strategy), True, duration)
+                        if learn:
+                            scheduler.record(location, strategy, True, duration)
                     errors[strategy] = "SUCCESS: %s" % version_str
-                    return version_str, DetailedResults(original_module, all_errors, strategy, version_str)
+                    res = version_str, DetailedResults(original_module, all_errors, strategy, version_str,
+                                                       all_timings)
+                    backing_paths = _get_backing_paths(module, strategy) \
+                        if (version_cache.check_mtimes or use_persistent) else ()
+                    version_cache.put(original_module, cache_key, res,
+                                      backing_paths=backing_paths if version_cache.check_mtimes else ())
+                    if use_persistent:
+                        _put_persisted_result(persistent, module, strategies, errors, strategy, version_str,
+                                              backing_paths)
+                    return res
 
             except Exception as e:
-                # log the error
-                errors[strategy] = e
-
-        if is_root_module:
-            del module
-            break
+                if recorder is not None or learn:
+                    duration = perf_counter() - start
+                    if recorder is not None:
+                        timings[strategy] = duration
+                        recorder.record_strategy(get_strategy_name(strategy), False, duration)
+                    if learn:
+                        scheduler.record(location, strategy, False, duration)
+                # log a compact record of the error: the exception and its traceback would keep the module alive
+                errors[strategy] = StrategyFailure.from_exception(strategy, e)
+
+    if not is_root_module:
+        # the result of the parent package is shared by all its submodules: it is resolved (or found in the cache)
+        # as a whole, so that sibling submodules only cost a cache lookup per level
+        parent = find_module(module_name[:next_split_idx])
+        try:
+            version_str, parent_details = _get_module_version(parent, submodule_strategies, rootmodule_strategies,
+                                                              recorder, scheduler)
+        except ModuleVersionNotFound as e:
+            all_errors.update(e.err_dct)
         else:
-            # find parent package
-            module_name = module_name[:next_split_idx]
-            next_split_idx = module_name.rfind('.')
-            is_root_module = next_split_idx < 0
-            module = sys.modules[module_name]
+            all_errors.update(parent_details.err_dct)
+            if all_timings is not None and parent_details.timings is not None:
+                all_timings.update(parent_details.timings)
+            res = version_str, DetailedResults(original_module, all_errors, parent_details.winning_strategy,
+                                               version_str, all_timings)
+            version_cache.put(original_module, cache_key, res,
+                              backing_paths=_get_winner_backing_paths(parent, parent_details)
+                              if version_cache.check_mtimes else ())
+            return res
 
     # finally return
     raise ModuleVersionNotFound(original_module, errors_dict=all_errors)
+
+
+def get_version_str(module,                                        # type: Union[str, ModuleType]
+                    submodule_strategies=_STRATEGIES_SUBMODULES,   # type: Iterable[Callable[[ModuleType], str]]
+                    rootmodule_strategies=_STRATEGIES_ROOTMODULES  # type: Iterable[Callable[[ModuleType], str]]
+                    ):
+    # type: (...) -> str
+    """
+    Lightweight alternative to `get_module_version`, returning only the version string.
+
+    The same strategies are applied in the same order, but no `DetailedResults` is built and the errors of the
+    strategies are not recorded. Diagnostics are only collected when all strategies fail: in that case
+    `get_module_version` is called so that a complete `ModuleVersionNotFound` error is raised.
+
+    Results are cached in `version_cache`.
+
+    :param module:
+    :param submodule_strategies:
+    :param rootmodule_strategies:
+    :return:
+    """
+    if isinstance(module, str):
+        module = find_module(module)
+
+    # instrumentation: None when disabled (default)
+    recorder = instrumentation.recorder
+
+    # results of get_module_version are reused if available
+    cache_key = submodule_strategies, rootmodule_strategies, 'version_str'
+    cached = version_cache.get(module, cache_key)
+    if cached is None:
+        cached = version_cache.get(module, cache_key[0:2])
+        if cached is not None:
+            cached = cached[0]
+    if recorder is not None:
+        recorder.record_cache(hit=cached is not None)
+    if cached is not None:
+        return cached
+
+    # concurrent calls for the same module are coalesced into a single resolution
+    return version_cache.get_or_compute(module, cache_key, _resolve_version_str, module, submodule_strategies,
+                                        rootmodule_strategies, cache_key, recorder)
+
+
+def _resolve_version_str(module,                 # type: ModuleType
+                         submodule_strategies,   # type: Iterable[Callable[[ModuleType], str]]
+                         rootmodule_strategies,  # type: Iterable[Callable[[ModuleType], str]]
+                         cache_key,              # type: Any
+                         recorder                # type: Optional[instrumentation.StatsRecorder]
+                         ):
+    # type: (...) -> str
+    """Resolution part of `get_version_str`, called on cache misses. The result is stored in `version_cache`"""
+    # deploy-time snapshot and persistent on-disk cache: None when disabled (default). They are only used with the
+    # default root strategies
+    if rootmodule_strategies is _STRATEGIES_ROOTMODULES:
+        snapshot = get_active_snapshot()
+        persistent = persistence.persistent_cache
+    else:
+        snapshot = persistent = None
+
+    # adaptive ordering of the root strategies: None when disabled (default)
+    scheduler = adaptive.scheduler
+
+    original_module = module
+    module_name = module.__name__
+    next_split_idx = module_name.rfind('.')
+    is_root_module = next_split_idx < 0
+
+    # compact records of the failures, only used to build the ModuleVersionNotFound (same content as in
+    # `_get_module_version`, without the successes)
+    errors = OrderedDict()
+    all_errors = OrderedDict()
+    all_errors[module_name] = errors
+
+    if is_root_module:
+        # only the root strategies that can apply to this kind of module (builtin, site-packages...)
+        root_strategies = select_strategies(module, rootmodule_strategies)
+        if scheduler is not None:
+            location = get_location_key(module)
+            root_strategies = scheduler.order(location, root_strategies)
+        strategy_groups = submodule_strategies, root_strategies
+    else:
+        strategy_groups = submodule_strategies,
+
+    for group_idx, strategies in enumerate(strategy_groups):
+        if snapshot is not None and group_idx == 1 and module_name in snapshot:
+            version_str = snapshot[module_name]
+            version_cache.put(original_module, cache_key, version_str)
+            return version_str
+
+        use_persistent = persistent is not None and group_idx == 1
+        if use_persistent:
+            module_location = get_module_location(module)
+            persisted = persistent.get(module_name, module_location)
+            if persisted is not None:
+                version_str = persisted[0]
+                version_cache.put(original_module, cache_key, version_str)
+                return version_str
+            # the failed attempts are persisted too, so that get_module_version can use the entry
+            attempts = []
+
+        learn = scheduler is not None and group_idx == 1
+        for strategy in strategies:
+            if recorder is None and not use_persistent and not learn:
+                try:
+                    version_str = strategy(module)
+                    if not isinstance(version_str, str):
+                        raise InvalidVersionFound(version_str)
+                except Exception as e:
+                    errors[strategy] = StrategyFailure.from_exception(strategy, e)
+                    continue
+            else:
+                start = perf_counter()
+                try:
+                    version_str = strategy(module)
+                    if not isinstance(version_str, str):
+                        raise InvalidVersionFound(version_str)
+                except Exception as e:
+                    version_str = None
+                    errors[strategy] = StrategyFailure.from_exception(strategy, e)
+                    if use_persistent:
+                        attempts.append((get_strategy_name(strategy), str(e)))
+                duration = perf_counter() - start
+                if recorder is not None:
+                    recorder.record_strategy(get_strategy_name(strategy), isinstance(version_str, str), duration)
+                if learn:
+                    scheduler.record(location, strategy, isinstance(version_str, str), duration)
+
+            if isinstance(version_str, str):
+                backing_paths = _get_backing_paths(module, strategy) \
+                    if (version_cache.check_mtimes or use_persistent) else ()
+                version_cache.put(original_module, cache_key, version_str,
+                                  backing_paths=backing_paths if version_cache.check_mtimes else ())
+                if use_persistent:
+                    persistent.put(module_name, module_location, version_str, get_strategy_name(strategy), attempts,
+                                   backing_paths)
+                return version_str
+
+    if not is_root_module:
+        # the result of the parent package is shared by all its submodules (see `get_module_version`)
+        parent = find_module(module_name[:next_split_idx])
+        try:
+            version_str = get_version_str(parent, submodule_strategies=submodule_strategies,
+                                          rootmodule_strategies=rootmodule_strategies)
+        except ModuleVersionNotFound as e:
+            all_errors.update(e.err_dct)
+        else:
+            if version_cache.check_mtimes:
+                # the paths backing the version of the parent were recorded with its entry
+                backing_paths = version_cache.get_backing_paths(parent, cache_key)
+                if backing_paths is None:
+                    backing_paths = version_cache.get_backing_paths(parent, cache_key[0:2]) or ()
+            else:
+                backing_paths = ()
+            version_cache.put(original_module, cache_key, version_str, backing_paths=backing_paths)
+            return version_str
+
+    # all strategies failed. The failures are not cached, as in `get_module_version`
+    raise ModuleVersionNotFound(original_module, errors_dict=all_errors)
+
+
+# backwards compatibility: this used to be an `lru_cache`
+get_module_version.cache_clear = version_cache.clear
+
+
+def get_module_versions(modules=None,                                  # type: Iterable[ModuleType]
+                        submodule_strategies=_STRATEGIES_SUBMODULES,   # type: Iterable[Callable[[ModuleType], str]]
+                        rootmodule_strategies=_STRATEGIES_ROOTMODULES,  # type: Iterable[Callable[[ModuleType], str]]
+                        max_workers=None,                              # type: int
+                        executor=None                                  # type: Executor
+                        ):
+    # type: (...) -> Dict[str, Tuple[Optional[str], Union[DetailedResults, Exception]]]
+    """
+    Bulk version of `get_module_version`, to get the versions of several modules in one pass.
+
+    The indexes used by the strategies (the dist index built from one directory listing of dist-info/egg-info folders
+    per `sys.path` entry, SCM repository roots) are built once and shared by all modules, so that the cost is roughly
+    linear in the number of modules.
+
+    Since resolution mostly waits for the filesystem and for `git`, modules can be resolved concurrently in threads
+    by providing `max_workers` or an `executor`. Concurrent resolutions of the same module, or of the same
+    repository, are coalesced into a single computation.
+
+    :param modules: an iterable of modules. By default all modules in `sys.modules` are used.
+    :param submodule_strategies:
+    :param rootmodule_strategies:
+    :param max_workers: if provided (and `executor` is not), modules are resolved in a
+        `concurrent.futures.ThreadPoolExecutor` with this number of threads, created for this call.
+    :param executor: an optional `concurrent.futures.Executor` to use to resolve the modules concurrently. It is not
+        shut down at the end.
+    :return: an ordered dictionary {module_name: (version, details)}. For modules where a version was found,
+        `details` is a `DetailedResults`. Otherwise version is `None` and `details` is the `ModuleVersionNotFound`
+        error, or the `ImportError` if the parent package of a module can not be found.
+    """
+    if modules is None:
+        # take a snapshot since sys.modules may be modified while we resolve
+        modules = list(sys.modules.values())
+
+    submodule_strategies = tuple(submodule_strategies)
+    rootmodule_strategies = tuple(rootmodule_strategies)
+
+    # sys.modules may contain None entries (import blockers)
+    modules = [m for m in modules if m is not None]
+
+    if executor is None and max_workers is None:
+        results = (_get_version_tuple(m, submodule_strategies, rootmodule_strategies) for m in modules)
+        return OrderedDict((name, (version, details)) for name, version, details in results)
+
+    own_executor = executor is None
+    if own_executor:
+        # python 2 requires the `futures` backport
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_get_version_tuple, m, submodule_strategies, rootmodule_strategies)
+                   for m in modules]
+        return OrderedDict((name, (version, details)) for name, version, details in (f.result() for f in futures))
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def _get_version_tuple(module,                # type: ModuleType
+                       submodule_strategies,  # type: Iterable[Callable[[ModuleType], str]]
+                       rootmodule_strategies  # type: Iterable[Callable[[ModuleType], str]]
+                       ):
+    # type: (...) -> Tuple[str, Optional[str], Union[DetailedResults, Exception]]
+    try:
+        version, details = get_module_version(module, submodule_strategies=submodule_strategies,
+                                              rootmodule_strategies=rootmodule_strategies)
+    except (ModuleVersionNotFound, ImportError, ValueError) as e:
+        # ImportError/ValueError: the parent package of a `sys.modules` entry can not be found
+        version, details = None, e
+    return module.__name__, version, details
+
+
+def _cheap_prefix(strategies  # type: Tuple[Callable[[ModuleType], str], ...]
+                  ):
+    # type: (...) -> Tuple[Callable[[ModuleType], str], ...]
+    """Returns the longest prefix of `strategies` made of cheap strategies only (see `_CHEAP_STRATEGIES`)"""
+    for i, strategy in enumerate(strategies):
+        if strategy not in _CHEAP_STRATEGIES:
+            return strategies[:i]
+    return strategies
+
+
+def iter_module_versions(modules=None,                                 # type: Iterable[Union[str, ModuleType]]
+                         submodule_strategies=_STRATEGIES_SUBMODULES,   # type: Iterable[Callable[[ModuleType], str]]
+                         rootmodule_strategies=_STRATEGIES_ROOTMODULES  # type: Iterable[Callable[[ModuleType], str]]
+                         ):
+    # type: (...) -> Iterator[Tuple[str, Optional[str], Union[DetailedResults, Exception]]]
+    """
+    Generator version of `get_module_versions`, yielding `(module_name, version, details)` tuples as soon as each
+    module is resolved, so that the first results are available quickly whatever the number of modules.
+
+    Modules are resolved in two passes:
+
+     - first, all modules are resolved with the cheap strategies only (`__version__` attribute, distributions index,
+       builtin modules, see `_CHEAP_STRATEGIES`),
+     - then the modules that could not be resolved this way are resolved with all strategies (directory scans, zip
+       archives, SCM...).
+
+    Only the leading cheap strategies of `rootmodule_strategies` are used in the first pass, so the results are the
+    same as with `get_module_version`, and are cached the same way. Only the order in which they are yielded changes.
+
+    :param modules: an iterable of modules or module names. By default all modules in `sys.modules` are used.
+    :param submodule_strategies:
+    :param rootmodule_strategies:
+    :return: a generator of tuples `(module_name, version, details)`. For modules where a version was found,
+        `details` is a `DetailedResults`. Otherwise version is `None` and `details` is the `ModuleVersionNotFound`
+        error, or the `ImportError` if a module name or the parent package of a module can not be found.
+    """
+    if modules is None:
+        # take a snapshot since sys.modules may be modified while we resolve
+        modules = list(sys.modules.values())
+
+    submodule_strategies = tuple(submodule_strategies)
+    rootmodule_strategies = tuple(rootmodule_strategies)
+    cheap_rootmodule_strategies = _cheap_prefix(rootmodule_strategies)
+    full_key = submodule_strategies, rootmodule_strategies
+
+    # first pass: cheap strategies. Modules that fail are deferred to the second pass
+    deferred = []
+    for module in modules:
+        if module is None:
+            # sys.modules may contain None entries (import blockers)
+            continue
+        if isinstance(module, str):
+            try:
+                module = find_module(module)
+            except (ImportError, ValueError) as e:
+                yield module, None, e
+                continue
+
+        if len(cheap_rootmodule_strategies) == len(rootmodule_strategies) \
+                or version_cache.get(module, full_key) is not None:
+            # no expensive strategy, or already cached: no need to defer
+            yield _get_version_tuple(module, submodule_strategies, rootmodule_strategies)
+            continue
+
+        try:
+            res = get_module_version(module, submodule_strategies=submodule_strategies,
+                                     rootmodule_strategies=cheap_rootmodule_strategies)
+        except ModuleVersionNotFound:
+            deferred.append(module)
+            continue
+        except (ImportError, ValueError) as e:
+            yield module.__name__, None, e
+            continue
+
+        # the same result would be found by the complete strategies: share it with get_module_version
+        details = res[1]
+        version_cache.put(module, full_key, res,
+                          backing_paths=_get_winner_backing_paths(module, details) if version_cache.check_mtimes else ())
+        yield module.__name__, res[0], details
+
+    # second pass: all strategies
+    for module in deferred:
+        yield _get_version_tuple(module, submodule_strategies, rootmodule_strategies)
@@ -0,0 +1,243 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import json
+import os
+import sys
+from hashlib import sha1
+from os.path import abspath, dirname, expanduser, join, normcase, realpath
+
+try:  # python 3.5+
+    from typing import Iterable, List, Optional, Tuple
+    from types import ModuleType
+except ImportError:
+    pass
+
+from getversion.cache import _get_mtimes
+
+
+def get_default_cache_path():
+    # type: (...) -> str
+    """
+    Returns the default location of the persistent cache file, in the user cache directory:
+    `%LOCALAPPDATA%/getversion` on windows, `$XDG_CACHE_HOME/getversion` or `~/.cache/getversion` otherwise.
+
+    :return:
+    """
+    if sys.platform == 'win32':
+        base_dir = os.environ.get('LOCALAPPDATA') or expanduser('~')
+    else:
+        base_dir = os.environ.get('XDG_CACHE_HOME') or join(expanduser('~'), '.cache')
+    return join(base_dir, 'getversion', 'versions.sqlite')
+
+
+def get_environment_fingerprint():
+    # type: (...) -> str
+    """
+    Returns a fingerprint of the current python environment: interpreter version, `sys.prefix` and `sys.path`.
+    Entries of the persistent cache are only valid for the same fingerprint. The `sys.path` entries are made absolute,
+    so that `''` (the current directory) and relative entries designate different folders in different processes.
+
+    :return:
+    """
+    sys_path = tuple(abspath(p or os.getcwd()) for p in sys.path)
+    key = repr((sys.version, sys.prefix, getattr(sys, 'base_prefix', sys.prefix), sys_path))
+    return sha1(key.encode('utf-8')).hexdigest()
+
+
+def get_module_location(module  # type: ModuleType
+                        ):
+    # type: (...) -> str
+    """
+    Returns the resolved path of the file of `module` (or of its first folder for namespace packages), or `''` if it
+    has none. It is stored with each entry of the persistent cache, and an entry is only used for a module at the same
+    location.
+
+    :param module:
+    :return:
+    """
+    path = getattr(module, '__file__', None)
+    if path is None:
+        try:
+            path = next(iter(module.__path__))
+        except (AttributeError, StopIteration, TypeError):
+            return ''
+    return normcase(realpath(path))
+
+
+# the version of the database schema. Databases with another version are reset
+_SCHEMA_VERSION = 2
+
+
+class PersistentVersionCache(object):
+    """
+    A version cache stored in a small SQLite database, shared by all processes using the same file. It is used by
+    `get_module_version` and `get_version_str` when enabled with `enable_persistent_cache`, for the root modules
+    resolved with the default strategies.
+
+    Entries are keyed on the module name and the environment fingerprint (see `get_environment_fingerprint`), and are
+    only used for a module at the same location (see `get_module_location`). Each entry also stores the modification
+    times of the files and folders backing the version (the folder containing the
+    dist-info/egg-info, the git HEAD and index, the zip archive...): they are checked on every lookup, and stale
+    entries are ignored and replaced with the new result.
+
+    It is a best-effort cache: all database errors (read-only filesystem, locked database...) are ignored, the
+    version is then simply resolved as usual.
+    """
+    __slots__ = 'path', '_connection', '_fingerprint_key', '_fingerprint'
+
+    def __init__(self,
+                 path=None  # type: str
+                 ):
+        self.path = path if path is not None else get_default_cache_path()
+        self._connection = None
+        self._fingerprint_key = None
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        # type: (...) -> str
+        """
+        The fingerprint of the current environment. It is recomputed only when `sys.path` or the current directory
+        changes
+        """
+        key = os.getcwd(), tuple(sys.path)
+        if key != self._fingerprint_key:
+            self._fingerprint = get_environment_fingerprint()
+            self._fingerprint_key = key
+        return self._fingerprint
+
+    def _connect(self):
+        if self._connection is None:
+            import sqlite3
+            try:
+                os.makedirs(dirname(self.path))
+            except OSError:
+                pass  # already exists
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            # this is a cache: durability is not needed, but concurrent readers and writers are
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                # created by another version of getversion: this is a cache, start from scratch
+                connection.execute("DROP TABLE IF EXISTS versions")
+                connection.execute("PRAGMA user_version=%s" % _SCHEMA_VERSION)
+            connection.execute("CREATE TABLE IF NOT EXISTS versions (module TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                               "location TEXT NOT NULL, version TEXT NOT NULL, strategy TEXT NOT NULL, "
+                               "attempts TEXT NOT NULL, mtimes TEXT NOT NULL, PRIMARY KEY (module, fingerprint))")
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get(self,
+            module_name,  # type: str
+            location      # type: str
+            ):
+        # type: (...) -> Optional[Tuple[str, str, List[Tuple[str, str]]]]
+        """
+        Returns a tuple (version, strategy name, failed attempts) for `module_name` in the current environment, or
+        None if there is no valid entry. Failed attempts is a list of (strategy name, error message) for the
+        strategies that were tried before the winning one.
+
+        :param module_name:
+        :param location: the location of the module (see `get_module_location`). Entries stored for another location
+            are not valid.
+        :return:
+        """
+        import sqlite3
+        try:
+            row = self._connect().execute("SELECT location, version, strategy, attempts, mtimes FROM versions "
+                                          "WHERE module=? AND fingerprint=?", (module_name, self.fingerprint)).fetchone()
+        except sqlite3.Error:
+            return None
+
+        if row is None:
+            return None
+
+        stored_location, version, strategy_name, attempts, mtimes = row
+        if stored_location != location:
+            # another module with the same name
+            return None
+
+        mtimes = tuple((p, m) for p, m in json.loads(mtimes))
+        if _get_mtimes(p for p, _ in mtimes) != mtimes:
+            # stale
+            return None
+
+        return version, strategy_name, [tuple(a) for a in json.loads(attempts)]
+
+    def put(self,
+            module_name,    # type: str
+            location,       # type: str
+            version,        # type: str
+            strategy_name,  # type: str
+            attempts,       # type: Iterable[Tuple[str, str]]
+            backing_paths   # type: Iterable[str]
+            ):
+        """
+        Stores the version found for `module_name` in the current environment.
+
+        :param module_name:
+        :param location: the location of the module (see `get_module_location`)
+        :param version:
+        :param strategy_name: the name of the winning strategy
+        :param attempts: a list of (strategy name, error message) for the strategies that failed before
+        :param backing_paths: the paths of the files and folders backing the version. Their modification times are
+            checked by `get`.
+        :return:
+        """
+        import sqlite3
+        try:
+            self._connect().execute("INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    (module_name, self.fingerprint, location, version, strategy_name,
+                                     json.dumps(list(attempts)), json.dumps(_get_mtimes(backing_paths))))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        """Removes all entries, for all environments"""
+        import sqlite3
+        try:
+            self._connect().execute("DELETE FROM versions")
+        except sqlite3.Error:
+            pass
+
+
+class PersistedStrategyError(Exception):
+    """The error of a strategy, as recorded in the persistent cache (only its message is available)"""
+    pass
+
+
+persistent_cache = None  # type: Optional[PersistentVersionCache]
+"""The persistent cache, or None if it is disabled (the default)."""
+
+
+def enable_persistent_cache(path=None  # type: str
+                            ):
+    # type: (...) -> PersistentVersionCache
+    """
+    Enables the persistent, on-disk, version cache shared across processes (see `PersistentVersionCache`).
+
+    :param path: the path of the SQLite database file. By default a file in the user cache directory is used (see
+        `get_default_cache_path`)
+    :return: the persistent cache
+    """
+    global persistent_cache
+    disable_persistent_cache()
+    persistent_cache = PersistentVersionCache(path)
+    return persistent_cache
+
+
+def disable_persistent_cache():
+    """
+    Disables the persistent version cache. The cache file is not deleted.
+    """
+    global persistent_cache
+    if persistent_cache is not None:
+        persistent_cache.close()
+        persistent_cache = None
@@ -3,24 +3,118 @@
 #  License: BSD 3 clause
 
 import sys
+from os.path import abspath, normcase, sep
 
 try:
     from functools import lru_cache
 except ImportError:
     from functools32 import lru_cache
 
-from stdlib_list import stdlib_list
+try:  # python 3.5+
+    from typing import Optional, Tuple
+    from types import ModuleType
+except ImportError:
+    pass
+
+try:  # python 3.10+
+    STDLIB_MODULE_NAMES = sys.stdlib_module_names
+except AttributeError:
+    from getversion._stdlib_names import LEGACY_STDLIB_MODULE_NAMES as STDLIB_MODULE_NAMES
+
+
+@lru_cache(maxsize=None)
+def get_stdlib_dirs():
+    # type: (...) -> Tuple[Tuple[str, ...], Tuple[str, ...]]
+    """
+    Returns a tuple (stdlib_dirs, excluded_dirs) of normalized folder paths with a trailing separator. stdlib_dirs
+    are the folders of the standard library of the base python installation (`sys.real_prefix` in legacy virtualenvs,
+    `sys.base_prefix` otherwise), excluded_dirs are the folders where third-party packages are installed. They may be
+    located inside the stdlib dirs (e.g. `lib/pythonX.Y/site-packages`).
+
+    They are computed the first time this function is called, not when `getversion` is imported.
+    """
+    import sysconfig
+
+    # legacy virtualenv (python 2) only sets `sys.real_prefix`, for both the pure and platform-specific parts
+    real_prefix = getattr(sys, 'real_prefix', None)
+    base = real_prefix or getattr(sys, 'base_prefix', sys.prefix)
+    platbase = real_prefix or getattr(sys, 'base_exec_prefix', sys.exec_prefix)
+    # python 3 uses `installed_base` for `stdlib`
+    base_paths = sysconfig.get_paths(vars={'base': base, 'platbase': platbase,
+                                           'installed_base': base, 'installed_platbase': platbase})
+    stdlib_dirs = set(normcase(abspath(base_paths[k])) + sep for k in ('stdlib', 'platstdlib'))
+
+    paths = sysconfig.get_paths()
+    excluded_dirs = set(normcase(abspath(paths[k])) + sep for k in ('purelib', 'platlib'))
+    return tuple(stdlib_dirs), tuple(excluded_dirs)
+
+
+def is_site_packages_path(path  # type: str
+                          ):
+    # type: (...) -> bool
+    """
+    Returns True if `path` (normalized with `normcase` and `abspath`) is located in a folder where third-party
+    packages are installed: the site-packages folders of the current environment, or any `site-packages` or
+    `dist-packages` folder.
+
+    :param path:
+    :return:
+    """
+    return any(path.startswith(d) for d in get_stdlib_dirs()[1]) \
+        or ('%ssite-packages%s' % (sep, sep)) in path or ('%sdist-packages%s' % (sep, sep)) in path
+
 
+def is_located_in_stdlib(module  # type: ModuleType
+                         ):
+    # type: (...) -> Optional[bool]
+    """
+    Returns True if the module file is located in the standard library folder of the base python installation, False
+    if it is located somewhere else, and None if the module has no location (built-in, frozen, namespace package...)
+
+    :param module:
+    :return:
+    """
+    spec = getattr(module, '__spec__', None)
+    if spec is not None:
+        origin = spec.origin if spec.has_location else None
+    else:
+        origin = getattr(module, '__file__', None)
+
+    if origin is None:
+        return None
+
+    origin = normcase(abspath(origin))
+    if is_site_packages_path(origin):
+        return False
+    else:
+        return any(origin.startswith(d) for d in get_stdlib_dirs()[0])
+
+
+def is_builtin(module  # type: ModuleType
+               ):
+    # type: (...) -> bool
+    """
+    Returns True if `module` is a module from the standard library:
 
-@lru_cache(maxsize=1)
-def get_builtin_module_list():
-    return stdlib_list('.'.join([str(v) for v in sys.version_info[0:2]]))
+     - compiled-in modules (`sys.builtin_module_names`) are always builtin
+     - modules located in the standard library folder of the base python installation are builtin, modules located
+       elsewhere are not, even if they have the same name than a standard library module (e.g. backports installed in
+       site-packages).
+     - modules without location are builtin if their name is a standard library module name (`sys.stdlib_module_names`
+       or an embedded list for python < 3.10)
 
+    :param module:
+    :return:
+    """
+    module_name = module.__name__
+    if module_name in sys.builtin_module_names:
+        return True
 
-@lru_cache(maxsize=-1)
-def is_builtin(module_name):
-    ref_list = get_builtin_module_list()
-    return module_name in ref_list
+    in_stdlib_dir = is_located_in_stdlib(module)
+    if in_stdlib_dir is None:
+        return module_name.split('.')[0] in STDLIB_MODULE_NAMES
+    else:
+        return in_stdlib_dir
 
 
 def get_builtin_module_version(module  # type: ModuleType
@@ -33,8 +127,7 @@ def get_builtin_module_version(module  # type: ModuleType
     :param module:
     :return:
     """
-    if module.__name__ in sys.builtin_module_names \
-            or is_builtin(module.__name__):  # `imp.is_builtin` also works but maybe less efficient
+    if is_builtin(module):  # `imp.is_builtin` also works but maybe less efficient
         # what about this ?
         # from platform import python_version
         # python_version()
@@ -0,0 +1,286 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import csv
+import sys
+from os import stat, sep
+from os.path import join, exists, pardir, dirname, normcase, abspath
+from stat import S_ISDIR
+
+try: # python 3+
+    from pathlib import Path
+except ImportError:
+    from pathlib2 import Path
+
+try:
+    from functools import lru_cache
+except ImportError:
+    from functools32 import lru_cache
+
+from getversion.cache import register_index
+from getversion.plugin_eggs_and_wheels import get_dist_folders_index, normalize_dist_name, \
+    read_version_from_dist_info, read_version_from_egg_info, read_pkg_name_from_dist_info_toplevel
+
+try: # python 3
+    FileNotFoundError
+except NameError:
+    FileNotFoundError = IOError
+
+
+class DistributionNotFound(Exception):
+    def __init__(self, module_name):
+        self.module_name = module_name
+
+    def __str__(self):
+        return "No dist-info or egg-info folder for distribution '%s' could be found in the sys.path entries" \
+               % self.module_name
+
+
+@lru_cache(maxsize=None)
+def resolve_path(path):
+    """
+    Returns the resolved version of `path`. Since many modules share the same distribution location (typically,
+    site-packages) the result is cached to avoid the associated filesystem calls.
+    """
+    return Path(path).resolve()
+
+
+register_index(resolve_path.cache_clear)
+
+
+def _get_sys_path_state(sys_path):
+    """
+    Returns the modification times of the `sys.path` entries (None for the entries that are not directories, such as
+    zip files and non-existent entries). They are used as the validity key of the environment indexes: the mtime of an
+    entry changes as soon as a distribution folder is added, removed or renamed in it (e.g. by `pip install`).
+    """
+    state = []
+    for location in sys_path:
+        try:
+            # note: '' is the current directory
+            st = stat(location or '.')
+        except OSError:
+            state.append(None)
+        else:
+            state.append(getattr(st, 'st_mtime_ns', st.st_mtime) if S_ISDIR(st.st_mode) else None)
+    return tuple(state)
+
+
+# cache of {sys.path: (sys.path state, index)}, see get_environment_dists_index
+_ENV_INDEXES = dict()
+register_index(_ENV_INDEXES.clear)
+
+
+def get_environment_dists_index():
+    """
+    Returns an index of the distributions installed in the current environment, in the form of a dictionary
+    {normalized_name: (version, folder_path, kind, location)}. When several distributions with the same name exist,
+    the first one in `sys.path` order wins, like in `pkg_resources`. `version` may be None if it is not present in the
+    folder name (e.g. `<name>.egg-info` folders of develop installs).
+
+    The index is built from the directory listings of all `sys.path` entries (see `get_dist_folders_index`: one
+    listing per entry, shared with the other strategies), and cached for the current value of `sys.path`. It is built
+    again when the modification time of one of the entries changes (see `_get_sys_path_state`).
+
+    :return:
+    """
+    sys_path = tuple(sys.path)
+    state = _get_sys_path_state(sys_path)
+    try:
+        cached_state, index = _ENV_INDEXES[sys_path]
+        if cached_state == state:
+            return index
+    except KeyError:
+        pass
+
+    index = dict()
+    for location, mtime in zip(sys_path, state):
+        if mtime is None:
+            # zip files and non-existent entries
+            continue
+        location = location or '.'
+        for pkg_name, entries in get_dist_folders_index(location).items():
+            version, folder_path, kind = entries[0]
+            index.setdefault(pkg_name, (version, folder_path, kind, location))
+
+    _ENV_INDEXES[sys_path] = state, index
+    return index
+
+
+def _iter_installed_files(folder_path,  # type: str
+                          kind,         # type: str
+                          location      # type: str
+                          ):
+    """
+    Yields the absolute paths of the files installed by the distribution whose metadata is in `folder_path`, from
+    the `RECORD` file (dist-info, see PEP376) or the `installed-files.txt` file (egg-info installed by pip). Only the
+    files located at the root of `location` or in first-level packages are yielded, since these are the only ones that
+    can be the `__file__` of a root module.
+    """
+    if kind == 'dist-info':
+        record_file, base_dir = join(folder_path, 'RECORD'), location
+    else:
+        record_file, base_dir = join(folder_path, 'installed-files.txt'), folder_path
+
+    try:
+        f = open(record_file, 'rt')
+    except (OSError, FileNotFoundError):
+        return
+
+    # compare with a trailing separator so that e.g. `site-packages2/` does not match `site-packages`
+    prefix = location if location.endswith(sep) else location + sep
+    with f:
+        for row in csv.reader(f):
+            if len(row) == 0:
+                continue
+            file_path = normcase(abspath(join(base_dir, row[0])))
+            if file_path.startswith(prefix):
+                rel_path = file_path[len(prefix):]
+                if rel_path.replace('\\', '/').count('/') <= 1:
+                    yield file_path
+
+
+def _read_top_level_names(folder_path):
+    """
+    Returns the list of top-level import names declared in the `top_level.txt` file of a dist-info or egg-info folder,
+    or an empty list if there is no such file.
+    """
+    try:
+        return read_pkg_name_from_dist_info_toplevel(folder_path).split()
+    except (OSError, FileNotFoundError):
+        return []
+
+
+# cache of {sys.path: (sys.path state, index)}, see get_environment_files_index
+_FILES_INDEXES = dict()
+register_index(_FILES_INDEXES.clear)
+
+
+def get_environment_files_index():
+    """
+    Returns a reverse index of the distributions installed in the current environment, in the form of a tuple of two
+    dictionaries:
+
+     - {root module file path: (version, folder_path, kind, location)}, built from the `RECORD` (dist-info) and
+       `installed-files.txt` (egg-info) files.
+     - {top-level import name: (version, folder_path, kind, location)}, built from the `top_level.txt` files.
+
+    This allows to find the distribution of modules whose import name differs from the distribution name (e.g. `yaml`
+    is provided by `PyYAML`, `sklearn` by `scikit-learn`, `PIL` by `Pillow`).
+
+    It is more costly to build than `get_environment_dists_index` since the metadata files of all distributions have
+    to be read, so it is built lazily on first use and cached for the current value of `sys.path`, with the same
+    validity check than `get_environment_dists_index`.
+
+    :return:
+    """
+    sys_path = tuple(sys.path)
+    state = _get_sys_path_state(sys_path)
+    try:
+        cached_state, res = _FILES_INDEXES[sys_path]
+        if cached_state == state:
+            return res
+    except KeyError:
+        pass
+
+    files_index = dict()
+    top_level_index = dict()
+    for location, mtime in zip(sys_path, state):
+        if mtime is None:
+            continue
+        location = location or '.'
+        abs_location = normcase(abspath(location))
+        for entries in get_dist_folders_index(location).values():
+            for version, folder_path, kind in entries:
+                dist = version, folder_path, kind, location
+                for file_path in _iter_installed_files(folder_path, kind, abs_location):
+                    files_index.setdefault(file_path, dist)
+                for name in _read_top_level_names(folder_path):
+                    top_level_index.setdefault(name, dist)
+
+    res = files_index, top_level_index
+    _FILES_INDEXES[sys_path] = state, res
+    return res
+
+
+def _find_dist(module  # type: ModuleType
+               ):
+    """
+    Returns the (version, folder_path, kind, location, from_record) information about the distribution of `module`,
+    where `from_record` indicates that the module file is explicitly listed in the installed files of the
+    distribution. Raises DistributionNotFound if none is found.
+
+    The (cheap) distribution name index is used first, then the reverse index of installed files and top-level names.
+    """
+    try:
+        return get_environment_dists_index()[normalize_dist_name(module.__name__)] + (False, )
+    except KeyError:
+        pass
+
+    files_index, top_level_index = get_environment_files_index()
+    module_file = getattr(module, '__file__', None)
+    if module_file is not None:
+        module_file = normcase(abspath(module_file))
+        if module_file.endswith('.pyc'):
+            # python 2
+            module_file = module_file[:-1]
+        try:
+            return files_index[module_file] + (True, )
+        except KeyError:
+            pass
+
+    try:
+        return top_level_index[module.__name__] + (False, )
+    except KeyError:
+        raise DistributionNotFound(module.__name__)
+
+
+def get_version_using_dist_index(module  # type: ModuleType
+                                 ):
+    # type: (...) -> str
+    """
+    Gets the version from the package info found in the dist-info or egg-info folders of the `sys.path` entries.
+    This is a lightweight replacement for `get_version_using_pkgresources`: instead of bootstrapping the whole
+    `pkg_resources` working set, only one directory listing per `sys.path` entry is needed (see
+    `get_environment_dists_index`), and metadata files are only read when the version is not in the folder name.
+
+    If no distribution has the same name than the module, the reverse index of installed files and top-level names is
+    used (see `get_environment_files_index`), so that modules whose import name differs from the distribution name
+    (`yaml`/`PyYAML`, `sklearn`/`scikit-learn`...) are supported too.
+
+    The same protections as in `get_version_using_pkgresources` apply:
+
+     - In case the location of the found distribution is not the same than the one in the package, an error is raised.
+     - In case there is an old local `.egg-info` in the package folder, this method may return the wrong version
+       number. For this reason an error is raised in that case.
+
+    :param module:
+    :return:
+    """
+    version, folder_path, kind, location, from_record = _find_dist(module)
+
+    if not from_record:
+        if hasattr(module, '__path__'):
+            # package: <location>/<pkg>/__init__.py
+            module_location = join(dirname(module.__file__), pardir)
+        else:
+            # single-file module: <location>/<module>.py
+            module_location = dirname(module.__file__)
+
+        if resolve_path(location) != resolve_path(module_location):
+            raise Exception("Another distribution of the same package (with version '%s') is installed, but is not "
+                            "the one that was imported" % version)
+
+    # PROTECTION: if there is an old egg-info in the folder, the version will be that one, even if not installed!
+    if exists(join(location, module.__name__ + ".egg-info")):
+        raise Exception("There is a '%s' folder in the package location so it seems to be a source project "
+                        "that is not pip-installed. The dist index will therefore be ignored "
+                        "to find the version" % (module.__name__ + ".egg-info"))
+
+    if version is not None and len(version) > 0:
+        return version
+    elif kind == 'dist-info':
+        return read_version_from_dist_info(folder_path)
+    else:
+        return read_version_from_egg_info(folder_path)
@@ -8,7 +8,17 @@ except ImportError:
     from scandir import scandir
 
 import re
-from os.path import exists, join, pardir, abspath
+from os import stat
+from threading import Lock
+from os.path import join, pardir, abspath, basename, isfile
+
+from getversion.cache import register_index
+
+try:  # python 3.5+
+    from typing import Any, Callable, List, Optional
+    from types import ModuleType
+except ImportError:
+    pass
 
 try: # python 3
     FileNotFoundError
@@ -30,19 +40,189 @@ def read_pkg_name_from_dist_info_toplevel(dist_info_folder_path):
     return desc_name.strip()
 
 
-def _read_version_from_metadata_file(metadata_file):
+# size of the chunks read from metadata files, and maximum size of a single header line
+METADATA_CHUNK_SIZE = 4096
+METADATA_MAX_LINE_SIZE = 65536
+
+
+def _skip(f,     # type: Any
+          size   # type: int
+          ):
+    """Reads and discards the first `size` bytes of binary file `f`"""
+    while size > 0:
+        chunk = f.read(min(size, METADATA_CHUNK_SIZE))
+        if not chunk:
+            return
+        size -= len(chunk)
+
+
+class MetadataHeaders(object):
+    """
+    The RFC 822 header fields of a METADATA (dist-info) or PKG-INFO (egg-info) file, parsed lazily.
+
+    The file is read in binary mode, by chunks of `METADATA_CHUNK_SIZE` bytes, and only as far as needed: parsing
+    stops as soon as the requested field is found, or at the end of the header block (first blank line). The long
+    description that may follow is never read. Fields parsed so far are kept, so that other strategies can reuse them
+    (`get('Name')`, `get_all('Requires-Dist')`...) without reading the file again. Use `read_metadata_headers` to
+    get the shared instance for a file.
+
+    `opener` is the function used to open `path` in binary mode. It can be changed to read files that are not on the
+    filesystem, for example a member of a zip archive.
+
+    Instances are shared, so parsing is protected by a lock: they can be used from several threads.
+    """
+    __slots__ = 'path', 'file_state', 'opener', '_fields', '_offset', '_last_key', 'complete', '_lock'
+
+    def __init__(self,
+                 path,             # type: str
+                 file_state=None,  # type: Any
+                 opener=None       # type: Callable[[str], Any]
+                 ):
+        self.path = path
+        self.file_state = file_state
+        self.opener = opener
+        self._fields = dict()  # {lowercase name: [values]}
+        self._offset = 0
+        self._last_key = None
+        self.complete = False
+        self._lock = Lock()
+
+    def get(self,
+            name,         # type: str
+            default=None  # type: Any
+            ):
+        # type: (...) -> Optional[str]
+        """
+        Returns the value of the first header field named `name` (case-insensitive), or `default`.
+
+        :param name:
+        :param default:
+        :return:
+        """
+        key = name.lower()
+        if self.complete:
+            values = self._fields.get(key)
+        else:
+            with self._lock:
+                # another thread may have parsed it in the meantime
+                if key not in self._fields and not self.complete:
+                    self._parse(until=key)
+                values = self._fields.get(key)
+        return values[0] if values else default
+
+    def get_all(self,
+                name  # type: str
+                ):
+        # type: (...) -> List[str]
+        """
+        Returns the values of all header fields named `name` (case-insensitive), e.g. 'Requires-Dist'.
+
+        :param name:
+        :return:
+        """
+        if not self.complete:
+            with self._lock:
+                if not self.complete:
+                    self._parse()
+        return list(self._fields.get(name.lower(), ()))
+
+    def _parse(self,
+               until=None  # type: str
+               ):
+        """
+        Resumes parsing until header field `until` has been found, or until the end of the header block. It must be
+        called with the lock held.
+        """
+        with (open(self.path, 'rb') if self.opener is None else self.opener(self.path)) as f:
+            if self._offset:
+                if self.opener is None:
+                    f.seek(self._offset)
+                else:
+                    # the files returned by `opener` may not support seek (zip archive members before python 3.7)
+                    _skip(f, self._offset)
+            buf = b''
+            while True:
+                eol = buf.find(b'\n')
+                if eol < 0:
+                    chunk = f.read(METADATA_CHUNK_SIZE)
+                    if chunk:
+                        buf += chunk
+                        if len(buf) > METADATA_MAX_LINE_SIZE:
+                            raise ValueError("Header line too long in metadata file: %s" % self.path)
+                        continue
+                    elif not buf:
+                        # end of file
+                        self.complete = True
+                        return
+                    eol = len(buf)
+
+                line = buf[:eol].rstrip(b'\r')
+                is_continuation = line[:1] in (b' ', b'\t')
+                if until is not None and self._last_key == until and not is_continuation:
+                    # the requested field is complete: stop before consuming the next line
+                    return
+
+                buf = buf[eol + 1:]
+                self._offset += eol + 1
+                if not line:
+                    # end of the header block
+                    self.complete = True
+                    return
+
+                line = line.decode('utf-8', 'replace')
+                if is_continuation:
+                    # continuation of the previous field
+                    if self._last_key is not None:
+                        values = self._fields[self._last_key]
+                        values[-1] = values[-1] + '\n' + line.strip()
+                    continue
+
+                name, _, value = line.partition(':')
+                self._last_key = name.strip().lower()
+                self._fields.setdefault(self._last_key, []).append(value.strip())
+
+
+_METADATA_HEADERS = dict()
+register_index(_METADATA_HEADERS.clear)
+
+
+def read_metadata_headers(metadata_file  # type: str
+                          ):
+    # type: (...) -> MetadataHeaders
     """
-    Utility to parse a metadata file and extract the version
+    Returns the (lazily parsed) `MetadataHeaders` of `metadata_file`. The same instance is returned as long as the
+    modification time and size of the file do not change, so that the header fields already parsed by a strategy are
+    available to the others. Raises an `OSError` if the file does not exist.
+
     :param metadata_file:
     :return:
     """
-    if exists(metadata_file):
-        with open(metadata_file, 'rt') as f:
-            for line in f.readlines():
-                if line.startswith("Version:"):
-                    return line[8:].strip()
+    st = stat(metadata_file)
+    file_state = st.st_mtime, st.st_size
+    headers = _METADATA_HEADERS.get(metadata_file)
+    if headers is None or headers.file_state != file_state:
+        headers = _METADATA_HEADERS[metadata_file] = MetadataHeaders(metadata_file, file_state)
+    return headers
+
+
+def _read_version_from_metadata_file(metadata_file):
+    """
+    Utility to parse a metadata file and extract the version. Only the header block is read, and only until the
+    `Version` field is found (see `MetadataHeaders`).
+
+    :param metadata_file:
+    :return: the version, or None if the file does not exist
+    """
+    try:
+        headers = read_metadata_headers(metadata_file)
+    except (OSError, FileNotFoundError):
+        return None
+
+    version = headers.get('Version')
+    if version is None:
         raise ValueError("Metadata file was found in dist-info folder but does not contain any Version: %s"
                          % abspath(metadata_file))
+    return version
 
 
 def read_version_from_dist_info(dist_info_folder_path):
@@ -71,10 +251,115 @@ def read_version_from_dist_info(dist_info_folder_path):
 
 
 def read_version_from_egg_info(egg_info_folder_path):
-    metadata_file = join(egg_info_folder_path, 'PKG-INFO')
+    # distutils installs write a single file `<name>-<version>-py<pyver>.egg-info` containing the PKG-INFO fields
+    if isfile(egg_info_folder_path):
+        metadata_file = egg_info_folder_path
+    else:
+        metadata_file = join(egg_info_folder_path, 'PKG-INFO')
     return _read_version_from_metadata_file(metadata_file)
 
 
+_NORMALIZE_PATTERN = re.compile(r"[-_.]+")
+
+
+def normalize_dist_name(name):
+    """
+    Returns the normalized form of a distribution name, as defined in PEP503
+    (https://www.python.org/dev/peps/pep-0503/#normalized-names)
+
+    :param name:
+    :return:
+    """
+    return _NORMALIZE_PATTERN.sub("-", name).lower()
+
+
+def _parse_dist_folder_name(folder_name):
+    """
+    Parses a dist-info or egg-info folder name into a (pkg_name, version, kind) tuple, or returns None if the name
+    does not match any of the two patterns.
+
+    See PEP427 for the `{distribution}-{version}.dist-info` pattern
+    (https://www.python.org/dev/peps/pep-0427/#file-contents) and setuptools documentation for the egg equivalent
+    `{name}-{version}-py{pyver}-{platform}.egg-info` where all parts except the name are optional
+    (https://setuptools.readthedocs.io/en/latest/formats.html#filename-embedded-metadata)
+
+    :param folder_name:
+    :return: a tuple (pkg_name, version, kind) where version may be None if not present in the folder name, and kind
+        is one of 'dist-info' or 'egg-info'
+    """
+    if folder_name.endswith('.dist-info'):
+        # WHEEL: the version is mandatory in the folder name
+        parts = folder_name[:-10].rsplit('-', 1)
+        if len(parts) < 2:
+            return None
+        return parts[0], parts[1], 'dist-info'
+
+    elif folder_name.endswith('.egg-info'):
+        # EGG: everything except the name is optional
+        parts = folder_name[:-9].split('-')
+        version = parts[1] if len(parts) > 1 else None
+        return parts[0], version, 'egg-info'
+
+    else:
+        return None
+
+
+# cache of {directory: (directory mtime, index)}, see get_dist_folders_index
+_DIST_FOLDERS_INDEXES = dict()
+register_index(_DIST_FOLDERS_INDEXES.clear)
+
+
+def get_dist_folders_index(search_dir):
+    """
+    Returns an index of all dist-info and egg-info folders located in `search_dir`, in the form of a dictionary
+    {normalized_pkg_name: [(version, folder_path, kind), ...]} where entries are in the directory listing order, and
+    version is the one parsed from the folder name (None if it is not present, e.g. for `<name>.egg-info`). Names are
+    normalized with `normalize_dist_name`.
+
+    The single-file `.egg-info` written by distutils installs are indexed too, as well as the `EGG-INFO` folder when
+    `search_dir` is an unzipped egg (`<name>-<version>-py<pyver>.egg`, typically a `sys.path` entry). Their kind is
+    'egg-info': `read_version_from_egg_info` supports them.
+
+    The index is built once per directory with a single `scandir`, and is then shared by all modules located in that
+    directory. So resolving many modules from the same folder (typically, site-packages) only costs a dict lookup.
+    The modification time of the directory is used as the validity key of the index: it changes as soon as an entry is
+    added, removed or renamed (e.g. by `pip install`), and in that case the directory is scanned again.
+
+    :param search_dir:
+    :return:
+    """
+    search_dir = abspath(search_dir)
+    st = stat(search_dir)
+    mtime = getattr(st, 'st_mtime_ns', st.st_mtime)
+    try:
+        cached_mtime, index = _DIST_FOLDERS_INDEXES[search_dir]
+        if cached_mtime == mtime:
+            return index
+    except KeyError:
+        pass
+
+    index = dict()
+    is_egg_dir = search_dir.endswith('.egg')
+    it = scandir(search_dir)
+    try:
+        for entry in it:
+            if is_egg_dir and entry.name == 'EGG-INFO':
+                # unzipped egg: the distribution is described by the name of the egg folder
+                parsed = _parse_dist_folder_name(basename(search_dir)[:-4] + '.egg-info')
+            else:
+                parsed = _parse_dist_folder_name(entry.name)
+            if parsed is not None and (entry.is_dir() or (parsed[2] == 'egg-info' and entry.is_file())):
+                pkg_name, version, kind = parsed
+                index.setdefault(normalize_dist_name(pkg_name), []).append((version, entry.path, kind))
+    finally:
+        # end iterator
+        for _ in it:
+            pass
+
+    _DIST_FOLDERS_INDEXES[search_dir] = mtime, index
+    return index
+
+
 def get_unzipped_wheel_or_egg_version(module  # type: ModuleType
                                       ):
     # type: (...) -> str
@@ -93,48 +378,25 @@ def get_unzipped_wheel_or_egg_version(module  # type: ModuleType
     # search dir is the parent folder
     search_dir = join(module.__path__[0], pardir)
 
-    # scan the directory for a file matching pattern {distribution}-{version}.dist-info/
+    # look in the directory index for a folder matching pattern {distribution}-{version}.dist-info/
     # as suggested by https://www.python.org/dev/peps/pep-0427/#file-contents
     #
     # or matching the egg equivalent
     # https://setuptools.readthedocs.io/en/latest/formats.html#filename-embedded-metadata
-    module_name = module.__name__
-
-    # patterns to match
-    distinfo_pattern = re.compile("%s-(?P<version>[^-]*)\\.dist-info" % module_name)
-    egginfo_pattern = re.compile("%s(-(?P<version>[^-]*?)(-py(?P<pyver>[^-]*?)(-(?P<platform>[^-]*?))?)?)?\\.egg-info"
-                                 % module_name)
-    it = scandir(search_dir)
     try:
-        for entry in it:
-            if entry.is_dir():
-                distinfo_match = distinfo_pattern.match(entry.name)
-                if distinfo_match is not None:
-                    # WHEEL
-                    version = distinfo_match.groupdict()['version']
-                    if len(version) > 0:
-                        return version
-                    else:
-                        # slower because we have to open the metadata file
-                        return read_version_from_dist_info(entry.path)
-
-                else:
-                    egginfo_match = egginfo_pattern.match(entry.name)
-                    if egginfo_match is not None:
-                        # EGG
-                        version = egginfo_match.groupdict()['version']
-                        if version is not None and len(version) > 0:
-                            return version
-                        else:
-                            return read_version_from_egg_info(entry.path)
-
-    finally:
-        # end iterator
-        for _ in it:
-            pass
+        version, folder_path, kind = get_dist_folders_index(search_dir)[normalize_dist_name(module.__name__)][0]
+    except KeyError:
+        raise FileNotFoundError("No file matching egg-info or dist-info name patterns found in directory: %s"
+                                % search_dir)
 
-    raise FileNotFoundError("No file matching egg-info or dist-info name patterns found in directory: %s"
-                            % search_dir)
+    if version is not None and len(version) > 0:
+        return version
+    elif kind == 'dist-info':
+        # WHEEL - slower because we have to open the metadata file
+        return read_version_from_dist_info(folder_path)
+    else:
+        # EGG
+        return read_version_from_egg_info(folder_path)
     #     if s3err is None:
     #         warn(" - (3) this package does not seem to come from an unzipped wheel file: no dist-info folder could be found"
     #              " next to the package __path__, for which contents of 'top_level.txt' matches the package name")
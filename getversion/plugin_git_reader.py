@@ -0,0 +1,976 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import mmap
+import os
+import zlib
+from binascii import hexlify, unhexlify
+from bisect import bisect_left
+from fnmatch import fnmatchcase
+from glob import glob
+from hashlib import sha1
+from heapq import heappush, heappop
+from os.path import abspath, basename, dirname, exists, expanduser, isdir, join, normpath
+from struct import unpack_from
+
+try:
+    from functools import lru_cache
+except ImportError:
+    from functools32 import lru_cache
+
+try:  # python 3.5+
+    from typing import Dict, List, Optional, Tuple
+    from types import ModuleType
+except ImportError:
+    pass
+
+from getversion.cache import register_index, SingleFlight
+from getversion.plugin_setuptools_scm import ScmInformationNotFound, SetupToolsScmNotInstalled, find_scm_root, \
+    get_git_common_dir, get_scm_state
+
+
+class GitReaderUndecided(Exception):
+    """
+    Raised by the pure-python git reader when it can not compute the same result than `git` would, for example in
+    shallow clones. The next strategy (setuptools_scm) is then used.
+    """
+    def __init__(self, reason):
+        self.reason = reason
+
+    def __str__(self):
+        return "The pure-python git reader can not decide: %s" % self.reason
+
+
+# max number of commits walked before giving up (`git describe` is then used through setuptools_scm)
+MAX_WALKED_COMMITS = 10000
+
+# same as git's default for `git describe --candidates`
+MAX_CANDIDATES = 10
+
+# the `--match` pattern used by setuptools_scm in `git describe`, when it can not be read from setuptools_scm
+DEFAULT_DESCRIBE_MATCH = '*.*'
+
+# the other `git describe` options of setuptools_scm that the reader reproduces
+_SUPPORTED_DESCRIBE_FLAGS = frozenset(('--dirty', '--tags', '--long'))
+
+_OBJ_TYPES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+_OFS_DELTA, _REF_DELTA = 6, 7
+
+_S_IFMT = 0o170000
+_S_IFREG = 0o100000
+_S_IFLNK = 0o120000
+_S_IFGITLINK = 0o160000
+
+_SEEN = 1
+
+
+@lru_cache(maxsize=None)
+def get_describe_options():
+    # type: (...) -> Optional[Tuple[str, Optional[int]]]
+    """
+    Returns the `--match` pattern and the `--abbrev` length (None for git's default) of the `git describe` command
+    used by setuptools_scm, so that the same tags are considered and the same node is produced. None is returned if
+    the command contains options that the reader does not reproduce.
+
+    :return:
+    """
+    try:
+        from setuptools_scm.git import DEFAULT_DESCRIBE
+    except ImportError:
+        return DEFAULT_DESCRIBE_MATCH, None
+
+    args = DEFAULT_DESCRIBE.split() if isinstance(DEFAULT_DESCRIBE, str) else list(DEFAULT_DESCRIBE)
+    if args[0:2] != ['git', 'describe']:
+        return None
+
+    # without --match, all tags are considered
+    match, abbrev = '*', None
+    args = iter(args[2:])
+    for arg in args:
+        if arg == '--match':
+            match = next(args, None)
+            if match is None:
+                return None
+        elif arg.startswith('--match='):
+            match = arg[len('--match='):]
+        elif arg.startswith('--abbrev='):
+            try:
+                abbrev = int(arg[len('--abbrev='):])
+            except ValueError:
+                return None
+            if abbrev <= 0:
+                # no node in the output
+                return None
+        elif arg not in _SUPPORTED_DESCRIBE_FLAGS:
+            return None
+    return match, abbrev
+
+
+def _read_text(path  # type: str
+               ):
+    # type: (...) -> Optional[str]
+    """Returns the stripped content of a text file, or None if it does not exist"""
+    try:
+        with open(path, 'rt') as f:
+            return f.read().strip()
+    except (OSError, IOError):
+        return None
+
+
+def read_git_config(path  # type: str
+                    ):
+    # type: (...) -> Dict[str, str]
+    """
+    Minimal reader for git config files. Returns a dictionary {'<section>.<key>': value} with lowercase section and
+    key names. Subsections are kept in the section name (e.g. 'remote "origin".url'). Includes are not followed.
+
+    :param path:
+    :return:
+    """
+    res = dict()
+    section = ''
+    try:
+        with open(path, 'rt') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line[0] in '#;':
+                    continue
+                if line[0] == '[':
+                    section = line[1:line.index(']')].strip().lower()
+                    continue
+                key, _, value = line.partition('=')
+                res['%s.%s' % (section, key.strip().lower())] = value.strip() if _ else 'true'
+    except (OSError, IOError):
+        pass
+    return res
+
+
+class GitObjectStore(object):
+    """
+    Read-only access to the objects of a git repository: loose objects (zlib-compressed files) and packs (version 2
+    index files, including offset and reference deltas). Pack files are memory-mapped, `close()` should be called
+    when done.
+    """
+    __slots__ = '_objects_dirs', '_packs', '_cache'
+
+    def __init__(self,
+                 objects_dir  # type: str
+                 ):
+        self._objects_dirs = [objects_dir]
+        alternates = _read_text(join(objects_dir, 'info', 'alternates'))
+        if alternates:
+            for alt in alternates.splitlines():
+                alt = alt.strip()
+                if alt and not alt.startswith('#'):
+                    self._objects_dirs.append(normpath(join(objects_dir, alt)))
+
+        self._packs = []
+        for d in self._objects_dirs:
+            for idx_path in sorted(glob(join(d, 'pack', 'pack-*.idx'))):
+                self._packs.append(_Pack(idx_path))
+        self._cache = dict()
+
+    def close(self):
+        for p in self._packs:
+            p.close()
+        self._packs = []
+
+    def count_packed(self):
+        # type: (...) -> int
+        """Returns the number of packed objects, as used by git to compute the default abbreviation length"""
+        return sum(p.num_objects for p in self._packs)
+
+    def read(self,
+             sha  # type: bytes
+             ):
+        # type: (...) -> Tuple[str, bytes]
+        """
+        Returns a tuple (type, content) for the object with binary sha `sha`.
+
+        :param sha:
+        :return:
+        """
+        try:
+            return self._cache[sha]
+        except KeyError:
+            pass
+
+        hex_sha = hexlify(sha).decode('ascii')
+        res = None
+        for d in self._objects_dirs:
+            try:
+                with open(join(d, hex_sha[:2], hex_sha[2:]), 'rb') as f:
+                    raw = zlib.decompress(f.read())
+            except (OSError, IOError):
+                continue
+            header, _, content = raw.partition(b'\0')
+            res = header.split(b' ')[0].decode('ascii'), content
+            break
+
+        if res is None:
+            for p in self._packs:
+                offset = p.find(sha)
+                if offset is not None:
+                    res = p.read_at(offset, self)
+                    break
+            else:
+                raise GitReaderUndecided("object %s not found" % hex_sha)
+
+        self._cache[sha] = res
+        return res
+
+    def has_other_with_prefix(self,
+                              hex_prefix,  # type: str
+                              sha          # type: bytes
+                              ):
+        # type: (...) -> bool
+        """
+        Returns True if an object other than `sha` has a hex name starting with `hex_prefix`
+
+        :param hex_prefix:
+        :param sha:
+        :return:
+        """
+        hex_sha = hexlify(sha).decode('ascii')
+        for d in self._objects_dirs:
+            try:
+                names = os.listdir(join(d, hex_prefix[:2]))
+            except OSError:
+                continue
+            if any((hex_prefix[:2] + n).startswith(hex_prefix) and hex_prefix[:2] + n != hex_sha for n in names):
+                return True
+        return any(p.has_other_with_prefix(hex_prefix, sha) for p in self._packs)
+
+
+class _Pack(object):
+    """A memory-mapped pack file and its (version 2) index"""
+    __slots__ = '_idx_file', '_idx', '_pack_file', '_pack', 'num_objects', '_fanout'
+
+    def __init__(self, idx_path):
+        self._idx_file = open(idx_path, 'rb')
+        self._idx = mmap.mmap(self._idx_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._idx[:8] != b'\xfftOc\x00\x00\x00\x02':
+            self.close()
+            raise GitReaderUndecided("unsupported pack index format: %s" % idx_path)
+        self._fanout = unpack_from('>256I', self._idx, 8)
+        self.num_objects = self._fanout[255]
+        self._pack_file = open(idx_path[:-4] + '.pack', 'rb')
+        self._pack = mmap.mmap(self._pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for f in ('_pack', '_pack_file', '_idx', '_idx_file'):
+            obj = getattr(self, f, None)
+            if obj is not None:
+                obj.close()
+                setattr(self, f, None)
+
+    def _sha_at(self, i):
+        start = 1032 + 20 * i
+        return self._idx[start:start + 20]
+
+    def _bounds(self, first_byte):
+        return (self._fanout[first_byte - 1] if first_byte > 0 else 0), self._fanout[first_byte]
+
+    def find(self,
+             sha  # type: bytes
+             ):
+        # type: (...) -> Optional[int]
+        """Returns the offset of object `sha` in the pack file, or None"""
+        lo, hi = self._bounds(bytearray(sha[:1])[0])
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_sha = self._sha_at(mid)
+            if mid_sha < sha:
+                lo = mid + 1
+            elif mid_sha > sha:
+                hi = mid
+            else:
+                offset_pos = 1032 + 24 * self.num_objects + 4 * mid
+                offset, = unpack_from('>I', self._idx, offset_pos)
+                if offset & 0x80000000:
+                    large_pos = 1032 + 28 * self.num_objects + 8 * (offset & 0x7fffffff)
+                    offset, = unpack_from('>Q', self._idx, large_pos)
+                return offset
+        return None
+
+    def has_other_with_prefix(self, hex_prefix, sha):
+        byte_prefix = unhexlify(hex_prefix[:len(hex_prefix) - len(hex_prefix) % 2])
+        lo, hi = self._bounds(bytearray(sha[:1])[0])
+        shas = [self._sha_at(i) for i in range(lo, hi)]
+        i = bisect_left(shas, byte_prefix)
+        while i < len(shas) and shas[i].startswith(byte_prefix):
+            if shas[i] != sha and hexlify(shas[i]).decode('ascii').startswith(hex_prefix):
+                return True
+            i += 1
+        return False
+
+    def read_at(self,
+                offset,  # type: int
+                store    # type: GitObjectStore
+                ):
+        # type: (...) -> Tuple[str, bytes]
+        """Reads the object located at `offset` in the pack, resolving deltas"""
+        data = self._pack
+        start = offset
+        c = bytearray(data[offset:offset + 1])[0]
+        offset += 1
+        obj_type = (c >> 4) & 7
+        size = c & 15
+        shift = 4
+        while c & 0x80:
+            c = bytearray(data[offset:offset + 1])[0]
+            offset += 1
+            size |= (c & 0x7f) << shift
+            shift += 7
+
+        if obj_type == _OFS_DELTA:
+            c = bytearray(data[offset:offset + 1])[0]
+            offset += 1
+            base_offset = c & 0x7f
+            while c & 0x80:
+                c = bytearray(data[offset:offset + 1])[0]
+                offset += 1
+                base_offset = ((base_offset + 1) << 7) | (c & 0x7f)
+            base_type, base = self.read_at(start - base_offset, store)
+            return base_type, _apply_delta(base, self._inflate(offset, size))
+        elif obj_type == _REF_DELTA:
+            base_type, base = store.read(data[offset:offset + 20])
+            return base_type, _apply_delta(base, self._inflate(offset + 20, size))
+        else:
+            return _OBJ_TYPES[obj_type], self._inflate(offset, size)
+
+    def _inflate(self, offset, size):
+        """Decompresses the zlib stream starting at `offset`, whose uncompressed size is `size`"""
+        d = zlib.decompressobj()
+        chunk_size = max(size + 64, 4096)
+        out = []
+        out_size = 0
+        while out_size < size or size == 0:
+            chunk = self._pack[offset:offset + chunk_size]
+            if not chunk:
+                break
+            offset += len(chunk)
+            res = d.decompress(chunk)
+            out.append(res)
+            out_size += len(res)
+            if d.unused_data or size == 0:
+                break
+        return b''.join(out)
+
+
+def _apply_delta(base,  # type: bytes
+                 delta  # type: bytes
+                 ):
+    # type: (...) -> bytes
+    """Applies a git delta to `base`"""
+    delta = bytearray(delta)
+    i = 0
+    for _ in range(2):
+        # source size and target size, not needed
+        while delta[i] & 0x80:
+            i += 1
+        i += 1
+
+    out = bytearray()
+    n = len(delta)
+    while i < n:
+        op = delta[i]
+        i += 1
+        if op & 0x80:
+            copy_offset = copy_size = 0
+            for bit, shift in ((0x01, 0), (0x02, 8), (0x04, 16), (0x08, 24)):
+                if op & bit:
+                    copy_offset |= delta[i] << shift
+                    i += 1
+            for bit, shift in ((0x10, 0), (0x20, 8), (0x40, 16)):
+                if op & bit:
+                    copy_size |= delta[i] << shift
+                    i += 1
+            out += base[copy_offset:copy_offset + (copy_size or 0x10000)]
+        elif op:
+            out += delta[i:i + op]
+            i += op
+        else:
+            raise GitReaderUndecided("invalid delta instruction")
+    return bytes(out)
+
+
+def _parse_headers(content  # type: bytes
+                   ):
+    # type: (...) -> List[Tuple[bytes, bytes]]
+    """Returns the list of (key, value) header lines of a commit or tag object"""
+    res = []
+    for line in content.split(b'\n'):
+        if not line:
+            break
+        if line[:1] != b' ':  # continuation lines (e.g. signatures) are skipped
+            key, _, value = line.partition(b' ')
+            res.append((key, value))
+    return res
+
+
+def _get_signature_time(value  # type: bytes
+                        ):
+    # type: (...) -> int
+    """Returns the timestamp of a 'Name <email> timestamp tz' signature"""
+    return int(value[value.rindex(b'>') + 1:].split()[0])
+
+
+class GitRepository(object):
+    """
+    Minimal read-only view of a git repository, sufficient to emulate `git describe --tags --long --match <pattern>`
+    and `git status --porcelain --untracked-files=no` (is the working tree dirty ?) without spawning `git`.
+
+    A `GitReaderUndecided` error is raised whenever the result might differ from git's: shallow clones, grafts and
+    replace refs, split or sparse indexes, submodules, content filters...
+    """
+    __slots__ = 'root_dir', 'git_dir', 'common_dir', 'config', 'objects', '_refs', '_commits'
+
+    def __init__(self,
+                 root_dir,  # type: str
+                 git_dir    # type: str
+                 ):
+        self.root_dir = root_dir
+        self.git_dir = git_dir
+        self.common_dir = get_git_common_dir(git_dir)
+
+        for env_var in ('GIT_DIR', 'GIT_WORK_TREE', 'GIT_INDEX_FILE', 'GIT_OBJECT_DIRECTORY', 'GIT_COMMON_DIR'):
+            if env_var in os.environ:
+                raise GitReaderUndecided("environment variable %s is set" % env_var)
+        for f in ('shallow', join('info', 'grafts'), 'reftable', join('refs', 'replace')):
+            if exists(join(self.common_dir, f)):
+                raise GitReaderUndecided("unsupported repository feature: %s" % f)
+
+        self.config = read_git_config(join(self.common_dir, 'config'))
+        if self.git_dir != self.common_dir:
+            self.config.update(read_git_config(join(self.git_dir, 'config.worktree')))
+        if 'extensions.objectformat' in self.config or 'extensions.refstorage' in self.config:
+            raise GitReaderUndecided("unsupported repository extension")
+
+        self.objects = GitObjectStore(join(self.common_dir, 'objects'))
+        self._refs = None
+        self._commits = dict()
+
+    def close(self):
+        self.objects.close()
+
+    # ------ refs
+
+    def _read_packed_refs(self):
+        # type: (...) -> Dict[str, Tuple[bytes, Optional[bytes]]]
+        """Returns {refname: (sha, peeled sha or None)} from the packed-refs file"""
+        res = dict()
+        try:
+            with open(join(self.common_dir, 'packed-refs'), 'rb') as f:
+                last = None
+                for line in f:
+                    line = line.rstrip(b'\n\r')
+                    if not line or line.startswith(b'#'):
+                        continue
+                    if line.startswith(b'^'):
+                        res[last] = res[last][0], unhexlify(line[1:41])
+                    else:
+                        sha, _, name = line.partition(b' ')
+                        last = name.decode('utf-8')
+                        res[last] = unhexlify(sha), None
+        except (OSError, IOError):
+            pass
+        return res
+
+    def get_refs(self):
+        # type: (...) -> Dict[str, Tuple[bytes, Optional[bytes]]]
+        """Returns all refs of the repository, {refname: (sha, peeled sha or None)}. Loose refs override packed ones"""
+        if self._refs is None:
+            refs = self._read_packed_refs()
+            refs_dir = join(self.common_dir, 'refs')
+            for dir_path, _, file_names in os.walk(refs_dir):
+                for file_name in file_names:
+                    content = _read_text(join(dir_path, file_name))
+                    if content and not content.startswith('ref:'):
+                        rel = os.path.relpath(join(dir_path, file_name), self.common_dir).replace(os.sep, '/')
+                        refs[rel] = unhexlify(content[:40]), None
+            self._refs = refs
+        return self._refs
+
+    def resolve_ref(self,
+                    refname  # type: str
+                    ):
+        # type: (...) -> Optional[bytes]
+        """Returns the sha pointed to by `refname`, following symbolic refs. None if it does not exist (unborn)"""
+        for _ in range(10):
+            base_dir = self.git_dir if refname == 'HEAD' else self.common_dir
+            content = _read_text(join(base_dir, *refname.split('/')))
+            if content is None:
+                try:
+                    return self.get_refs()[refname][0]
+                except KeyError:
+                    return None
+            elif content.startswith('ref:'):
+                refname = content[4:].strip()
+            else:
+                return unhexlify(content[:40])
+        raise GitReaderUndecided("too many levels of symbolic refs")
+
+    def get_head_branch(self):
+        # type: (...) -> str
+        """Returns the current branch name, or 'HEAD' if detached (as `git rev-parse --abbrev-ref HEAD`)"""
+        content = _read_text(join(self.git_dir, 'HEAD')) or ''
+        if content.startswith('ref:'):
+            ref = content[4:].strip()
+            return ref[11:] if ref.startswith('refs/heads/') else ref
+        return 'HEAD'
+
+    # ------ objects
+
+    def peel(self,
+             sha  # type: bytes
+             ):
+        # type: (...) -> Tuple[Optional[bytes], Optional[int]]
+        """
+        Peels annotated tags until a non-tag object is reached. Returns a tuple (sha of the commit or None if the
+        target is not a commit, tagger time of the outermost tag or None if sha is not a tag)
+        """
+        tagger_time = None
+        for _ in range(10):
+            obj_type, content = self.objects.read(sha)
+            if obj_type == 'commit':
+                return sha, tagger_time
+            elif obj_type != 'tag':
+                return None, tagger_time
+            headers = dict(_parse_headers(content))
+            if tagger_time is None:
+                tagger_time = _get_signature_time(headers[b'tagger']) if b'tagger' in headers else 0
+            sha = unhexlify(headers[b'object'])
+        raise GitReaderUndecided("too many levels of tags")
+
+    def get_commit(self,
+                   sha  # type: bytes
+                   ):
+        # type: (...) -> Tuple[bytes, List[bytes], int]
+        """Returns a tuple (tree sha, parents shas, committer time) for commit `sha`"""
+        try:
+            return self._commits[sha]
+        except KeyError:
+            pass
+        obj_type, content = self.objects.read(sha)
+        if obj_type != 'commit':
+            raise GitReaderUndecided("%s is not a commit" % hexlify(sha).decode('ascii'))
+        tree, parents, date = None, [], 0
+        for key, value in _parse_headers(content):
+            if key == b'tree':
+                tree = unhexlify(value)
+            elif key == b'parent':
+                parents.append(unhexlify(value))
+            elif key == b'committer':
+                date = _get_signature_time(value)
+        res = self._commits[sha] = tree, parents, date
+        return res
+
+    def iter_tree(self,
+                  sha,      # type: bytes
+                  prefix=''  # type: str
+                  ):
+        """Yields (path, mode, sha) for all non-tree entries of tree `sha`, recursively"""
+        obj_type, content = self.objects.read(sha)
+        i, n = 0, len(content)
+        while i < n:
+            space = content.index(b' ', i)
+            nul = content.index(b'\0', space)
+            mode = int(content[i:space], 8)
+            name = content[space + 1:nul].decode('utf-8', 'surrogateescape')
+            entry_sha = content[nul + 1:nul + 21]
+            i = nul + 21
+            if mode == 0o40000:
+                for item in self.iter_tree(entry_sha, prefix + name + '/'):
+                    yield item
+            else:
+                yield prefix + name, mode, entry_sha
+
+    def abbreviate(self,
+                   sha,             # type: bytes
+                   min_length=None  # type: int
+                   ):
+        # type: (...) -> str
+        """
+        Returns the shortest unique abbreviation of `sha` with at least `min_length` characters (as `--abbrev` in git),
+        or git's default minimum length if `min_length` is None.
+        """
+        if min_length is not None:
+            # see describe.c in git: the length is clipped to [4, 40]
+            length = min(max(min_length, 4), 40)
+        elif 'core.abbrev' in self.config:
+            raise GitReaderUndecided("core.abbrev is configured")
+        else:
+            # see git's repo_find_unique_abbrev_r: ceil(bits / 2) where bits is the number of bits of the object count
+            length = max(7, (self.objects.count_packed().bit_length() + 1) // 2)
+        hex_sha = hexlify(sha).decode('ascii')
+        while length < 40 and self.objects.has_other_with_prefix(hex_sha[:length], sha):
+            length += 1
+        return hex_sha[:length]
+
+    # ------ describe
+
+    def get_tag_names(self,
+                      match_pattern  # type: str
+                      ):
+        # type: (...) -> Dict[bytes, Tuple[str, int, int]]
+        """
+        Returns {commit sha: (tag name, priority, tagger time)} for all tags matching `match_pattern`, with the same
+        rules than `git describe` when several tags point to the same commit: annotated tags (priority 2) are preferred
+        over lightweight tags (priority 1), and the most recent one is preferred among annotated tags.
+        """
+        res = dict()
+        for refname, (sha, peeled) in sorted(self.get_refs().items()):
+            if not refname.startswith('refs/tags/') or not fnmatchcase(refname[10:], match_pattern):
+                continue
+            if peeled is not None:
+                commit = peeled
+                tagger_time = self.peel(sha)[1]
+            else:
+                commit, tagger_time = self.peel(sha)
+            if commit is None:
+                continue
+            prio = 1 if tagger_time is None else 2
+            tagger_time = tagger_time or 0
+            current = res.get(commit)
+            if current is None or current[1] < prio or (prio == 2 and current[1] == 2 and current[2] < tagger_time):
+                res[commit] = refname[10:], prio, tagger_time
+        return res
+
+    def describe(self,
+                 head,          # type: bytes
+                 match_pattern  # type: str
+                 ):
+        # type: (...) -> Optional[Tuple[str, int]]
+        """
+        Emulates `git describe --tags --long --match <match_pattern>`: the commits are walked from `head` in committer
+        date order, the first `MAX_CANDIDATES` tags found are candidates and the one with the least number of commits
+        not reachable from it wins. See `describe.c` in git.
+
+        :return: a tuple (tag name, distance), or None if no tag could be found
+        """
+        names = self.get_tag_names(match_pattern)
+        if not names:
+            return None
+
+        flags = {head: _SEEN}
+        queue = [(0, 0, head)]  # (-date, insertion order, sha): same order than git's commit_list_insert_by_date
+        counter = 1
+        matches = []  # list of [name, depth, flag_within, found_order]
+        gave_up_on = None
+        seen_commits = 0
+        while queue:
+            _, _, c = heappop(queue)
+            seen_commits += 1
+            if seen_commits > MAX_WALKED_COMMITS:
+                raise GitReaderUndecided("more than %s commits to walk" % MAX_WALKED_COMMITS)
+            name = names.get(c)
+            if name is not None:
+                if len(matches) < MAX_CANDIDATES:
+                    flag_within = 1 << (len(matches) + 1)
+                    matches.append([name[0], seen_commits - 1, flag_within, len(matches) + 1])
+                    flags[c] |= flag_within
+                else:
+                    gave_up_on = c
+                    break
+            c_flags = flags[c]
+            for m in matches:
+                if not c_flags & m[2]:
+                    m[1] += 1
+            for p in self.get_commit(c)[1]:
+                p_flags = flags.get(p, 0)
+                if not p_flags & _SEEN:
+                    heappush(queue, (-self.get_commit(p)[2], counter, p))
+                    counter += 1
+                flags[p] = p_flags | c_flags
+
+        if not matches:
+            return None
+
+        matches.sort(key=lambda m: (m[1], m[3]))
+        best = matches[0]
+        if gave_up_on is not None:
+            heappush(queue, (-self.get_commit(gave_up_on)[2], counter, gave_up_on))
+            counter += 1
+
+        # finish_depth_computation
+        while queue:
+            _, _, c = heappop(queue)
+            seen_commits += 1
+            if seen_commits > MAX_WALKED_COMMITS:
+                raise GitReaderUndecided("more than %s commits to walk" % MAX_WALKED_COMMITS)
+            c_flags = flags[c]
+            if c_flags & best[2]:
+                if all(flags[item[2]] & best[2] for item in queue):
+                    break
+            else:
+                best[1] += 1
+            for p in self.get_commit(c)[1]:
+                p_flags = flags.get(p, 0)
+                if not p_flags & _SEEN:
+                    heappush(queue, (-self.get_commit(p)[2], counter, p))
+                    counter += 1
+                flags[p] = p_flags | c_flags
+
+        return best[0], best[1]
+
+    def count_commits(self,
+                      head  # type: bytes
+                      ):
+        # type: (...) -> int
+        """Returns the number of commits reachable from `head` (as `git rev-list HEAD | wc -l`)"""
+        seen = {head}
+        todo = [head]
+        while todo:
+            for p in self.get_commit(todo.pop())[1]:
+                if p not in seen:
+                    seen.add(p)
+                    todo.append(p)
+            if len(seen) > MAX_WALKED_COMMITS:
+                raise GitReaderUndecided("more than %s commits to walk" % MAX_WALKED_COMMITS)
+        return len(seen)
+
+    # ------ dirty
+
+    def _may_convert_content(self, index_entries):
+        # type: (...) -> bool
+        """Returns True if the working tree content may differ from the blobs because of attributes/eol settings"""
+        if self.config.get('core.autocrlf', 'false').lower() not in ('false', 'no', 'off', '0') \
+                or 'core.attributesfile' in self.config or exists(join(self.common_dir, 'info', 'attributes')):
+            return True
+        xdg_config = os.environ.get('XDG_CONFIG_HOME') or join(expanduser('~'), '.config')
+        if exists(join(xdg_config, 'git', 'attributes')):
+            return True
+        return any(basename(p) == '.gitattributes' for p in index_entries)
+
+    def read_index(self):
+        # type: (...) -> Tuple[Dict[str, Tuple], Optional[bytes], float]
+        """
+        Parses the index (version 2 or 3).
+
+        :return: a tuple (entries, cache_tree_root, index_mtime) where entries is a dict
+            {path: (ctime_s, ctime_ns, mtime_s, mtime_ns, ino, mode, size, sha)}, cache_tree_root is the sha of the
+            root tree in the cache-tree extension if it is valid, and index_mtime the modification time of the index
+        """
+        index_path = join(self.git_dir, 'index')
+        try:
+            with open(index_path, 'rb') as f:
+                index_mtime = os.fstat(f.fileno()).st_mtime
+                data = f.read()
+        except (OSError, IOError):
+            raise GitReaderUndecided("no index file")
+
+        signature, version, count = unpack_from('>4sII', data, 0)
+        if signature != b'DIRC' or version not in (2, 3):
+            raise GitReaderUndecided("unsupported index version %s" % version)
+
+        entries = dict()
+        pos = 12
+        for _ in range(count):
+            ctime_s, ctime_ns, mtime_s, mtime_ns, _dev, ino, mode, _uid, _gid, size, sha, flags \
+                = unpack_from('>10I20sH', data, pos)
+            name_pos = pos + 62
+            if flags & 0x4000:
+                ext_flags, = unpack_from('>H', data, name_pos)
+                if ext_flags & 0x6000:
+                    raise GitReaderUndecided("skip-worktree or intent-to-add entries")
+                name_pos += 2
+            name_end = data.index(b'\0', name_pos)
+            path = data[name_pos:name_end].decode('utf-8', 'surrogateescape')
+            pos += ((name_end - pos) // 8 + 1) * 8
+            if (flags >> 12) & 3:
+                # unmerged entry: git status reports it
+                entries[path] = None
+            else:
+                entries[path] = ctime_s, ctime_ns, mtime_s, mtime_ns, ino, mode, size, sha
+
+        cache_tree_root = None
+        end = len(data) - 20
+        while pos + 8 <= end:
+            ext_sig, ext_size = unpack_from('>4sI', data, pos)
+            ext_data = data[pos + 8:pos + 8 + ext_size]
+            if ext_sig in (b'link', b'sdir'):
+                raise GitReaderUndecided("split or sparse index")
+            elif ext_sig == b'TREE' and ext_data[:1] == b'\0':
+                header_end = ext_data.index(b'\n')
+                entry_count = int(ext_data[1:header_end].split(b' ')[0])
+                if entry_count >= 0:
+                    cache_tree_root = ext_data[header_end + 1:header_end + 21]
+            pos += 8 + ext_size
+
+        return entries, cache_tree_root, index_mtime
+
+    def is_dirty(self,
+                 head  # type: bytes
+                 ):
+        # type: (...) -> bool
+        """
+        Returns True if `git status --porcelain --untracked-files=no` would report something: staged changes (index
+        differs from the HEAD tree) or modified/deleted tracked files (working tree differs from the index). Files are
+        first compared using the stat information stored in the index, and hashed only when it does not match, as git
+        does.
+        """
+        entries, cache_tree_root, index_mtime = self.read_index()
+        if any(e is None for e in entries.values()):
+            return True
+        if any(e[5] & _S_IFMT == _S_IFGITLINK for e in entries.values()):
+            raise GitReaderUndecided("submodules")
+
+        # index vs HEAD
+        head_tree = self.get_commit(head)[0]
+        if cache_tree_root != head_tree:
+            tree_entries = dict((p, (mode, sha)) for p, mode, sha in self.iter_tree(head_tree))
+            if len(tree_entries) != len(entries):
+                return True
+            for path, e in entries.items():
+                if tree_entries.get(path) != (e[5], e[7]):
+                    return True
+
+        # working tree vs index
+        check_exec = self.config.get('core.filemode', 'true').lower() not in ('false', 'no', 'off', '0')
+        may_convert = None
+        for path, (ctime_s, ctime_ns, mtime_s, mtime_ns, ino, mode, size, sha) in entries.items():
+            full_path = join(self.root_dir, *path.split('/'))
+            try:
+                st = os.lstat(full_path)
+            except OSError:
+                return True
+
+            st_type = st.st_mode & _S_IFMT
+            if st_type != mode & _S_IFMT:
+                return True
+            if check_exec and st_type == _S_IFREG and (st.st_mode & 0o100) != (mode & 0o100):
+                return True
+
+            st_mtime_ns = getattr(st, 'st_mtime_ns', None)
+            st_ctime_ns = getattr(st, 'st_ctime_ns', None)
+            if st_mtime_ns is not None and st_ctime_ns is not None \
+                    and (st_mtime_ns // 1000000000, st_mtime_ns % 1000000000) == (mtime_s, mtime_ns) \
+                    and (st_ctime_ns // 1000000000, st_ctime_ns % 1000000000) == (ctime_s, ctime_ns) \
+                    and (st.st_size & 0xffffffff) == size and (st.st_ino & 0xffffffff) == ino \
+                    and st.st_mtime < index_mtime:
+                # stat information matches and the entry is not "racily clean": trust it, as git does
+                continue
+
+            if st_type == _S_IFLNK:
+                content = os.readlink(full_path)
+                content = content.encode('utf-8', 'surrogateescape') if not isinstance(content, bytes) else content
+            else:
+                with open(full_path, 'rb') as f:
+                    content = f.read()
+            if sha1(b'blob %d\0' % len(content) + content).digest() != sha:
+                if may_convert is None:
+                    may_convert = self._may_convert_content(entries)
+                if may_convert:
+                    raise GitReaderUndecided("content filters or end of line conversions may apply")
+                return True
+
+        return False
+
+
+def read_git_version(root_dir,  # type: str
+                     git_dir    # type: str
+                     ):
+    # type: (...) -> str
+    """
+    Computes the version of the git repository at `root_dir` exactly as setuptools_scm with `fixed_version_scheme`
+    would, without spawning `git`. `GitReaderUndecided` is raised when this is not possible.
+
+    :param root_dir: the working tree root
+    :param git_dir: the git directory (`.git` or the target of a `.git` file)
+    :return:
+    """
+    if any(k.startswith('SETUPTOOLS_SCM_PRETEND_VERSION') for k in os.environ):
+        raise GitReaderUndecided("a setuptools_scm pretend version is set")
+
+    try:
+        from setuptools_scm.version import meta, get_local_node_and_date
+        from getversion.plugin_setuptools_scm import fixed_version_scheme
+    except ImportError:
+        raise SetupToolsScmNotInstalled()
+
+    describe_options = get_describe_options()
+    if describe_options is None:
+        raise GitReaderUndecided("unsupported setuptools_scm `git describe` command")
+    match_pattern, abbrev = describe_options
+
+    repo = GitRepository(root_dir, git_dir)
+    try:
+        head = repo.resolve_ref('HEAD')
+        if head is None:
+            raise GitReaderUndecided("no commit in repository")
+        described = repo.describe(head, match_pattern)
+        dirty = repo.is_dirty(head)
+        branch = repo.get_head_branch()
+        if described is None:
+            # same as setuptools_scm when `git describe` fails: `git rev-parse HEAD`, truncated to 7 characters by the
+            # versions using git's default abbreviation. The versions using `--abbrev` keep the full node and shorten
+            # it themselves when formatting the version, as for the nodes returned by `git describe`
+            node = hexlify(head).decode('ascii')
+            tag, distance, node = '0.0', repo.count_commits(head), node[:7] if abbrev is None else node
+        else:
+            (tag, distance), node = described, repo.abbreviate(head, abbrev)
+    finally:
+        repo.close()
+
+    try:
+        from setuptools_scm.config import Configuration
+        config = Configuration(root=root_dir)
+    except ImportError:
+        from setuptools_scm import Configuration
+        config = Configuration(root=root_dir)
+
+    kwargs = dict(node='g' + node, dirty=dirty, branch=branch, config=config)
+    if described is None or distance:
+        kwargs['distance'] = distance
+    version = meta(tag, **kwargs)
+    return fixed_version_scheme(version) + get_local_node_and_date(version)
+
+
+# cache of {repository root: (repository state, version)}, see get_scm_state
+_GIT_VERSIONS_BY_ROOT = dict()
+register_index(_GIT_VERSIONS_BY_ROOT.clear)
+
+# concurrent reads of the same repository are coalesced
+_GIT_READS = SingleFlight()
+
+
+def get_version_using_git_reader(module  # type: ModuleType
+                                 ):
+    # type: (...) -> str
+    """
+    get version from the git repository containing the module, reading the repository files directly instead of
+    spawning `git`. When this is not possible (shallow clone, submodules...) a `GitReaderUndecided` error is raised so
+    that the next strategy (setuptools_scm) is used.
+
+    :param module:
+    :return:
+    """
+    path = abspath(module.__file__)
+    scm_root = find_scm_root(dirname(path))
+    if scm_root is None:
+        raise ScmInformationNotFound(path)
+
+    root_dir, scm_dir, kind = scm_root
+    if kind != 'git' or not isdir(scm_dir):
+        raise GitReaderUndecided("not a git repository: %s" % root_dir)
+
+    state = get_scm_state(scm_dir, kind)
+    try:
+        cached_state, res = _GIT_VERSIONS_BY_ROOT[root_dir]
+        if cached_state == state:
+            return res
+    except KeyError:
+        pass
+
+    try:
+        res = _GIT_READS.run((root_dir, state), read_git_version, root_dir, scm_dir)
+    except (GitReaderUndecided, SetupToolsScmNotInstalled):
+        raise
+    except Exception as e:
+        # corrupted or unexpected repository content: let git decide
+        raise GitReaderUndecided("%s: %s" % (type(e).__name__, e))
+
+    _GIT_VERSIONS_BY_ROOT[root_dir] = state, res
+    return res
@@ -2,7 +2,21 @@
 #
 #  License: BSD 3 clause
 
-from os.path import dirname, abspath
+from os import stat, walk
+from os.path import dirname, abspath, join, isdir, isfile
+
+try:
+    from functools import lru_cache
+except ImportError:
+    from functools32 import lru_cache
+
+try:  # python 3.5+
+    from typing import Callable, Optional, Tuple
+    from types import ModuleType
+except ImportError:
+    pass
+
+from getversion.cache import register_index, SingleFlight
 
 
 class GitCommandNotAvailable(Exception):
@@ -25,94 +39,300 @@ class SetupToolsScmNotInstalled(Exception):
                " to enable SCM version discovery (git, hg)."
 
 
-try:
-    from setuptools_scm import get_version
-    from setuptools_scm.version import guess_next_dev_version
-    from setuptools_scm.utils import has_command
-    has_git_command = has_command('git')
+def read_gitdir_file(git_file  # type: str
+                     ):
+    # type: (...) -> str
+    """
+    Reads a `.git` *file*, as found in git worktrees and submodules, and returns the absolute path of the actual git
+    directory it points to (`gitdir: <path>`, where path may be relative to the folder containing the file).
 
+    :param git_file:
+    :return:
+    """
+    with open(git_file, 'rt') as f:
+        content = f.read().strip()
+    if not content.startswith('gitdir:'):
+        raise ValueError("Invalid .git file: %s" % git_file)
+    return abspath(join(dirname(git_file), content[7:].strip()))
 
-    def fixed_version_scheme(version):
-        """
-        A fix for https://github.com/smarie/python-getversion/issues/10
-        until this is fixed in setuptools_scm or in pkg_resources
-        so that the dash is not removed when a pre-release version is present (e.g. 1.0.0-rc1)
-        """
-        # This is the bugged string would be used by the default scheme (for reference)
-        # str(version.tag)
 
-        # modify the 'pre' part only if needed
-        do_hack = version.tag.is_prerelease
-        if do_hack:
-            # make a backup
-            _version_bak = version.tag._version
+_SCM_ROOTS_BY_DIR = dict()
+register_index(_SCM_ROOTS_BY_DIR.clear)
+
 
-            # get the various parts
-            parts = _version_bak._asdict()
+def find_scm_root(path  # type: str
+                  ):
+    # type: (...) -> Optional[Tuple[str, str, str]]
+    """
+    Climbs the parent folders of `path` (included) until a repository root is found, only by checking for the
+    existence of `.git` (folder or file) or `.hg` folders. No subprocess is spawned.
 
-            # make sure we understand what we do by doing a simple copy
-            clone = type(_version_bak)(**parts)
-            assert clone == _version_bak, "Internal error with this version of `pkg_resources`, please report"
+    Results are remembered for all visited folders, so that the next modules located in the same tree only cost a
+    dict lookup.
+
+    :param path: an absolute folder path
+    :return: a tuple (root_dir, scm_dir, kind) where kind is 'git' or 'hg', and scm_dir is the actual git/hg
+        directory (for git worktrees and submodules the `.git` file indirection is followed). None if no repository
+        root is found.
+    """
+    visited = []
+    while True:
+        try:
+            res = _SCM_ROOTS_BY_DIR[path]
+            break
+        except KeyError:
+            pass
 
-            # now do a mod
-            parts['pre'] = ("-",) + parts['pre']
-            _version_mod = type(_version_bak)(**parts)
+        visited.append(path)
+        git = join(path, '.git')
+        if isdir(git):
+            res = path, git, 'git'
+            break
+        elif isfile(git):
+            res = path, read_gitdir_file(git), 'git'
+            break
+
+        hg = join(path, '.hg')
+        if isdir(hg):
+            res = path, hg, 'hg'
+            break
+
+        parent_dir = dirname(path)
+        if parent_dir == path:
+            # cannot climb anymore
+            res = None
+            break
+        else:
+            # climb
+            path = parent_dir
 
-            # and apply it
-            version.tag._version = _version_mod
+    for visited_path in visited:
+        _SCM_ROOTS_BY_DIR[visited_path] = res
 
-            # we can check that the string has been fixed correctly
-            # str(version.tag)
+    return res
 
-        # create the version string as usual by applying setuptools_scm's default version scheme
-        # note that despite the name, this does not increment anything if the tag is exact (no local mod)
-        res = guess_next_dev_version(version)
 
-        # undo our hack if needed
-        if do_hack:
-            version.tag._version = _version_bak  # noqa
+def get_git_common_dir(git_dir  # type: str
+                       ):
+    # type: (...) -> str
+    """
+    Returns the git "common dir" of `git_dir`, where refs and packed-refs are stored. It is `git_dir` itself except
+    for worktrees, where it is indicated in the `commondir` file.
+    """
+    try:
+        with open(join(git_dir, 'commondir'), 'rt') as f:
+            return abspath(join(git_dir, f.read().strip()))
+    except (OSError, IOError):
+        return git_dir
 
-        return res
 
+def get_scm_state_files(scm_dir,  # type: str
+                        kind      # type: str
+                        ):
+    # type: (...) -> Tuple[str, ...]
+    """
+    Returns the paths of the files that change when the state of a repository changes (new commit, checkout, tag,
+    staged modifications...), so that their modification times can be used to check that a version computed earlier
+    is still valid:
 
-    def scm_get_version_recursive_root(abs_path, initial_path):
-        """
-        Recursively climbs the parent folders, searching for a git root
+     - for git: `HEAD`, the file of the current ref (e.g. `refs/heads/master`), `packed-refs`, `index`, and the
+       `refs/tags` folder and its sub-folders (their modification time changes when a tag is created or deleted)
+     - for hg: `dirstate`, `store/00changelog.i` and `localtags`
 
-        :param abs_path:
-        :return:
-        """
+    :param scm_dir: the `.git` or `.hg` folder
+    :param kind: 'git' or 'hg'
+    :return:
+    """
+    if kind == 'git':
+        head = join(scm_dir, 'HEAD')
+        common_dir = get_git_common_dir(scm_dir)
+        files = [head, join(common_dir, 'packed-refs'), join(scm_dir, 'index')]
         try:
-            res = get_version(abs_path, version_scheme=fixed_version_scheme)
-        except LookupError as e:
-            parent_dir = dirname(abs_path)
-            if parent_dir == abs_path:
-                # cannot recurse anymore
-                raise ScmInformationNotFound(initial_path)
-            else:
-                # recurse
-                return scm_get_version_recursive_root(parent_dir, initial_path=initial_path)
+            with open(head, 'rt') as f:
+                head_content = f.read().strip()
+        except (OSError, IOError):
+            pass
         else:
-            return res
+            if head_content.startswith('ref:'):
+                files.append(join(common_dir, *head_content[4:].strip().split('/')))
+        files.append(join(common_dir, 'refs', 'tags'))
+        for parent, dir_names, _ in walk(join(common_dir, 'refs', 'tags')):
+            files += [join(parent, d) for d in dir_names]
+        return tuple(files)
+    else:
+        return join(scm_dir, 'dirstate'), join(scm_dir, 'store', '00changelog.i'), join(scm_dir, 'localtags')
+
 
-    def get_version_using_setuptools_scm(module  # type: ModuleType
-                                         ):
-        # type: (...) -> str
-        """
-        get version from the source directory if it is under version control
-        :param module:
-        :return:
-        """
-        # ...using setuptools_scm if available
-        if not has_git_command:
-            raise GitCommandNotAvailable()
+def get_scm_state(scm_dir,  # type: str
+                  kind      # type: str
+                  ):
+    # type: (...) -> Tuple[Tuple[str, Optional[float], Optional[int]], ...]
+    """
+    Returns the state of the repository as a tuple of (path, mtime, size) for all files returned by
+    `get_scm_state_files`. mtime and size are None for files that do not exist.
+
+    :param scm_dir:
+    :param kind:
+    :return:
+    """
+    res = []
+    for p in get_scm_state_files(scm_dir, kind):
+        try:
+            st = stat(p)
+        except OSError:
+            res.append((p, None, None))
         else:
-            path = abspath(module.__file__)
-            return scm_get_version_recursive_root(path, initial_path=path)
+            res.append((p, st.st_mtime, st.st_size))
+    return tuple(res)
 
-except ImportError:
-    # no
-    def get_version_using_setuptools_scm(module  # type: ModuleType
-                                         ):
-        # type: (...) -> str
+
+def fixed_version_scheme(version):
+    """
+    A fix for https://github.com/smarie/python-getversion/issues/10
+    until this is fixed in setuptools_scm or in pkg_resources
+    so that the dash is not removed when a pre-release version is present (e.g. 1.0.0-rc1)
+    """
+    from setuptools_scm.version import guess_next_dev_version
+
+    # This is the bugged string would be used by the default scheme (for reference)
+    # str(version.tag)
+
+    # modify the 'pre' part only if needed
+    do_hack = version.tag.is_prerelease
+    if do_hack:
+        # make a backup
+        _version_bak = version.tag._version
+
+        # get the various parts
+        parts = _version_bak._asdict()
+
+        # make sure we understand what we do by doing a simple copy
+        clone = type(_version_bak)(**parts)
+        assert clone == _version_bak, "Internal error with this version of `pkg_resources`, please report"
+
+        # now do a mod
+        parts['pre'] = ("-",) + parts['pre']
+        _version_mod = type(_version_bak)(**parts)
+
+        # and apply it
+        version.tag._version = _version_mod
+
+        # we can check that the string has been fixed correctly
+        # str(version.tag)
+
+    # create the version string as usual by applying setuptools_scm's default version scheme
+    # note that despite the name, this does not increment anything if the tag is exact (no local mod)
+    res = guess_next_dev_version(version)
+
+    # undo our hack if needed
+    if do_hack:
+        version.tag._version = _version_bak  # noqa
+
+    return res
+
+
+@lru_cache(maxsize=None)
+def _import_setuptools_scm_get_version():
+    """Imports `setuptools_scm.get_version`, or returns None if setuptools_scm is not installed"""
+    try:
+        from setuptools_scm import get_version
+    except ImportError:
+        return None
+    else:
+        return get_version
+
+
+register_index(_import_setuptools_scm_get_version.cache_clear)
+
+
+def get_setuptools_scm_get_version():
+    # type: (...) -> Callable[..., str]
+    """
+    Returns `setuptools_scm.get_version`. setuptools_scm is only imported the first time this function is called,
+    so that importing `getversion` stays cheap when the SCM strategy is never needed.
+
+    :return:
+    """
+    get_version = _import_setuptools_scm_get_version()
+    if get_version is None:
         raise SetupToolsScmNotInstalled()
+    return get_version
+
+
+@lru_cache(maxsize=None)
+def has_git_command():
+    # type: (...) -> bool
+    """
+    Returns True if the `git` command is available. It is probed the first time this function is called only (and
+    without spawning a subprocess on python 3), not when `getversion` is imported.
+
+    :return:
+    """
+    try:  # python 3.3+
+        from shutil import which
+    except ImportError:
+        from setuptools_scm.utils import has_command
+        return has_command('git')
+    else:
+        return which('git') is not None
+
+
+register_index(has_git_command.cache_clear)
+
+
+# cache of {repository root: (repository state, version found by setuptools_scm)}
+# so that several modules located in the same repository do not call setuptools_scm again, until the repository
+# state changes (see get_scm_state)
+_SCM_VERSIONS_BY_ROOT = dict()
+register_index(_SCM_VERSIONS_BY_ROOT.clear)
+
+# concurrent setuptools_scm calls for the same repository are coalesced
+_SCM_CALLS = SingleFlight()
+
+
+def scm_get_version_recursive_root(abs_path, initial_path):
+    """
+    Finds the repository root in the parent folders of `abs_path` (see `find_scm_root`) and gets the version using
+    setuptools_scm on that root. setuptools_scm is called at most once per repository root, as long as the
+    repository state (see `get_scm_state`) does not change.
+
+    :param abs_path:
+    :return:
+    """
+    scm_root = find_scm_root(abs_path)
+    if scm_root is None:
+        raise ScmInformationNotFound(initial_path)
+
+    root_dir, scm_dir, kind = scm_root
+    state = get_scm_state(scm_dir, kind)
+    try:
+        cached_state, res = _SCM_VERSIONS_BY_ROOT[root_dir]
+        if cached_state == state:
+            return res
+    except KeyError:
+        pass
+
+    get_version = get_setuptools_scm_get_version()
+    if kind == 'git' and not has_git_command():
+        raise GitCommandNotAvailable()
+
+    try:
+        res = _SCM_CALLS.run((root_dir, state), lambda: get_version(root_dir, version_scheme=fixed_version_scheme))
+    except LookupError:
+        raise ScmInformationNotFound(initial_path)
+
+    _SCM_VERSIONS_BY_ROOT[root_dir] = state, res
+    return res
+
+
+def get_version_using_setuptools_scm(module  # type: ModuleType
+                                     ):
+    # type: (...) -> str
+    """
+    get version from the source directory if it is under version control
+    :param module:
+    :return:
+    """
+    # ...using setuptools_scm if available
+    path = abspath(module.__file__)
+    return scm_get_version_recursive_root(dirname(path), initial_path=path)
@@ -0,0 +1,257 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+from os import stat
+from os.path import abspath, basename, dirname, exists, isfile
+from zipfile import ZipFile, BadZipfile
+from zipimport import zipimporter
+
+try:  # python 3.5+
+    from typing import List, Optional, Tuple
+    from types import ModuleType
+except ImportError:
+    pass
+
+from getversion.cache import register_index
+from getversion.plugin_eggs_and_wheels import MetadataHeaders, normalize_dist_name, _parse_dist_folder_name
+
+
+class NotInZipArchive(Exception):
+    def __init__(self, module_name):
+        self.module_name = module_name
+
+    def __str__(self):
+        return "Module '%s' was not imported from a zip archive (zipped egg, wheel or zipapp)" % self.module_name
+
+
+class DistributionNotFoundInZipArchive(Exception):
+    def __init__(self, module_name, archive):
+        self.module_name = module_name
+        self.archive = archive
+
+    def __str__(self):
+        return "No dist-info, egg-info or EGG-INFO metadata for '%s' could be found in zip archive %s" \
+               % (self.module_name, self.archive)
+
+
+def get_zip_archive(module  # type: ModuleType
+                    ):
+    # type: (...) -> Optional[Tuple[str, str]]
+    """
+    Returns a tuple (archive path, prefix) if `module` is located inside a zip archive, where prefix is the folder
+    of the `sys.path` entry inside the archive ('' for the archive root, 'lib/' for `app.pyz/lib`...). Returns None
+    otherwise.
+
+    The archive is known from the `zipimporter` loader of the module when there is one. Otherwise the parent folders
+    of `module.__file__` are checked, so that modules that are not imported (see `NotImportedModule`) are supported.
+
+    :param module:
+    :return:
+    """
+    spec = getattr(module, '__spec__', None)
+    loader = getattr(spec, 'loader', None) or getattr(module, '__loader__', None)
+    if isinstance(loader, zipimporter):
+        return abspath(loader.archive), loader.prefix.replace('\\', '/')
+
+    module_file = getattr(module, '__file__', None)
+    if module_file is None or exists(module_file):
+        return None
+
+    # walk up the parent folders until an existing path is found: is it an archive ?
+    inner_parts = []
+    path = dirname(abspath(module_file))
+    while not exists(path):
+        parent = dirname(path)
+        if parent == path:
+            return None
+        inner_parts.insert(0, basename(path))
+        path = parent
+
+    if not isfile(path):
+        return None
+
+    if hasattr(module, '__path__'):
+        # package: <archive>/<prefix>/<pkg>/__init__.py
+        inner_parts = inner_parts[:-1]
+    prefix = ''.join(p + '/' for p in inner_parts)
+    return path, prefix
+
+
+class ZipArchiveIndex(object):
+    """
+    The index of the distributions metadata contained in a zip archive, built from its central directory only (the
+    archive is never extracted):
+
+     - `<prefix><name>-<version>.dist-info/METADATA` (wheels, zipapps built with `pip install --target`)
+     - `<prefix><name>[-<version>...].egg-info/PKG-INFO`
+     - `EGG-INFO/PKG-INFO` at the root of zipped eggs, named after the archive file name.
+
+    The archive is opened once and kept open, so that the metadata files of many modules can be read from the same
+    archive without reopening it. `close()` is called when the indexes are cleared.
+    """
+    __slots__ = 'path', 'state', '_zipfile', 'dists', '_top_levels', '_headers'
+
+    def __init__(self,
+                 path,  # type: str
+                 state  # type: Tuple[float, int]
+                 ):
+        self.path = path
+        self.state = state
+        self._zipfile = ZipFile(path)
+        self._top_levels = dict()  # {member: [names]}, read lazily
+        self._headers = dict()     # {member: MetadataHeaders}
+
+        # {prefix: {normalized name: [(version, metadata member, kind, top_level.txt member or None)]}}
+        dists = dict()
+        names = self._zipfile.namelist()
+        members = set(names)
+        for member in names:
+            parts = member.split('/')
+            if len(parts) < 2:
+                continue
+            folder, file_name = parts[-2], parts[-1]
+            prefix = ''.join(p + '/' for p in parts[:-2])
+
+            if folder == 'EGG-INFO' and file_name == 'PKG-INFO' and prefix == '':
+                # zipped egg: {name}-{version}-py{pyver}.egg
+                parsed = _parse_dist_folder_name(basename(path).rsplit('.', 1)[0] + '.egg-info')
+                kind = 'egg'
+            elif file_name in ('METADATA', 'PKG-INFO'):
+                parsed = _parse_dist_folder_name(folder)
+                if parsed is None or (parsed[2] == 'dist-info') != (file_name == 'METADATA'):
+                    continue
+                kind = parsed[2]
+            else:
+                continue
+
+            if parsed is None:
+                continue
+            pkg_name, version = parsed[0], parsed[1]
+            top_level = member[:-len(file_name)] + 'top_level.txt'
+            dists.setdefault(prefix, dict()).setdefault(normalize_dist_name(pkg_name), []) \
+                .append((version, member, kind, top_level if top_level in members else None))
+
+        self.dists = dists
+
+    def close(self):
+        self._zipfile.close()
+
+    def open_member(self,
+                    member  # type: str
+                    ):
+        """Opens `member` of the archive in binary mode"""
+        return self._zipfile.open(member)
+
+    def get_metadata_headers(self,
+                             member  # type: str
+                             ):
+        # type: (...) -> MetadataHeaders
+        """Returns the shared, lazily parsed, `MetadataHeaders` of the metadata file `member` of the archive"""
+        try:
+            return self._headers[member]
+        except KeyError:
+            res = self._headers[member] = MetadataHeaders(member, opener=self.open_member)
+            return res
+
+    def get_top_level_names(self,
+                            member  # type: str
+                            ):
+        # type: (...) -> List[str]
+        """Returns the names listed in the top_level.txt file `member` of the archive"""
+        try:
+            return self._top_levels[member]
+        except KeyError:
+            with self.open_member(member) as f:
+                res = self._top_levels[member] = f.read().decode('utf-8').split()
+            return res
+
+    def find(self,
+             prefix,      # type: str
+             module_name  # type: str
+             ):
+        # type: (...) -> Optional[Tuple[Optional[str], str, str, Optional[str]]]
+        """
+        Returns the (version, metadata member, kind, top_level member) of the distribution of root module
+        `module_name` in the `prefix` folder of the archive, or None. Distributions are looked up by name first, then
+        using their top_level.txt files. Distributions without top_level.txt (built by flit, poetry, hatch...) are
+        only found by name: the other modules of the folder (a zipapp `__main__`, vendored modules...) do not belong
+        to them.
+        """
+        dists = self.dists.get(prefix, dict())
+        try:
+            return dists[normalize_dist_name(module_name)][0]
+        except KeyError:
+            pass
+
+        candidates = [entries[0] for entries in dists.values()]
+        for dist in candidates:
+            if dist[3] is not None and module_name in self.get_top_level_names(dist[3]):
+                return dist
+        return None
+
+
+def _clear_zip_indexes():
+    for index in _ZIP_INDEXES.values():
+        index.close()
+    _ZIP_INDEXES.clear()
+
+
+_ZIP_INDEXES = dict()
+register_index(_clear_zip_indexes)
+
+
+def get_zip_archive_index(archive  # type: str
+                          ):
+    # type: (...) -> ZipArchiveIndex
+    """
+    Returns the `ZipArchiveIndex` of `archive`. It is built once per archive and shared by all modules located in it,
+    as long as the modification time and size of the archive do not change.
+
+    :param archive:
+    :return:
+    """
+    st = stat(archive)
+    state = st.st_mtime, st.st_size
+    index = _ZIP_INDEXES.get(archive)
+    if index is None or index.state != state:
+        if index is not None:
+            index.close()
+        index = _ZIP_INDEXES[archive] = ZipArchiveIndex(archive, state)
+    return index
+
+
+def get_version_from_zip_archive(module  # type: ModuleType
+                                 ):
+    # type: (...) -> str
+    """
+    Gets the version of a module imported from a zip archive through `zipimport`: zipped eggs, wheels placed directly
+    on `sys.path`, zipapps (`python app.pyz`). The distribution metadata (`*.dist-info/METADATA`,
+    `*.egg-info/PKG-INFO` or `EGG-INFO/PKG-INFO`) is read straight from the archive, without extracting it.
+
+    :param module:
+    :return:
+    """
+    zip_archive = get_zip_archive(module)
+    if zip_archive is None:
+        raise NotInZipArchive(module.__name__)
+
+    archive, prefix = zip_archive
+    try:
+        index = get_zip_archive_index(archive)
+    except (OSError, IOError, BadZipfile):
+        raise NotInZipArchive(module.__name__)
+
+    dist = index.find(prefix, module.__name__)
+    if dist is None:
+        raise DistributionNotFoundInZipArchive(module.__name__, archive)
+
+    version, member, kind, _ = dist
+    if version is not None and len(version) > 0:
+        return version
+
+    version = index.get_metadata_headers(member).get('Version')
+    if version is None:
+        raise ValueError("Metadata file was found in zip archive but does not contain any Version: %s/%s"
+                         % (archive, member))
+    return version
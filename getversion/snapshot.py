@@ -0,0 +1,219 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+"""
+Deploy-time snapshots of the versions of all importable top-level modules.
+
+In immutable environments (docker images, frozen virtualenvs...) versions can be resolved once at build time and
+written to a snapshot file:
+
+    getversion-snapshot /path/to/snapshot.json
+
+Processes started with `GETVERSION_SNAPSHOT=/path/to/snapshot.json` in their environment (or calling
+`use_snapshot(path)`) then resolve the root modules listed in the snapshot with a dict lookup: the file is loaded
+once, and the strategies (dist-info indexes, git...) are never used for them.
+"""
+import json
+import os
+import sys
+from pkgutil import iter_modules
+from warnings import warn
+
+try:  # python 3.5+
+    from typing import Dict, Iterable, Optional
+    from types import ModuleType
+except ImportError:
+    pass
+
+SNAPSHOT_FORMAT = 1
+
+SNAPSHOT_ENV_VAR = 'GETVERSION_SNAPSHOT'
+"""Name of the environment variable containing the path of the snapshot to use, if any"""
+
+
+class SnapshotNotInUse(Exception):
+    def __str__(self):
+        return "No version snapshot is in use. See `use_snapshot`"
+
+
+class ModuleNotInSnapshot(Exception):
+    def __init__(self, module_name):
+        self.module_name = module_name
+
+    def __str__(self):
+        return "Module '%s' is not in the version snapshot in use" % self.module_name
+
+
+def iter_top_level_module_names():
+    """
+    Yields the names of all top-level modules that can be imported from `sys.path` (without importing them), and of
+    the modules compiled in the interpreter. Each name is yielded once.
+    """
+    seen = set()
+    for name in sys.builtin_module_names:
+        if name not in seen:
+            seen.add(name)
+            yield name
+    for module_info in iter_modules():
+        name = module_info[1]
+        if name not in seen:
+            seen.add(name)
+            yield name
+
+
+def build_snapshot(module_names=None  # type: Iterable[str]
+                   ):
+    # type: (...) -> Dict[str, str]
+    """
+    Resolves the versions of `module_names` (by default, all importable top-level modules, see
+    `iter_top_level_module_names`) with the default strategies of `get_module_version`
+    (`main._STRATEGIES_SUBMODULES` and `main._STRATEGIES_ROOTMODULES`). Modules are not imported. Modules whose
+    version can not be found are not included.
+
+    :param module_names:
+    :return: a dictionary {module name: version}
+    """
+    from getversion.main import get_version_str, ModuleVersionNotFound, _STRATEGIES_SUBMODULES, \
+        _STRATEGIES_ROOTMODULES
+
+    # the snapshot in use (if any) must not be used to build the new one
+    global _active_snapshot
+    previous, _active_snapshot = get_active_snapshot(), None
+    try:
+        res = dict()
+        for name in (module_names if module_names is not None else iter_top_level_module_names()):
+            try:
+                res[name] = get_version_str(name, submodule_strategies=_STRATEGIES_SUBMODULES,
+                                            rootmodule_strategies=_STRATEGIES_ROOTMODULES)
+            except (ModuleVersionNotFound, ImportError, ValueError):
+                pass
+        return res
+    finally:
+        _active_snapshot = previous
+
+
+def write_snapshot(path,              # type: str
+                   module_names=None  # type: Iterable[str]
+                   ):
+    # type: (...) -> Dict[str, str]
+    """
+    Builds a snapshot with `build_snapshot` and writes it to `path`, as a compact json file. The file is replaced
+    atomically, so that running processes never see a partially written snapshot.
+
+    :param path:
+    :param module_names:
+    :return: the versions written
+    """
+    versions = build_snapshot(module_names)
+    content = dict(format=SNAPSHOT_FORMAT, python=sys.version, prefix=sys.prefix, versions=versions)
+
+    tmp_path = '%s.%s.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wt') as f:
+        json.dump(content, f, separators=(',', ':'), sort_keys=True)
+    try:
+        os.replace(tmp_path, path)
+    except AttributeError:  # python 2
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp_path, path)
+    return versions
+
+
+def load_snapshot(path  # type: str
+                  ):
+    # type: (...) -> Dict[str, str]
+    """
+    Loads the snapshot written by `write_snapshot` at `path`. A `ValueError` is raised if it was created for another
+    python environment (different `sys.prefix` or python version).
+
+    :param path:
+    :return: a dictionary {module name: version}
+    """
+    with open(path, 'rt') as f:
+        content = json.load(f)
+
+    if content.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError("Unsupported version snapshot format in %s" % path)
+    if content.get('python') != sys.version or content.get('prefix') != sys.prefix:
+        raise ValueError("Version snapshot %s was created for another python environment (%s, %s)"
+                         % (path, content.get('prefix'), content.get('python')))
+    return content['versions']
+
+
+_active_snapshot = None  # type: Optional[Dict[str, str]]
+_env_var_checked = False
+
+
+def use_snapshot(path  # type: Optional[str]
+                 ):
+    """
+    Loads the snapshot at `path` and uses it from now on in `get_module_version` and `get_version_str`: root modules
+    listed in the snapshot are resolved with a dict lookup, before any strategy. Use `None` to stop using a snapshot.
+
+    Setting the `GETVERSION_SNAPSHOT` environment variable to the path of a snapshot has the same effect, without any
+    code change: it is read the first time a version is requested. Contrary to this function, a snapshot that can not
+    be loaded from the environment variable (missing file, other python environment...) only issues a warning, and the
+    strategies are used instead.
+
+    :param path:
+    :return:
+    """
+    global _active_snapshot, _env_var_checked
+    _env_var_checked = True
+    _active_snapshot = load_snapshot(path) if path is not None else None
+
+
+def get_active_snapshot():
+    # type: (...) -> Optional[Dict[str, str]]
+    """
+    Returns the snapshot in use ({module name: version}), or None.
+
+    :return:
+    """
+    global _env_var_checked
+    if not _env_var_checked:
+        _env_var_checked = True
+        path = os.environ.get(SNAPSHOT_ENV_VAR)
+        if path:
+            try:
+                use_snapshot(path)
+            except (IOError, OSError, ValueError) as e:
+                warn("Ignoring the version snapshot set in %s: %s" % (SNAPSHOT_ENV_VAR, e))
+    return _active_snapshot
+
+
+def get_version_from_snapshot(module  # type: ModuleType
+                              ):
+    # type: (...) -> str
+    """
+    A strategy returning the version of `module` from the snapshot in use (see `use_snapshot`). It is used
+    automatically by `get_module_version` when a snapshot is in use, but can also be added to custom strategy lists.
+
+    :param module:
+    :return:
+    """
+    snapshot = get_active_snapshot()
+    if snapshot is None:
+        raise SnapshotNotInUse()
+    try:
+        return snapshot[module.__name__]
+    except KeyError:
+        raise ModuleNotInSnapshot(module.__name__)
+
+
+def main(args=None):
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(prog='getversion-snapshot',
+                            description="Writes a snapshot of the versions of all importable top-level modules.")
+    parser.add_argument('path', help="path of the snapshot file to write")
+    parser.add_argument('modules', nargs='*', help="names of the modules to include (default: all)")
+    options = parser.parse_args(args)
+
+    versions = write_snapshot(options.path, options.modules or None)
+    print("%s module versions written to %s" % (len(versions), options.path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import sys
+
+# tests using the python 3.5+ syntax can not even be collected on older versions
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_aio_py35.py')
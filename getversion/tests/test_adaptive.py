@@ -0,0 +1,57 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+from types import ModuleType
+
+from getversion import get_version_str, version_cache, enable_adaptive_ordering, disable_adaptive_ordering
+from getversion.adaptive import AdaptiveScheduler, DEFAULT_CONSTRAINTS, get_location_key
+from getversion.plugin_builtins import get_builtin_module_version
+from getversion.plugin_dist_index import get_version_using_dist_index
+
+
+def test_adaptive_ordering():
+    """Tests that the strategy that usually wins at a location is tried first there"""
+    calls = []
+
+    def always_fails(module):
+        calls.append(module.__name__)
+        raise ValueError()
+
+    def always_wins(module):
+        return '1.0'
+
+    modules = []
+    for i in range(12):
+        m = ModuleType('adaptive_mod_%s' % i)
+        m.__file__ = '/some/location/adaptive_mod_%s.py' % i
+        modules.append(m)
+    assert get_location_key(modules[0]).endswith('location')
+
+    version_cache.clear()
+    scheduler = enable_adaptive_ordering(min_samples=4)
+    try:
+        for m in modules:
+            assert get_version_str(m, rootmodule_strategies=(always_fails, always_wins)) == '1.0'
+        assert calls == ['adaptive_mod_%s' % i for i in range(4)]
+
+        scores = scheduler.get_scores()[get_location_key(modules[0])]
+        assert (scores[always_fails].calls, scores[always_fails].wins) == (4, 0)
+        assert (scores[always_wins].calls, scores[always_wins].wins) == (12, 12)
+    finally:
+        disable_adaptive_ordering()
+        version_cache.clear()
+
+
+def test_adaptive_constraints():
+    """Tests that the constraints are respected whatever the scores"""
+    def other(module):
+        pass
+
+    strategies = (get_version_using_dist_index, get_builtin_module_version, other)
+    for constraints, expected in (((), (get_builtin_module_version, other, get_version_using_dist_index)),
+                                  (DEFAULT_CONSTRAINTS, strategies)):
+        scheduler = AdaptiveScheduler(constraints=constraints, min_samples=1)
+        scheduler.record('loc', get_builtin_module_version, True, 0.)
+        scheduler.record('loc', get_version_using_dist_index, False, 1.)
+        assert scheduler.order('loc', strategies) == expected
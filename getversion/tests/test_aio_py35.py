@@ -0,0 +1,46 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import asyncio
+from threading import Event
+from types import ModuleType
+
+from getversion import get_module_version, version_cache
+from getversion.aio import get_module_version_async, get_version_str_async
+
+
+def test_async_single_flight():
+    """Tests that concurrent async requests for the same module share a single resolution, run off-loop"""
+    m = ModuleType('foo_async_test')
+    release = Event()
+    calls = []
+
+    def slow_strategy(module):
+        calls.append(module.__name__)
+        release.wait(5)
+        return '1.0.0'
+
+    async def resolve_all():
+        tasks = [asyncio.ensure_future(get_module_version_async(m, submodule_strategies=(slow_strategy,)))
+                 for _ in range(5)]
+        # the event loop is not blocked while the strategy runs
+        await asyncio.sleep(0.05)
+        assert not any(t.done() for t in tasks)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    version_cache.clear()
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(resolve_all())
+        assert [r[0] for r in results] == ['1.0.0'] * 5
+        assert calls == ['foo_async_test']
+
+        # the cache is shared with the synchronous api
+        assert get_module_version(m, submodule_strategies=(slow_strategy,)) is results[0]
+        assert loop.run_until_complete(get_version_str_async(m, submodule_strategies=(slow_strategy,))) == '1.0.0'
+        assert calls == ['foo_async_test']
+    finally:
+        loop.close()
+        version_cache.clear()
@@ -0,0 +1,135 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import gc
+import os
+from types import ModuleType
+
+from getversion import get_module_version, version_cache, VersionCache
+
+
+def _make_module(name, version):
+    m = ModuleType(name)
+    m.__version__ = version
+    return m
+
+
+def test_cache_hit_and_invalidate():
+    """Tests that results are cached, and that `invalidate` and `clear` work"""
+    m = _make_module('foo_cache_test', '1.0.0')
+    res = get_module_version(m)
+    assert res[0] == '1.0.0'
+
+    # the cached result is returned even if the module changes
+    m.__version__ = '2.0.0'
+    assert get_module_version(m) is res
+
+    # unless the cache is invalidated
+    version_cache.invalidate(m)
+    assert get_module_version(m)[0] == '2.0.0'
+
+    m.__version__ = '3.0.0'
+    version_cache.clear()
+    assert get_module_version(m)[0] == '3.0.0'
+
+
+def test_cache_weak_references():
+    """Tests that the cache does not keep modules alive"""
+    m = _make_module('foo_cache_test_weak', '1.0.0')
+    _, details = get_module_version(m)
+    assert details.module is m
+
+    del m
+    gc.collect()
+    assert details.module is None
+
+    # a new module with the same name is not mistaken for the old one
+    m2 = _make_module('foo_cache_test_weak', '2.0.0')
+    assert get_module_version(m2)[0] == '2.0.0'
+
+
+def test_cache_maxsize():
+    """Tests that least recently used entries are evicted"""
+    cache = VersionCache(maxsize=2)
+    mods = [_make_module('foo%s' % i, '1.0.%s' % i) for i in range(3)]
+    for m in mods:
+        cache.put(m, None, m.__version__)
+    assert len(cache) == 2
+    assert cache.get(mods[0], None) is None
+    assert cache.get(mods[2], None) == '1.0.2'
+
+    cache.maxsize = 1
+    assert len(cache) == 1
+    assert cache.get(mods[2], None) == '1.0.2'
+
+
+def test_cache_mtimes(tmpdir):
+    """Tests that entries are invalidated when the backing paths change, if `check_mtimes` is set"""
+    cache = VersionCache(check_mtimes=True)
+    m = _make_module('foo', '1.0.0')
+    cache.put(m, None, '1.0.0', backing_paths=(str(tmpdir),))
+    assert cache.get(m, None) == '1.0.0'
+
+    st = os.stat(str(tmpdir))
+    os.utime(str(tmpdir), (st.st_atime, st.st_mtime + 10))
+    assert cache.get(m, None) is None
+
+
+def test_version_str_mtimes_submodule(tmpdir):
+    """Tests that submodules resolved by `get_version_str` inherit the backing paths of their parent package"""
+    import sys
+    from getversion import get_version_str
+    from getversion.main import find_module, _STRATEGIES_SUBMODULES, _STRATEGIES_ROOTMODULES
+
+    pkg = tmpdir.mkdir('mtimes_pkg')
+    pkg.join('__init__.py').write('')
+    pkg.join('sub.py').write('')
+    tmpdir.mkdir('mtimes_pkg-1.0.dist-info')
+
+    sys.path.insert(0, str(tmpdir))
+    version_cache.clear()
+    version_cache.check_mtimes = True
+    try:
+        assert get_version_str('mtimes_pkg.sub') == '1.0'
+        # no DetailedResults were built for the parent
+        assert version_cache.get(find_module('mtimes_pkg'), (_STRATEGIES_SUBMODULES, _STRATEGIES_ROOTMODULES)) is None
+
+        tmpdir.join('mtimes_pkg-1.0.dist-info').rename(tmpdir.join('mtimes_pkg-2.0.dist-info'))
+        assert get_version_str('mtimes_pkg.sub') == '2.0'
+    finally:
+        version_cache.check_mtimes = False
+        sys.path.remove(str(tmpdir))
+        version_cache.clear()
+
+
+def test_cache_single_flight():
+    """Tests that concurrent computations of the same entry are coalesced, and that results are shared"""
+    from threading import Event, Thread
+
+    cache = VersionCache()
+    m = _make_module('foo_cache_test_single_flight', '1.0.0')
+    started, release = Event(), Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        cache.put(m, 'key', '1.0.0')
+        return '1.0.0'
+
+    results = []
+    threads = [Thread(target=lambda: results.append(cache.get_or_compute(m, 'key', compute))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert results == ['1.0.0'] * 4
+    assert len(calls) == 1
+    assert cache.get_or_compute(m, 'key', compute) == '1.0.0'
+    assert len(calls) == 1
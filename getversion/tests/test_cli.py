@@ -0,0 +1,36 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import json
+import sys
+
+from getversion import version_cache, disable_stats
+from getversion.__main__ import main
+
+
+def test_cli(tmpdir, capsys):
+    """Tests that the command line interface streams one json line per module, with strategies and timings"""
+    site = tmpdir.mkdir('site')
+    site.mkdir('cli_pkg').join('__init__.py').write('')
+    site.mkdir('cli_pkg-1.0.dist-info')
+    site.join('cli_nover.py').write('')
+
+    version_cache.clear()
+    try:
+        main(['--path', str(site), 'cli_pkg'])
+    finally:
+        disable_stats()
+        sys.path.remove(str(site))
+        version_cache.clear()
+
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert [r['module'] for r in lines] == ['cli_pkg', 'cli_nover']
+
+    pkg, nover = lines
+    assert pkg['version'] == '1.0'
+    assert pkg['strategy'] == 'get_version_using_dist_index'
+    assert list(pkg['timings']['cli_pkg']) == ['get_module_version_attr', 'get_version_using_dist_index']
+
+    assert nover['version'] is None
+    assert 'get_version_using_dist_index' in nover['attempts']['cli_nover']
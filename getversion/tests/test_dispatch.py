@@ -0,0 +1,41 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import sys
+
+import pytest
+
+from getversion import get_module_version
+from getversion.dispatch import get_module_kind, select_strategies, KIND_BUILTIN, KIND_FILE, KIND_SITE_PACKAGES
+from getversion.main import _STRATEGIES_ROOTMODULES, find_module
+from getversion.plugin_builtins import get_builtin_module_version
+from getversion.plugin_dist_index import get_version_using_dist_index
+from getversion.plugin_git_reader import get_version_using_git_reader
+
+
+@pytest.mark.skipif(sys.version_info < (3, 4), reason="module specs are not available")
+def test_dispatch():
+    """Tests that only the strategies that can apply to a module are selected, from its spec"""
+    sys_module = sys.modules['sys']
+    assert get_module_kind(sys_module) == KIND_BUILTIN
+    assert select_strategies(sys_module, _STRATEGIES_ROOTMODULES) == (get_builtin_module_version,)
+
+    pytest_module = find_module('pytest')
+    assert get_module_kind(pytest_module) == KIND_SITE_PACKAGES
+    strategies = select_strategies(pytest_module, _STRATEGIES_ROOTMODULES)
+    assert strategies[0:2] == (get_version_using_dist_index, get_builtin_module_version)
+    assert get_version_using_git_reader not in strategies
+
+    getversion_module = find_module('getversion')
+    assert get_module_kind(getversion_module) == KIND_FILE
+    assert get_version_using_git_reader in select_strategies(getversion_module, _STRATEGIES_ROOTMODULES)
+
+    # custom strategies are kept, and skipped strategies are not reported as failed attempts
+    def custom(module):
+        raise ValueError()
+
+    assert select_strategies(sys_module, (custom, get_version_using_dist_index)) == (custom,)
+    _, details = get_module_version(sys_module)
+    assert list(details.err_dct['sys'])[-1:] == [get_builtin_module_version]
+    assert get_version_using_dist_index not in details.err_dct['sys']
@@ -37,7 +37,7 @@ Version '{sysversion}' found for module 'xml.dom' by strategy 'get_builtin_modul
    - <get_module_version_attr>: {first} has no attribute '__version__'
  - Attempts for module 'xml':
    - <get_module_version_attr>: {second} has no attribute '__version__'
-   - <get_version_using_pkgresources>: Invalid version number: None
+   - <get_version_using_dist_index>: No dist-info or egg-info folder for distribution 'xml' could be found in the sys.path entries
    - <get_builtin_module_version>: SUCCESS: {sysversion}
 
 """.format(sysversion=python_sys_version, first=first, second=second)
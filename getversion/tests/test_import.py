@@ -0,0 +1,45 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import json
+import subprocess
+import sys
+from os.path import abspath, dirname, join, pardir
+
+# generous on purpose: slow CI machines should not fail, but importing setuptools_scm/pkg_resources or probing `git`
+# would typically exceed it
+IMPORT_TIME_BUDGET = 0.5
+SUBPROCESS_BUDGET = 0
+
+_IMPORT_SCRIPT = """
+import json, subprocess, sys
+calls = []
+_popen_init = subprocess.Popen.__init__
+def _counting_init(self, *args, **kwargs):
+    calls.append(args)
+    _popen_init(self, *args, **kwargs)
+subprocess.Popen.__init__ = _counting_init
+
+try:
+    from time import perf_counter
+except ImportError:  # python 2
+    from time import time as perf_counter
+start = perf_counter()
+import getversion
+duration = perf_counter() - start
+
+print(json.dumps(dict(duration=duration, subprocesses=len(calls),
+                      heavy_modules=[m for m in ('setuptools_scm', 'pkg_resources') if m in sys.modules])))
+"""
+
+
+def test_import_budget():
+    """Tests that `import getversion` is cheap: no subprocess, no setuptools_scm/pkg_resources import"""
+    root_dir = abspath(join(dirname(__file__), pardir, pardir))
+    out = subprocess.check_output([sys.executable, '-c', _IMPORT_SCRIPT], cwd=root_dir)
+    res = json.loads(out.decode('utf-8').strip().splitlines()[-1])
+
+    assert res['subprocesses'] <= SUBPROCESS_BUDGET
+    assert res['heavy_modules'] == []
+    assert res['duration'] < IMPORT_TIME_BUDGET
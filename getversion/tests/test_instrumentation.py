@@ -0,0 +1,49 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+from types import ModuleType
+
+import pytest
+
+from getversion import get_module_version, get_version_str, enable_stats, disable_stats, stats, version_cache, \
+    ModuleVersionNotFound
+
+
+def test_stats():
+    """Tests that strategies and cache statistics are recorded when enabled, and that the callback is called"""
+    assert stats() is None
+
+    events = []
+    enable_stats(callback=lambda *args: events.append(args))
+    try:
+        m = ModuleType('foo_stats_test')
+        m.__version__ = '1.0.0'
+        version_cache.invalidate(m)
+        get_module_version(m)
+        get_module_version(m)
+
+        s = stats()
+        assert s['cache'] == {'hits': 1, 'misses': 1}
+        attr_stats = s['strategies']['get_module_version_attr']
+        assert (attr_stats['calls'], attr_stats['wins'], attr_stats['failures']) == (1, 1, 0)
+        assert attr_stats['total_time'] >= 0
+
+        assert [e[0:2] for e in events] == [('cache', 'miss'), ('get_module_version_attr', 'win'), ('cache', 'hit')]
+    finally:
+        disable_stats()
+
+    assert stats() is None
+
+
+def test_stats_version_str_not_found():
+    """Tests that the strategies are recorded once when `get_version_str` collects the diagnostics of a failure"""
+    enable_stats()
+    try:
+        m = ModuleType('foo_stats_not_found')
+        with pytest.raises(ModuleVersionNotFound):
+            get_version_str(m)
+        for strategy_stats in stats()['strategies'].values():
+            assert strategy_stats['calls'] == 1
+    finally:
+        disable_stats()
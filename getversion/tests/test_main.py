@@ -5,6 +5,7 @@
 import sys
 from importlib import import_module
 from os.path import dirname, join, pardir
+from types import ModuleType
 
 import pytest
 from pkg_resources import get_distribution
@@ -12,7 +13,9 @@ from pytest_cases import pytest_fixture_plus, fixture_union
 from setuptools_scm import get_version
 
 import getversion
-from getversion import get_module_version
+from getversion import get_module_version, get_version_str, get_module_versions, iter_module_versions, \
+    DetailedResults, ModuleVersionNotFound, StrategyFailure, enable_full_errors, disable_full_errors
+from getversion.plugin_builtins import get_builtin_module_version
 
 
 THIS_DIR = dirname(__file__)
@@ -172,3 +175,176 @@ def test_modules_version(module, expected_version):
         assert found_version == expected_version
     finally:
         print(detailed_results)
+
+
+def test_get_module_versions():
+    """Tests that the bulk api returns the same results than `get_module_version`, and reports failures"""
+    import json
+    from xml import dom
+    dummy = import_module('dummy')
+    dummy3 = import_module('dummy3')
+
+    res = get_module_versions([json, dom, dummy, dummy3, None])
+    assert list(res.keys()) == ['json', 'xml.dom', 'dummy', 'dummy3']
+    assert res['json'][0] == json.__version__
+    assert res['xml.dom'][0] == python_sys_version
+    assert res['dummy'][0] == '2.9.2'
+    assert res['dummy3'][0] == '0.1.0'
+    for version, details in res.values():
+        assert isinstance(details, DetailedResults)
+        assert details.version_found == version
+
+    # concurrent resolution gives the same results, in the same order
+    threaded = get_module_versions([json, dom, dummy, dummy3, None], max_workers=4)
+    assert [(k, v[0]) for k, v in threaded.items()] == [(k, v[0]) for k, v in res.items()]
+
+    # a module whose parent package can not be found does not abort the others
+    orphan = ModuleType('nonexistent_parent.child')
+    res = get_module_versions([json, orphan])
+    assert res['json'][0] == json.__version__
+    version, err = res['nonexistent_parent.child']
+    assert version is None
+    assert isinstance(err, ImportError)
+
+
+def test_iter_module_versions():
+    """Tests that the generator api yields the modules resolved by the cheap strategies first"""
+    import json
+    from xml import dom
+    dummy = import_module('dummy')
+
+    calls = []
+
+    def expensive_strategy(module):
+        calls.append(module.__name__)
+        return '1.0'
+
+    results = iter_module_versions([dummy, json, 'unknown_module_xyz', dom],
+                                   rootmodule_strategies=(get_builtin_module_version, expensive_strategy))
+    assert next(results)[0:2] == ('json', json.__version__)
+    name, version, err = next(results)
+    assert (name, version) == ('unknown_module_xyz', None)
+    assert isinstance(err, ImportError)
+    assert next(results)[0:2] == ('xml.dom', python_sys_version)
+    assert calls == []
+
+    name, version, details = next(results)
+    assert (name, version) == ('dummy', '1.0')
+    assert details.winning_strategy is expensive_strategy
+    assert calls == ['dummy']
+    assert list(results) == []
+
+
+def test_parent_results_shared(tmpdir):
+    """Tests that sibling submodules share the resolution of their parent packages"""
+    pkg = tmpdir.mkdir('shared_pkg')
+    pkg.join('__init__.py').write('')
+    sub = pkg.mkdir('sub')
+    sub.join('__init__.py').write('')
+    for name in ('a', 'b'):
+        sub.join('%s.py' % name).write('')
+    pkg.join('c.py').write('')
+
+    calls = []
+
+    def root_strategy(module):
+        calls.append(module.__name__)
+        return '1.0'
+
+    sys.path.insert(0, str(tmpdir))
+    try:
+        for name in ('shared_pkg.sub.a', 'shared_pkg.sub.b', 'shared_pkg.c', 'shared_pkg'):
+            assert get_version_str(name, rootmodule_strategies=(root_strategy,)) == '1.0'
+        assert calls == ['shared_pkg']
+
+        # same with details (they are cached separately)
+        for name in ('shared_pkg.sub.a', 'shared_pkg.sub.b'):
+            version, details = get_module_version(name, rootmodule_strategies=(root_strategy,))
+            assert version == '1.0'
+            assert list(details.err_dct.keys()) == [name, 'shared_pkg.sub', 'shared_pkg']
+            assert details.winning_strategy is root_strategy
+        assert calls == ['shared_pkg'] * 2
+    finally:
+        sys.path.remove(str(tmpdir))
+
+
+def test_failure_records():
+    """Tests that the failures of the strategies are stored as compact records, with the exceptions only on demand"""
+    def failing_strategy(module):
+        raise ValueError("no version here")
+
+    m = ModuleType('failure_records_test')
+    for keep in (False, True):
+        if keep:
+            enable_full_errors()
+        try:
+            with pytest.raises(ModuleVersionNotFound) as exc_info:
+                get_module_version(m, submodule_strategies=(), rootmodule_strategies=(failing_strategy,))
+        finally:
+            disable_full_errors()
+
+        failure = exc_info.value.err_dct['failure_records_test'][failing_strategy]
+        assert isinstance(failure, StrategyFailure)
+        assert (failure.strategy_name, failure.exc_type, failure.message) == \
+               ('failing_strategy', ValueError, "no version here")
+        assert "<failing_strategy>: no version here" in str(exc_info.value)
+        if keep:
+            assert isinstance(failure.exception, ValueError)
+        else:
+            assert failure.exception is None
+
+
+def test_module_name_not_imported(tmpdir):
+    """Tests that a version can be found from a module name, without importing the module"""
+    pkg = tmpdir.mkdir('notimported_pkg')
+    pkg.join('__init__.py').write('raise ValueError("this should not be imported")')
+    pkg.join('sub.py').write('raise ValueError("this should not be imported")')
+    tmpdir.mkdir('notimported_pkg-4.5.6.dist-info')
+
+    sys.path.insert(0, str(tmpdir))
+    try:
+        version, details = get_module_version('notimported_pkg.sub')
+        assert version == '4.5.6'
+        assert 'notimported_pkg' not in sys.modules
+        assert 'notimported_pkg.sub' not in sys.modules
+        assert list(details.err_dct.keys()) == ['notimported_pkg.sub', 'notimported_pkg']
+
+        # already imported modules are used directly
+        assert get_module_version('json')[0] == sys.modules['json'].__version__
+    finally:
+        sys.path.remove(str(tmpdir))
+
+
+def test_get_version_str():
+    """Tests that the lightweight api returns the same versions, and raises the same detailed error"""
+    from xml import dom
+    dummy4 = import_module('dummy4')
+    for m in (dom, dummy4, 'json.encoder'):
+        assert get_version_str(m) == get_module_version(m)[0]
+
+    with pytest.raises(ModuleVersionNotFound) as exc_info:
+        get_version_str(ModuleType('no_version_can_be_found'))
+    assert "<get_module_version_attr>" in str(exc_info.value)
+
+
+def test_get_version_str_not_found_runs_once():
+    """Tests that the ModuleVersionNotFound of `get_version_str` is built without running the strategies again"""
+    calls = []
+
+    def failing_strategy(module):
+        calls.append(module.__name__)
+        raise ValueError("no version for %s" % module.__name__)
+
+    sys.modules['runs_once_pkg'] = ModuleType('runs_once_pkg')
+    sub = sys.modules['runs_once_pkg.sub'] = ModuleType('runs_once_pkg.sub')
+    try:
+        with pytest.raises(ModuleVersionNotFound) as exc_info:
+            get_version_str(sub, submodule_strategies=(failing_strategy,), rootmodule_strategies=())
+        assert calls == ['runs_once_pkg.sub', 'runs_once_pkg']
+        err_dct = exc_info.value.err_dct
+        assert list(err_dct.keys()) == ['runs_once_pkg.sub', 'runs_once_pkg']
+        failure = err_dct['runs_once_pkg'][failing_strategy]
+        assert isinstance(failure, StrategyFailure) and failure.exc_type is ValueError
+        assert "no version for runs_once_pkg.sub" in str(exc_info.value)
+    finally:
+        del sys.modules['runs_once_pkg.sub'], sys.modules['runs_once_pkg']
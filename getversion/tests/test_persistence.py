@@ -0,0 +1,77 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import os
+import sys
+
+from getversion import get_module_version, get_version_str, version_cache, enable_persistent_cache, \
+    disable_persistent_cache, enable_stats, disable_stats, stats
+from getversion.main import find_module
+from getversion.persistence import get_module_location
+
+
+def test_persistent_cache(tmpdir):
+    """Tests that versions are shared through the persistent cache, and that stale entries are refreshed"""
+    site = tmpdir.mkdir('site')
+    site.mkdir('persisted_pkg').join('__init__.py').write('')
+    site.mkdir('persisted_pkg-1.0.dist-info')
+    db = str(tmpdir.join('cache', 'versions.sqlite'))
+
+    sys.path.insert(0, str(site))
+    try:
+        version_cache.clear()
+        cache = enable_persistent_cache(db)
+        assert get_version_str('persisted_pkg') == '1.0'
+        location = get_module_location(find_module('persisted_pkg'))
+        assert cache.get('persisted_pkg', location)[0:2] == ('1.0', 'get_version_using_dist_index')
+        # another module with the same name
+        assert cache.get('persisted_pkg', location + 'x') is None
+
+        # a new process: nothing in memory, the result is read from disk
+        disable_persistent_cache()
+        version_cache.clear()
+        enable_persistent_cache(db)
+        enable_stats()
+        version, details = get_module_version('persisted_pkg')
+        assert version == '1.0'
+        assert details.version_found == '1.0'
+        assert list(stats()['strategies']) == ['get_module_version_attr']
+
+        # upgrade: the entry is stale
+        site.join('persisted_pkg-1.0.dist-info').remove()
+        site.mkdir('persisted_pkg-2.0.dist-info')
+        st = os.stat(str(site))
+        os.utime(str(site), (st.st_atime, st.st_mtime + 1))
+        version_cache.clear()
+        assert get_version_str('persisted_pkg') == '2.0'
+    finally:
+        disable_stats()
+        disable_persistent_cache()
+        sys.path.remove(str(site))
+        version_cache.clear()
+
+
+def test_persistent_cache_current_dir(tmpdir):
+    """Tests that processes started in different directories do not share the versions of the modules found in ''"""
+    for name, version in (('a', '1.0'), ('b', '2.0')):
+        d = tmpdir.mkdir(name)
+        d.mkdir('cwd_pkg').join('__init__.py').write('')
+        d.mkdir('cwd_pkg-%s.dist-info' % version)
+    db = str(tmpdir.join('versions.sqlite'))
+
+    cwd = os.getcwd()
+    sys.path.insert(0, '')
+    try:
+        for name, version in (('a', '1.0'), ('b', '2.0'), ('a', '1.0')):
+            # a new process started in another directory
+            os.chdir(str(tmpdir.join(name)))
+            version_cache.clear()
+            enable_persistent_cache(db)
+            assert get_version_str('cwd_pkg') == version
+            disable_persistent_cache()
+    finally:
+        disable_persistent_cache()
+        sys.path.remove('')
+        os.chdir(cwd)
+        version_cache.clear()
@@ -0,0 +1,47 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import sys
+from types import ModuleType
+
+import pytest
+
+from getversion.plugin_builtins import is_builtin, get_builtin_module_version
+
+
+@pytest.mark.parametrize('module_name', ['sys', 'os', 'json', 'xml', 'collections'])
+def test_builtin(module_name):
+    """Tests that standard library modules are detected"""
+    __import__(module_name)
+    assert is_builtin(sys.modules[module_name])
+
+
+def test_builtin_shadowed(tmpdir):
+    """Tests that a module with the same name than a standard library module but located elsewhere is not builtin"""
+    m = ModuleType('json')
+    m.__file__ = str(tmpdir.join('json', '__init__.py'))
+    assert not is_builtin(m)
+    with pytest.raises(ValueError):
+        get_builtin_module_version(m)
+
+    # without location, the name is used
+    assert is_builtin(ModuleType('json'))
+    assert not is_builtin(ModuleType('not_a_stdlib_module'))
+
+
+def test_stdlib_dirs_legacy_virtualenv(monkeypatch):
+    """Tests that the standard library of legacy virtualenvs is looked up in `sys.real_prefix`"""
+    from os.path import abspath, normcase, join
+    from getversion.plugin_builtins import get_stdlib_dirs
+
+    real_prefix = abspath(join(sys.prefix, 'fake_real_prefix'))
+    monkeypatch.setattr(sys, 'real_prefix', real_prefix, raising=False)
+    get_stdlib_dirs.cache_clear()
+    try:
+        stdlib_dirs, _ = get_stdlib_dirs()
+        assert stdlib_dirs
+        assert all(d.startswith(normcase(real_prefix)) for d in stdlib_dirs)
+    finally:
+        monkeypatch.undo()
+        get_stdlib_dirs.cache_clear()
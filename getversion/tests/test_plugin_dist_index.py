@@ -0,0 +1,132 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import sys
+
+import pytest
+
+from getversion import version_cache
+from getversion.main import find_module
+from getversion.plugin_dist_index import normalize_dist_name, get_version_using_dist_index, DistributionNotFound
+
+
+def test_normalize_dist_name():
+    assert normalize_dist_name('Foo.Bar_baz--qux') == 'foo-bar-baz-qux'
+
+
+def test_dist_index(tmpdir):
+    """Tests that the dist index finds distributions, and protects against the wrong location and old egg-infos"""
+    first = tmpdir.mkdir('first')
+    second = tmpdir.mkdir('second')
+    for d in (first, second):
+        d.mkdir('my_pkg').join('__init__.py').write('')
+        d.mkdir('other_pkg').join('__init__.py').write('')
+    first.mkdir('My_Pkg-1.2.3.dist-info')
+    second.mkdir('my_pkg-9.9.9.dist-info')
+    second.mkdir('other_pkg-0.0.1.dist-info')
+    second.mkdir('src_pkg').join('__init__.py').write('')
+    second.mkdir('src_pkg-0.1.0.dist-info')
+    second.mkdir('src_pkg.egg-info')
+
+    sys.path[0:0] = [str(first), str(second)]
+    version_cache.clear()
+    try:
+        assert get_version_using_dist_index(find_module('my_pkg')) == '1.2.3'
+
+        with pytest.raises(Exception, match="Another distribution"):
+            get_version_using_dist_index(find_module('other_pkg'))
+
+        with pytest.raises(Exception, match="source project"):
+            get_version_using_dist_index(find_module('src_pkg'))
+
+        with pytest.raises(DistributionNotFound):
+            get_version_using_dist_index(find_module('json'))
+    finally:
+        sys.path.remove(str(first))
+        sys.path.remove(str(second))
+        version_cache.clear()
+
+
+def test_dist_files_index(tmpdir):
+    """Tests that modules with an import name different from the distribution name are supported"""
+    tmpdir.mkdir('foo_mod').join('__init__.py').write('')
+    dist_info = tmpdir.mkdir('PyFoo-1.0.dist-info')
+    dist_info.join('RECORD').write('foo_mod/__init__.py,sha256=abc,0\nPyFoo-1.0.dist-info/RECORD,,\n')
+
+    tmpdir.mkdir('bar_mod').join('__init__.py').write('')
+    tmpdir.mkdir('Bar_Dist-2.0-py3.7.egg-info').join('top_level.txt').write('bar_mod\n')
+
+    sys.path.insert(0, str(tmpdir))
+    version_cache.clear()
+    try:
+        assert get_version_using_dist_index(find_module('foo_mod')) == '1.0'
+        assert get_version_using_dist_index(find_module('bar_mod')) == '2.0'
+    finally:
+        sys.path.remove(str(tmpdir))
+        version_cache.clear()
+
+
+def test_dist_files_index_sibling_location(tmpdir):
+    """Tests that files installed in a sibling folder sharing the location name as a prefix are not yielded"""
+    from os.path import abspath, normcase
+    from getversion.plugin_dist_index import _iter_installed_files
+
+    site = tmpdir.mkdir('site')
+    dist_info = site.mkdir('PyBaz-1.0.dist-info')
+    dist_info.join('RECORD').write('baz_mod.py,,\n../site2/baz_mod.py,,\n')
+
+    files = list(_iter_installed_files(str(dist_info), 'dist-info', normcase(abspath(str(site)))))
+    assert files == [normcase(abspath(str(site.join('baz_mod.py'))))]
+
+
+def test_dist_index_after_install(tmpdir):
+    """Tests that upgrading a distribution is seen after `version_cache.invalidate`, without clearing the indexes"""
+    from getversion import get_module_version
+
+    tmpdir.mkdir('mypkgx').join('__init__.py').write('')
+    tmpdir.mkdir('mypkgx-1.0.dist-info')
+    tmpdir.mkdir('foo_modx').join('__init__.py').write('')
+    tmpdir.mkdir('PyFooX-1.0.dist-info').join('RECORD').write('foo_modx/__init__.py,sha256=abc,0\n')
+
+    sys.path.insert(0, str(tmpdir))
+    version_cache.clear()
+    try:
+        mypkgx, foo_modx = find_module('mypkgx'), find_module('foo_modx')
+        assert get_module_version(mypkgx)[0] == '1.0'
+        assert get_module_version(foo_modx)[0] == '1.0'
+
+        # "pip install --upgrade"
+        tmpdir.join('mypkgx-1.0.dist-info').rename(tmpdir.join('mypkgx-2.0.dist-info'))
+        tmpdir.join('PyFooX-1.0.dist-info').rename(tmpdir.join('PyFooX-2.0.dist-info'))
+        version_cache.invalidate(mypkgx)
+        version_cache.invalidate(foo_modx)
+        assert get_module_version(mypkgx)[0] == '2.0'
+        assert get_module_version(foo_modx)[0] == '2.0'
+    finally:
+        sys.path.remove(str(tmpdir))
+        version_cache.clear()
+
+
+def test_dist_index_legacy_eggs(tmpdir):
+    """Tests that single-file egg-info (distutils installs) and unzipped eggs placed on sys.path are found"""
+    from getversion.plugin_eggs_and_wheels import read_version_from_egg_info
+
+    site = tmpdir.mkdir('site')
+    site.join('legacy_mod.py').write('')
+    site.join('legacy_mod-0.3-py3.11.egg-info').write('Metadata-Version: 1.0\nName: legacy-mod\nVersion: 0.3\n')
+    egg = tmpdir.mkdir('eggy_pkg-1.5-py3.11.egg')
+    egg.mkdir('eggy_pkg').join('__init__.py').write('')
+    egg.mkdir('EGG-INFO').join('PKG-INFO').write('Metadata-Version: 1.0\nName: eggy-pkg\nVersion: 1.5\n')
+
+    sys.path[0:0] = [str(site), str(egg)]
+    version_cache.clear()
+    try:
+        assert get_version_using_dist_index(find_module('legacy_mod')) == '0.3'
+        assert get_version_using_dist_index(find_module('eggy_pkg')) == '1.5'
+        assert read_version_from_egg_info(str(site.join('legacy_mod-0.3-py3.11.egg-info'))) == '0.3'
+        assert read_version_from_egg_info(str(egg.join('EGG-INFO'))) == '1.5'
+    finally:
+        sys.path.remove(str(site))
+        sys.path.remove(str(egg))
+        version_cache.clear()
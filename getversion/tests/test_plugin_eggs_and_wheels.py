@@ -2,10 +2,15 @@
 #
 #  License: BSD 3 clause
 
+import os
 from os.path import join, dirname
+from types import ModuleType
 
+import pytest
+
+from getversion import version_cache
 from getversion.plugin_eggs_and_wheels import read_pkg_name_from_dist_info_toplevel, read_version_from_dist_info, \
-    read_version_from_egg_info
+    read_version_from_egg_info, get_dist_folders_index, get_unzipped_wheel_or_egg_version, read_metadata_headers
 
 
 def test_dist_info():
@@ -34,3 +39,107 @@ def test_egg_info():
 
     version = read_version_from_egg_info(path)
     assert version == '0.1.0'
+
+
+def _module(folder, name):
+    m = ModuleType(name)
+    m.__path__ = [str(folder.mkdir(name))]
+    return m
+
+
+def test_dist_folders_index(tmpdir):
+    """Tests that the directory index is shared, uses normalized names, and is rebuilt when the directory changes"""
+    version_cache.clear()
+    tmpdir.mkdir('My.Pkg-1.0.0.dist-info')
+    tmpdir.mkdir('other_pkg.egg-info').join('PKG-INFO').write('Name: other-pkg\nVersion: 0.2\n')
+    tmpdir.join('not_a_dist.txt').write('')
+
+    index = get_dist_folders_index(str(tmpdir))
+    assert sorted(index) == ['my-pkg', 'other-pkg']
+    assert get_dist_folders_index(str(tmpdir)) is index
+
+    my_pkg = _module(tmpdir, 'my_pkg')
+    other_pkg = _module(tmpdir, 'other_pkg')
+    assert get_unzipped_wheel_or_egg_version(my_pkg) == '1.0.0'
+    assert get_unzipped_wheel_or_egg_version(other_pkg) == '0.2'
+
+    # upgrade: the directory mtime changes so the index is rebuilt
+    tmpdir.join('My.Pkg-1.0.0.dist-info').remove()
+    tmpdir.mkdir('my_pkg-2.0.0.dist-info')
+    st = os.stat(str(tmpdir))
+    os.utime(str(tmpdir), (st.st_atime, st.st_mtime + 1))
+    assert get_unzipped_wheel_or_egg_version(my_pkg) == '2.0.0'
+
+    with pytest.raises(Exception, match="No file matching"):
+        get_unzipped_wheel_or_egg_version(_module(tmpdir, 'unknown_pkg'))
+
+
+def test_metadata_headers(tmpdir):
+    """Tests that metadata files are read only as far as needed, and that the parsed fields are shared"""
+    version_cache.clear()
+    dist_info = tmpdir.mkdir('foo-1.2.dist-info')
+    metadata = dist_info.join('METADATA')
+    metadata.write_binary(b"Metadata-Version: 2.1\r\nName: foo\r\nVersion: 1.2\r\nSummary: a\r\n  b\r\n"
+                          b"Requires-Dist: bar\r\nRequires-Dist: baz\r\n\r\nVersion: 9.9\r\n" + b"x" * 100000)
+
+    assert read_version_from_dist_info(str(dist_info)) == '1.2'
+    headers = read_metadata_headers(str(metadata))
+    assert not headers.complete
+
+    assert headers.get('name') == 'foo'
+    assert headers.get('Summary') == 'a\nb'
+    assert headers.get_all('Requires-Dist') == ['bar', 'baz']
+    assert headers.complete
+    assert headers.get('Description') is None
+    assert headers.get_all('Version') == ['1.2']
+
+
+def test_metadata_headers_concurrent(tmpdir):
+    """Tests that a shared `MetadataHeaders` can be parsed from several threads at the same time"""
+    from threading import Thread
+    from time import sleep
+    from getversion.plugin_eggs_and_wheels import MetadataHeaders
+
+    requires = ['dep%s' % i for i in range(50)]
+    metadata = tmpdir.join('METADATA')
+    metadata.write_binary(b"Name: foo\n" + b"".join(b"Requires-Dist: %s\n" % r.encode() for r in requires)
+                          + b"Version: 1.0\n\nlong description")
+
+    class SlowFile(object):
+        """A file returning a few bytes at a time, slowly, so that the threads interleave"""
+        def __init__(self, path):
+            self.f = open(path, 'rb')
+
+        def read(self, size):
+            sleep(0.0001)
+            return self.f.read(min(size, 16))
+
+        def seek(self, offset):
+            self.f.seek(offset)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.f.close()
+
+    headers = MetadataHeaders(str(metadata), opener=SlowFile)
+    results = []
+
+    def _read(i):
+        if i % 2:
+            results.append(headers.get_all('Requires-Dist'))
+        else:
+            results.append([headers.get('Requires-Dist'), headers.get('Version')])
+
+    threads = [Thread(target=_read, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8
+    for res in results:
+        assert res in (requires, ['dep0', '1.0'])
+    assert headers.get_all('Requires-Dist') == requires
+    assert headers.get_all('Name') == ['foo']
@@ -0,0 +1,127 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import os
+import subprocess
+from os.path import join
+
+import pytest
+
+from getversion import version_cache
+from getversion.plugin_git_reader import read_git_version, GitReaderUndecided
+
+from getversion.plugin_setuptools_scm import fixed_version_scheme, has_git_command
+
+try:
+    from setuptools_scm import get_version
+except ImportError:
+    pytestmark = pytest.mark.skip("setuptools_scm is not installed")
+else:
+    if not has_git_command():
+        pytestmark = pytest.mark.skip("git is not available")
+
+
+def _git(repo, *args):
+    # subprocess.DEVNULL is not available in python 2
+    with open(os.devnull, 'wb') as devnull:
+        subprocess.check_call(('git', '-c', 'user.name=a', '-c', 'user.email=a@b.c') + args, cwd=str(repo),
+                              stdout=devnull, stderr=devnull)
+
+
+def _check_same_version(repo):
+    version_cache.clear()
+    expected = get_version(str(repo), version_scheme=fixed_version_scheme)
+    assert read_git_version(str(repo), str(repo.join('.git'))) == expected
+    return expected
+
+
+def test_git_reader_same_as_setuptools_scm(tmpdir):
+    """Tests that the pure-python git reader finds the same versions than setuptools_scm in various situations"""
+    repo = tmpdir.mkdir('repo')
+    _git(repo, 'init')
+    f = repo.join('foo.py')
+    for i in range(3):
+        f.write('a = %s\n' % i)
+        _git(repo, 'add', 'foo.py')
+        _git(repo, 'commit', '-m', 'commit %s' % i)
+
+    # no tag
+    _check_same_version(repo)
+
+    # exact tag (lightweight), then annotated with distance
+    _git(repo, 'tag', '1.0.0')
+    assert _check_same_version(repo) == '1.0.0'
+    f.write('a = 10\n')
+    _git(repo, 'commit', '-am', 'commit 10')
+    _git(repo, 'tag', '-a', '1.1.0rc1', '-m', 'rc')
+    _git(repo, 'commit', '--allow-empty', '-m', 'empty')
+    _check_same_version(repo)
+
+    # a branch and a merge
+    _git(repo, 'checkout', '-b', 'feature')
+    repo.join('bar.py').write('b = 1\n')
+    _git(repo, 'add', 'bar.py')
+    _git(repo, 'commit', '-m', 'bar')
+    _git(repo, 'checkout', '-')
+    _git(repo, 'merge', '--no-ff', '-m', 'merge', 'feature')
+    _check_same_version(repo)
+
+    # dirty: modified file, then staged file
+    f.write('a = 11\n')
+    _check_same_version(repo)
+    _git(repo, 'add', 'foo.py')
+    _check_same_version(repo)
+    _git(repo, 'commit', '-m', 'commit 11')
+
+    # packed objects and refs
+    _git(repo, 'gc', '--aggressive')
+    _check_same_version(repo)
+
+    # detached head
+    _git(repo, 'checkout', '1.0.0')
+    assert _check_same_version(repo) == '1.0.0'
+
+
+def test_git_reader_undecided_shallow(tmpdir):
+    """Tests that the reader does not try to compute the version of a shallow clone"""
+    repo = tmpdir.mkdir('repo')
+    _git(repo, 'init')
+    _git(repo, 'commit', '--allow-empty', '-m', 'first')
+    repo.join('.git', 'shallow').write('')
+    with pytest.raises(GitReaderUndecided):
+        read_git_version(str(repo), join(str(repo), '.git'))
+
+
+def test_git_reader_undecided_describe_command(tmpdir, monkeypatch):
+    """Tests that the reader does not guess when setuptools_scm uses `git describe` options that it can not reproduce"""
+    from getversion import plugin_git_reader
+
+    repo = tmpdir.mkdir('repo')
+    _git(repo, 'init')
+    _git(repo, 'commit', '--allow-empty', '-m', 'first')
+    monkeypatch.setattr(plugin_git_reader, 'get_describe_options', lambda: None)
+    with pytest.raises(GitReaderUndecided):
+        read_git_version(str(repo), join(str(repo), '.git'))
+
+
+def test_git_reader_new_tag(tmpdir):
+    """Tests that the version cached for a repository is updated when a tag is created"""
+    from types import ModuleType
+    from getversion.plugin_git_reader import get_version_using_git_reader
+
+    repo = tmpdir.mkdir('repo')
+    _git(repo, 'init')
+    m = ModuleType('foo')
+    m.__file__ = str(repo.mkdir('foo').join('__init__.py'))
+    repo.join('foo', '__init__.py').write('')
+    _git(repo, 'add', '.')
+    _git(repo, 'commit', '-m', 'first')
+    _git(repo, 'tag', '2.0.0')
+    version_cache.clear()
+    assert get_version_using_git_reader(m) == '2.0.0'
+
+    _git(repo, 'commit', '--allow-empty', '-m', 'second')
+    assert get_version_using_git_reader(m).startswith('2.0.1.dev1+')
+    _git(repo, 'tag', '4.0.0')
+    assert get_version_using_git_reader(m) == '4.0.0'
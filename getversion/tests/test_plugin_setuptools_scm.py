@@ -0,0 +1,90 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import subprocess
+from os.path import join
+from time import sleep
+from types import ModuleType
+
+import pytest
+
+from getversion import version_cache
+from getversion.plugin_setuptools_scm import find_scm_root, get_version_using_setuptools_scm, ScmInformationNotFound
+
+
+def test_find_scm_root(tmpdir):
+    """Tests that the repository root is found, including through `.git` file indirections (worktrees, submodules)"""
+    version_cache.clear()
+    repo = tmpdir.mkdir('repo')
+    repo.mkdir('.git')
+    sub = repo.mkdir('a').mkdir('b')
+    assert find_scm_root(str(sub)) == (str(repo), str(repo.join('.git')), 'git')
+
+    worktree = tmpdir.mkdir('worktree')
+    worktree.join('.git').write('gitdir: ../repo/.git/worktrees/wt\n')
+    assert find_scm_root(str(worktree)) == (str(worktree), join(str(repo), '.git', 'worktrees', 'wt'), 'git')
+
+    hg_repo = tmpdir.mkdir('hg_repo')
+    hg_repo.mkdir('.hg')
+    assert find_scm_root(str(hg_repo.mkdir('c'))) == (str(hg_repo), str(hg_repo.join('.hg')), 'hg')
+
+
+def test_scm_not_found_no_subprocess(tmpdir, monkeypatch):
+    """Tests that no subprocess is spawned when there is no repository"""
+    if find_scm_root(str(tmpdir)) is not None:
+        pytest.skip("the temporary folder is inside a repository")
+
+    def _no_subprocess(*args, **kwargs):
+        raise AssertionError("no subprocess should be spawned")
+    monkeypatch.setattr(subprocess, 'Popen', _no_subprocess)
+
+    m = ModuleType('foo')
+    m.__file__ = str(tmpdir.mkdir('foo').join('__init__.py'))
+    with pytest.raises(ScmInformationNotFound):
+        get_version_using_setuptools_scm(m)
+
+
+def test_scm_version_cached_per_root(tmpdir, monkeypatch):
+    """Tests that setuptools_scm is called once per repository root, until the repository state changes"""
+    from getversion import plugin_setuptools_scm
+
+    calls = []
+
+    def _get_version(root, **kwargs):
+        calls.append(root)
+        return '1.0.%s' % len(calls)
+
+    monkeypatch.setattr(plugin_setuptools_scm, 'get_setuptools_scm_get_version', lambda: _get_version)
+    monkeypatch.setattr(plugin_setuptools_scm, 'has_git_command', lambda: True)
+    version_cache.clear()
+
+    repo = tmpdir.mkdir('repo')
+    git = repo.mkdir('.git')
+    git.join('HEAD').write('ref: refs/heads/master\n')
+    git.mkdir('refs').mkdir('heads').join('master').write('a' * 40 + '\n')
+
+    modules = []
+    for name in ('foo', 'bar'):
+        m = ModuleType(name)
+        m.__file__ = str(repo.mkdir(name).join('__init__.py'))
+        modules.append(m)
+
+    assert [get_version_using_setuptools_scm(m) for m in modules] == ['1.0.1', '1.0.1']
+    assert calls == [str(repo)]
+
+    # new commit
+    git.join('refs', 'heads', 'master').write('b' * 41 + '\n')
+    assert [get_version_using_setuptools_scm(m) for m in modules] == ['1.0.2', '1.0.2']
+    assert len(calls) == 2
+
+    # new tag, possibly in a sub-folder (sleep so that the folders modification times change)
+    git.join('refs').mkdir('tags').join('1.0.0').write('b' * 40 + '\n')
+    assert [get_version_using_setuptools_scm(m) for m in modules] == ['1.0.3', '1.0.3']
+    sleep(0.05)
+    git.join('refs', 'tags').mkdir('v')
+    assert [get_version_using_setuptools_scm(m) for m in modules] == ['1.0.4', '1.0.4']
+    sleep(0.05)
+    git.join('refs', 'tags', 'v', '2.0.0').write('b' * 40 + '\n')
+    assert [get_version_using_setuptools_scm(m) for m in modules] == ['1.0.5', '1.0.5']
+    assert len(calls) == 5
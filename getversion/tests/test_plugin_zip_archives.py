@@ -0,0 +1,80 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import sys
+from zipfile import ZipFile
+
+import pytest
+
+from getversion import version_cache
+from getversion.main import find_module
+from getversion.plugin_zip_archives import get_version_from_zip_archive, get_zip_archive_index, NotInZipArchive, \
+    DistributionNotFoundInZipArchive
+
+
+def _write_zip(path, members):
+    with ZipFile(str(path), 'w') as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+
+
+def test_zip_archives(tmpdir):
+    """Tests that versions are read from zipped eggs, wheels and zipapps, with one index per archive"""
+    egg = tmpdir.join('zegg_pkg-0.5-py3.egg')
+    _write_zip(egg, {'zegg_pkg/__init__.py': '', 'EGG-INFO/PKG-INFO': 'Name: zegg-pkg\nVersion: 0.5\n'})
+    wheel = tmpdir.join('zwheel_mod-1.2.3-py3-none-any.whl')
+    _write_zip(wheel, {'zwheel_mod.py': '', 'zwheel_mod-1.2.3.dist-info/METADATA': 'Version: 1.2.3\n'})
+    app = tmpdir.join('app.pyz')
+    _write_zip(app, {'__main__.py': '',
+                     'lib/zapp_a/__init__.py': '', 'lib/zapp_a-2.0.dist-info/METADATA': 'Version: 2.0\n',
+                     'lib/zapp_b/__init__.py': '', 'lib/Zapp_Dist-3.1.egg-info/PKG-INFO': 'Version: 3.1\n',
+                     'lib/Zapp_Dist-3.1.egg-info/top_level.txt': 'zapp_b\n'})
+
+    paths = [str(egg), str(wheel), str(app.join('lib'))]
+    sys.path[0:0] = paths
+    version_cache.clear()
+    try:
+        # not imported
+        assert get_version_from_zip_archive(find_module('zapp_a')) == '2.0'
+
+        # imported
+        import zegg_pkg, zwheel_mod, zapp_b
+        assert get_version_from_zip_archive(zegg_pkg) == '0.5'
+        assert get_version_from_zip_archive(zwheel_mod) == '1.2.3'
+        assert get_version_from_zip_archive(zapp_b) == '3.1'
+
+        index = get_zip_archive_index(str(app))
+        assert get_zip_archive_index(str(app)) is index
+
+        with pytest.raises(NotInZipArchive):
+            get_version_from_zip_archive(pytest)
+    finally:
+        for p in paths:
+            sys.path.remove(p)
+        for m in ('zegg_pkg', 'zwheel_mod', 'zapp_a', 'zapp_b'):
+            sys.modules.pop(m, None)
+        version_cache.clear()
+
+
+def test_zip_archive_single_dist_without_top_level(tmpdir):
+    """Tests that the other modules of a zipapp do not get the version of its only distribution without top_level.txt"""
+    app = tmpdir.join('app2.pyz')
+    _write_zip(app, {'__main__.py': '', 'zvendored_mod.py': '',
+                     'zflit_dist/__init__.py': '', 'zflit_dist-1.0.dist-info/METADATA': 'Name: zflit-dist\n'
+                                                                                        'Summary: foo\n'
+                                                                                        'Version: 1.0\n\nlong'})
+    sys.path.insert(0, str(app))
+    version_cache.clear()
+    try:
+        with pytest.raises(DistributionNotFoundInZipArchive):
+            get_version_from_zip_archive(find_module('zvendored_mod'))
+
+        # the metadata file is parsed in several steps: parsing resumes where it stopped
+        headers = get_zip_archive_index(str(app)).get_metadata_headers('zflit_dist-1.0.dist-info/METADATA')
+        assert headers.get('Name') == 'zflit-dist'
+        assert get_version_from_zip_archive(find_module('zflit_dist')) == '1.0'
+        assert headers.get_all('Summary') == ['foo']
+    finally:
+        sys.path.remove(str(app))
+        version_cache.clear()
@@ -0,0 +1,75 @@
+#  Authors: Sylvain Marie <sylvain.marie@se.com>
+#
+#  License: BSD 3 clause
+
+import json
+import sys
+
+import pytest
+
+from getversion import get_module_version, get_version_str, version_cache, write_snapshot, use_snapshot
+from getversion.snapshot import load_snapshot, get_version_from_snapshot, iter_top_level_module_names
+
+
+def test_snapshot(tmpdir):
+    """Tests that a snapshot is written for the current environment and used before the root strategies"""
+    site = tmpdir.mkdir('site')
+    pkg = site.mkdir('snapshot_pkg')
+    pkg.join('__init__.py').write('')
+    pkg.join('sub.py').write('')
+    site.mkdir('snapshot_pkg-1.0.dist-info')
+    path = str(tmpdir.join('snapshot.json'))
+
+    sys.path.insert(0, str(site))
+    try:
+        version_cache.clear()
+        assert 'snapshot_pkg' in iter_top_level_module_names()
+        assert write_snapshot(path, ['snapshot_pkg', 'unknown_pkg_xyz']) == {'snapshot_pkg': '1.0'}
+        assert load_snapshot(path) == {'snapshot_pkg': '1.0'}
+
+        # the snapshot is authoritative: the dist-info folder is not read anymore
+        site.join('snapshot_pkg-1.0.dist-info').remove()
+        use_snapshot(path)
+        version_cache.clear()
+        assert get_version_str('snapshot_pkg') == '1.0'
+        version, details = get_module_version('snapshot_pkg')
+        assert version == '1.0'
+        assert details.version_found == '1.0'
+        assert details.winning_strategy is get_version_from_snapshot
+
+        # submodules without explicit version resolve their root module from the snapshot
+        assert get_version_str('snapshot_pkg.sub') == '1.0'
+
+        # another environment
+        with open(path) as f:
+            content = json.load(f)
+        content['prefix'] = '/another/prefix'
+        with open(path, 'w') as f:
+            json.dump(content, f)
+        with pytest.raises(ValueError, match="another python environment"):
+            use_snapshot(path)
+    finally:
+        use_snapshot(None)
+        sys.path.remove(str(site))
+        version_cache.clear()
+
+
+def test_snapshot_env_var_invalid(tmpdir, monkeypatch):
+    """Tests that a missing or stale snapshot set in the environment variable does not break version lookups"""
+    from getversion import snapshot
+
+    path = tmpdir.join('snapshot.json')
+    path.write(json.dumps(dict(format=snapshot.SNAPSHOT_FORMAT, python='0.0.0', prefix='/another/prefix',
+                               versions={'json': '9.9.9'})))
+    try:
+        for p in (str(path), str(tmpdir.join('missing.json'))):
+            monkeypatch.setenv(snapshot.SNAPSHOT_ENV_VAR, p)
+            monkeypatch.setattr(snapshot, '_env_var_checked', False)
+            version_cache.clear()
+            with pytest.warns(UserWarning, match="Ignoring the version snapshot"):
+                version, details = get_module_version('json')
+            assert details.winning_strategy is not get_version_from_snapshot
+            assert snapshot.get_active_snapshot() is None
+    finally:
+        use_snapshot(None)
+        version_cache.clear()
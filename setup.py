@@ -13,7 +13,7 @@ pkg_resources.require("setuptools_scm")
 from setuptools_scm import get_version  # noqa: E402
 
 # *************** Dependencies *********
-INSTALL_REQUIRES = ['stdlib_list', 'setuptools_scm', 'functools32;python_version<"3.2"',
+INSTALL_REQUIRES = ['setuptools_scm', 'functools32;python_version<"3.2"',
                     'scandir;python_version<"3.2"', 'pathlib2;python_version<"3.2"']
 DEPENDENCY_LINKS = []
 SETUP_REQUIRES = ['pytest-runner', 'setuptools_scm']
@@ -139,11 +139,12 @@ setup(
     # To provide executable scripts, use entry points in preference to the
     # "scripts" keyword. Entry points provide cross-platform support and allow
     # pip to create the appropriate form of executable for the target platform.
-    # entry_points={
-    #     'console_scripts': [
-    #         'sample=sample:main',
-    #     ],
-    # },
+    entry_points={
+        'console_scripts': [
+            'getversion=getversion.__main__:main',
+            'getversion-snapshot=getversion.snapshot:main',
+        ],
+    },
 
     # explicitly setting the flag to avoid `ply` being downloaded
     # see https://github.com/smarie/python-getversion/pull/5